@@ -0,0 +1,84 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded cache whose entries expire `ttl_seconds` after
+    being stored. When full, the least recently used entry is evicted.
+    A ttl of 0 (or less) disables caching.
+
+    Invalidation bumps a generation counter: a value computed before an
+    invalidation can be stored with set(..., generation=...) and is then
+    dropped instead of re-caching stale data.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        if self.ttl_seconds <= 0 or self.maxsize <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return  # Invalidated while the value was being computed
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Removes every entry whose key matches; returns how many were removed."""
+        with self._lock:
+            self._generation += 1
+            stale_keys = [key for key in self._entries if predicate(key)]
+            for key in stale_keys:
+                del self._entries[key]
+            return len(stale_keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Authenticated users resolved by get_current_user, keyed by (username, token).
+# Changes made through auth_service invalidate this worker's entries at once;
+# other workers pick them up within the TTL, so keep it short.
+AUTH_USER_CACHE_TTL_SECONDS = float(
+    os.getenv("AUTH_USER_CACHE_TTL_SECONDS", "30"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "1024"))
+
+authenticated_user_cache = TTLCache(
+    maxsize=AUTH_USER_CACHE_SIZE, ttl_seconds=AUTH_USER_CACHE_TTL_SECONDS)
+
+
+def invalidate_cached_user(username: str) -> int:
+    """Drops every cached session of `username` (after a role change, disabling, ...)."""
+    return authenticated_user_cache.invalidate_where(lambda key: key[0] == username)
@@ -0,0 +1,40 @@
+import functools
+import os
+from typing import Any, Callable, Optional
+
+import anyio
+import anyio.to_thread
+
+from ..db.database import MYSQL_POOL_SIZE
+from . import tracing
+
+# Number of threads that may run blocking database work at once in one worker.
+# Defaults to the connection pool size so threads never queue on the pool itself.
+DB_THREAD_LIMIT = int(os.getenv("DB_THREAD_LIMIT", str(MYSQL_POOL_SIZE)))
+
+_db_limiter: Optional[anyio.CapacityLimiter] = None
+
+
+def get_db_limiter() -> anyio.CapacityLimiter:
+    # Created lazily: a CapacityLimiter must be made inside the running event loop.
+    global _db_limiter
+    if _db_limiter is None:
+        _db_limiter = anyio.CapacityLimiter(DB_THREAD_LIMIT)
+    return _db_limiter
+
+
+async def run_db(func: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    """
+    Runs a blocking service function (mysql-connector I/O) in the database
+    thread pool, so the event loop keeps serving other requests meanwhile.
+
+        pos = await run_db(po_service.fetch_all_pos_from_db, skip=0, limit=10)
+
+    In a sampled trace the call becomes a span named after the function.
+    """
+    if tracing.is_tracing():
+        func = tracing.traced()(func)
+    return await anyio.to_thread.run_sync(
+        functools.partial(func, *args, **kwargs),
+        limiter=get_db_limiter()
+    )
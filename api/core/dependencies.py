@@ -9,6 +9,8 @@ from ..schemas import user_schemas
 # Adjusted import path assuming core is sibling to services
 from ..services import auth_service
 from . import security  # Import security utilities from the same core directory
+from .concurrency import run_db
+from .cache import authenticated_user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(
     tokenUrl="/auth/token")  # Points to your login endpoint
@@ -35,9 +37,17 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> user_schemas.
     except (JWTError, ValidationError):  # Catch both JWT errors and Pydantic validation errors
         raise credentials_exception
 
-    user = auth_service.get_user_by_username(username=token_data.sub)
+    # The token is verified above on every request; only the users lookup is cached.
+    cache_key = (token_data.sub, token)
+    user = authenticated_user_cache.get(cache_key)
+    if user is not None:
+        return user
+
+    cache_generation = authenticated_user_cache.generation
+    user = await run_db(auth_service.get_user_by_username, username=token_data.sub)
     if user is None:
         raise credentials_exception
+    authenticated_user_cache.set(cache_key, user, generation=cache_generation)
     return user
 
 
@@ -0,0 +1,243 @@
+import csv
+import io
+import math
+import re
+import zipfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, List, Sequence
+from xml.sax.saxutils import escape
+
+# Incremental CSV / XLSX writers for streaming exports.
+# A writer turns batches of row tuples into bytes as they arrive:
+#
+#     writer = make_export_writer("csv", column_names)
+#     yield writer.begin()
+#     for rows in batches:
+#         yield writer.write_rows(rows)
+#     yield writer.finish()
+#
+# Nothing but the current batch is held in memory, whatever the row count.
+
+EXPORT_FORMATS = ("csv", "xlsx")
+
+
+class CsvExportWriter:
+    media_type = "text/csv; charset=utf-8"
+    extension = "csv"
+
+    def __init__(self, column_names: Sequence[str]):
+        self.column_names = list(column_names)
+        self._buffer = io.StringIO()
+        self._writer = csv.writer(self._buffer)
+
+    def _drain(self) -> bytes:
+        data = self._buffer.getvalue().encode("utf-8")
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        return data
+
+    def begin(self) -> bytes:
+        # The BOM makes Excel read the file as UTF-8 instead of the ANSI code page
+        self._buffer.write("\ufeff")
+        self._writer.writerow(self.column_names)
+        return self._drain()
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        self._writer.writerows(rows)
+        return self._drain()
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class _ChunkBuffer:
+    """
+    Write-only, unseekable file object for ZipFile. ZipFile then writes each
+    entry followed by a data descriptor, so the archive can be sent as it is built.
+    """
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        data, self._chunks = b"".join(self._chunks), []
+        return data
+
+
+# Characters that are not allowed in XML 1.0 documents
+_ILLEGAL_XML_CHARS = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+# Indexes into cellXfs of _XLSX_STYLES
+_STYLE_DATETIME = 1
+_STYLE_DATE = 2
+_STYLE_HEADER = 3
+
+_XLSX_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="4">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="22" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="14" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '</cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<sheetViews><sheetView workbookViewId="0">'
+    '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+    '</sheetView></sheetViews><sheetData>'
+)
+_SHEET_END = '</sheetData></worksheet>'
+
+
+def _xlsx_cell(value: Any, style: int = 0) -> str:
+    style_attr = f' s="{style}"' if style else ""
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"{style_attr}><v>{int(value)}</v></c>'
+    if isinstance(value, (int, Decimal)) or (isinstance(value, float) and math.isfinite(value)):
+        return f"<c{style_attr}><v>{value}</v></c>"
+    if isinstance(value, datetime):
+        serial = (value.replace(tzinfo=None) - _EXCEL_EPOCH) / timedelta(days=1)
+        return f'<c s="{_STYLE_DATETIME}"><v>{serial}</v></c>'
+    if isinstance(value, date):
+        serial = (datetime.combine(value, time()) - _EXCEL_EPOCH) / timedelta(days=1)
+        return f'<c s="{_STYLE_DATE}"><v>{serial:g}</v></c>'
+    if isinstance(value, (bytes, bytearray)):
+        value = value.decode("utf-8", errors="replace")
+    text = escape(_ILLEGAL_XML_CHARS.sub("", str(value)))
+    return f'<c t="inlineStr"{style_attr}><is><t xml:space="preserve">{text}</t></is></c>'
+
+
+class XlsxExportWriter:
+    """
+    Writes an .xlsx workbook as a stream: cells are inline strings, so the
+    worksheet XML can be deflated and sent row by row. Sheets roll over at
+    Excel's row limit; the workbook parts listing them are written last.
+    """
+    media_type = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+    extension = "xlsx"
+    MAX_ROWS_PER_SHEET = 1_048_576
+
+    def __init__(self, column_names: Sequence[str], sheet_name: str = "Export"):
+        self.column_names = list(column_names)
+        # Sheet names are limited to 31 characters and may not contain []:*?/\
+        self.sheet_name = re.sub(r"[\[\]:*?/\\]", "_", sheet_name)[:28] or "Export"
+        self._buffer = _ChunkBuffer()
+        self._zip = zipfile.ZipFile(
+            self._buffer, "w", compression=zipfile.ZIP_DEFLATED)
+        self._sheet = None
+        self._sheet_count = 0
+        self._sheet_rows = 0
+
+    def _start_sheet(self) -> None:
+        if self._sheet is not None:
+            self._sheet.write(_SHEET_END.encode("utf-8"))
+            self._sheet.close()
+        self._sheet_count += 1
+        self._sheet = self._zip.open(
+            f"xl/worksheets/sheet{self._sheet_count}.xml", "w")
+        header = "".join(_xlsx_cell(name, _STYLE_HEADER)
+                         for name in self.column_names)
+        self._sheet.write(
+            (_SHEET_START + f'<row r="1">{header}</row>').encode("utf-8"))
+        self._sheet_rows = 1
+
+    def begin(self) -> bytes:
+        self._zip.writestr("_rels/.rels", _XLSX_ROOT_RELS)
+        self._zip.writestr("xl/styles.xml", _XLSX_STYLES)
+        self._start_sheet()
+        return self._buffer.drain()
+
+    def write_rows(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        parts = []
+        for row in rows:
+            if self._sheet_rows >= self.MAX_ROWS_PER_SHEET:
+                self._sheet.write("".join(parts).encode("utf-8"))
+                parts = []
+                self._start_sheet()
+            self._sheet_rows += 1
+            parts.append(f'<row r="{self._sheet_rows}">')
+            parts.extend(_xlsx_cell(value) for value in row)
+            parts.append("</row>")
+        self._sheet.write("".join(parts).encode("utf-8"))
+        return self._buffer.drain()
+
+    def _sheet_title(self, number: int) -> str:
+        title = self.sheet_name if number == 1 else f"{self.sheet_name} {number}"
+        return escape(title, {'"': "&quot;"})
+
+    def finish(self) -> bytes:
+        self._sheet.write(_SHEET_END.encode("utf-8"))
+        self._sheet.close()
+        numbers = range(1, self._sheet_count + 1)
+
+        sheets = "".join(
+            f'<sheet name="{self._sheet_title(n)}" sheetId="{n}" r:id="rId{n}"/>' for n in numbers)
+        self._zip.writestr("xl/workbook.xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"'
+            ' xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets>{sheets}</sheets></workbook>'))
+
+        relationships = "".join(
+            f'<Relationship Id="rId{n}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet{n}.xml"/>'
+            for n in numbers)
+        relationships += (
+            f'<Relationship Id="rId{self._sheet_count + 1}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>')
+        self._zip.writestr("xl/_rels/workbook.xml.rels", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            f'{relationships}</Relationships>'))
+
+        overrides = "".join(
+            f'<Override PartName="/xl/worksheets/sheet{n}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            for n in numbers)
+        self._zip.writestr("[Content_Types].xml", (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            f'{overrides}</Types>'))
+        self._zip.close()
+        return self._buffer.drain()
+
+
+def make_export_writer(export_format: str, column_names: Sequence[str], title: str = "Export"):
+    """Returns the writer for `export_format` ("csv" or "xlsx"). Raises ValueError otherwise."""
+    if export_format == "csv":
+        return CsvExportWriter(column_names)
+    if export_format == "xlsx":
+        return XlsxExportWriter(column_names, sheet_name=title)
+    raise ValueError(
+        f"Unknown export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}.")
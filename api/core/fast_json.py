@@ -0,0 +1,116 @@
+import os
+from datetime import date, datetime, time
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Type, get_args
+
+from fastapi import Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # Optional: without it responses take the regular pydantic path
+    orjson = None
+
+# Fast path for large list responses built from trusted database rows.
+# Instead of validating every row into a pydantic model (~40 Optional fields)
+# and serializing the result, rows are shaped to the model's fields with
+# cheap per-column type fixes and encoded with orjson. The JSON is the same as
+# the response_model path produces. Set FAST_JSON_RESPONSES=0 to turn it off.
+FAST_JSON_RESPONSES = os.getenv(
+    "FAST_JSON_RESPONSES", "1") != "0" and orjson is not None
+
+
+def fast_json_enabled() -> bool:
+    return FAST_JSON_RESPONSES and orjson is not None
+
+
+def _to_bool(value: Any) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "t", "yes", "y", "on")
+    return bool(value)
+
+
+def _to_datetime(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time())
+    if isinstance(value, str):
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _to_str(value: Any) -> str:
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    return str(value)
+
+
+# Field type -> (type rows normally already have, conversion for anything else)
+_COERCIONS = {
+    bool: (bool, _to_bool),
+    int: (int, int),
+    float: (float, float),
+    str: (str, _to_str),
+    datetime: (datetime, _to_datetime),
+}
+
+
+class RowShaper:
+    """
+    Turns row dicts into dicts with exactly the given model fields, in model
+    order: missing columns get the field default, extra columns are dropped,
+    and values of the wrong Python type are converted (tinyint -> bool,
+    Decimal/int -> float, DATE -> datetime, ...).
+    """
+
+    def __init__(self, model: Type[BaseModel], field_names: Optional[Sequence[str]] = None):
+        names = field_names if field_names is not None else tuple(model.model_fields)
+        self._fields: List[Tuple[str, Any, Optional[type], Any]] = []
+        for name in names:
+            field = model.model_fields[name]
+            annotation_args = [arg for arg in get_args(field.annotation)
+                               if arg is not type(None)]
+            target = annotation_args[0] if annotation_args else field.annotation
+            expected_type, convert = _COERCIONS.get(target, (None, None))
+            default = None if field.is_required() else field.get_default()
+            self._fields.append((name, default, expected_type, convert))
+
+    def shape(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        shaped = {}
+        for name, default, expected_type, convert in self._fields:
+            value = row.get(name, default)
+            if value is not None and convert is not None and value.__class__ is not expected_type:
+                value = convert(value)
+            shaped[name] = value
+        return shaped
+
+    def shape_many(self, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        shape = self.shape
+        return [shape(row) for row in rows]
+
+
+@lru_cache(maxsize=64)
+def get_row_shaper(model: Type[BaseModel], field_names: Optional[Tuple[str, ...]] = None) -> RowShaper:
+    return RowShaper(model, field_names)
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode("utf-8", errors="replace")
+    if isinstance(value, (set, frozenset)):
+        return list(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+def json_response(content: Any, status_code: int = 200, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Response with `content` encoded by orjson (only call when fast_json_enabled())."""
+    return Response(content=dumps(content), status_code=status_code,
+                    headers=headers, media_type="application/json")
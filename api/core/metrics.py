@@ -0,0 +1,305 @@
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from . import progress, tracing
+
+# In-process metrics, exposed on GET /metrics in the Prometheus text format
+# (version 0.0.4). Each API worker keeps its own values; Prometheus scrapes
+# every worker (or sums them) as usual.
+#
+#     with track_query("po_list") as query:
+#         cursor.execute(...)
+#         rows = cursor.fetchall()
+#         query.rows = len(rows)
+#
+#     with time_stage("etl", "load"):
+#         ...
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+ACQUIRE_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0)
+ROW_COUNT_BUCKETS = (0, 1, 10, 100, 1000, 10000, 100000, 1000000)
+STAGE_BUCKETS = (0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(pairs: Iterable[Tuple[str, str]]) -> str:
+    rendered = ",".join(f'{name}="{_escape_label_value(str(value))}"' for name, value in pairs)
+    return f"{{{rendered}}}" if rendered else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.documentation}",
+                f"# TYPE {self.name} {self.metric_type}"]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return self._header() + [
+            f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}"
+            for key, value in values]
+
+
+class CallbackMetric(_Metric):
+    """
+    Values read from `collect` at scrape time, as {label values tuple: value}.
+    For numbers kept elsewhere (e.g. pool statistics): a gauge, or a counter
+    when the source only ever grows.
+    """
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 collect: Callable[[], Dict[Tuple[str, ...], float]], metric_type: str = "gauge"):
+        super().__init__(name, documentation, labelnames)
+        self._collect = collect
+        self.metric_type = metric_type
+
+    def render(self) -> List[str]:
+        try:
+            values = sorted(self._collect().items())
+        except Exception:
+            values = []  # A failing source must not break the whole scrape
+        return self._header() + [
+            f"{self.name}{_format_labels(zip(self.labelnames, key))} {_format_value(value)}"
+            for key, value in values]
+
+
+class Histogram(_Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    @contextmanager
+    def time(self, **labels: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((key, (list(counts), total))
+                            for key, (counts, total) in self._series.items())
+        lines = self._header()
+        for key, (counts, total) in series:
+            label_pairs = list(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                lines.append(
+                    f"{self.name}_bucket{_format_labels(label_pairs + [('le', _format_value(bound))])} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(label_pairs)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(label_pairs)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+HTTP_REQUEST_SECONDS = REGISTRY.register(Histogram(
+    "http_request_duration_seconds", "Time to answer HTTP requests, by route template.",
+    ("method", "route", "status")))
+DB_QUERY_SECONDS = REGISTRY.register(Histogram(
+    "db_query_duration_seconds", "Time spent executing and fetching named queries.",
+    ("query",)))
+DB_QUERY_ROWS = REGISTRY.register(Histogram(
+    "db_query_rows", "Rows returned or affected per named query.",
+    ("query",), buckets=ROW_COUNT_BUCKETS))
+DB_QUERY_ERRORS = REGISTRY.register(Counter(
+    "db_query_errors_total", "Named queries that raised an error.", ("query",)))
+DB_POOL_ACQUIRE_SECONDS = REGISTRY.register(Histogram(
+    "db_pool_acquire_seconds", "Time to check a connection out of the MySQL pool (including connect).",
+    buckets=ACQUIRE_BUCKETS))
+PIPELINE_STAGE_SECONDS = REGISTRY.register(Histogram(
+    "pipeline_stage_duration_seconds", "Duration of ETL and folder generation stages.",
+    ("pipeline", "stage"), buckets=STAGE_BUCKETS))
+PIPELINE_STAGE_FAILURES = REGISTRY.register(Counter(
+    "pipeline_stage_failures_total", "ETL and folder generation stages that raised an error.",
+    ("pipeline", "stage")))
+
+
+def register_callback(name: str, documentation: str, labelnames: Sequence[str],
+                      collect: Callable[[], Dict[Tuple[str, ...], float]],
+                      metric_type: str = "gauge") -> CallbackMetric:
+    """Registers a metric whose values are read from `collect` on every scrape."""
+    return REGISTRY.register(CallbackMetric(name, documentation, labelnames, collect, metric_type))
+
+
+def render_metrics() -> str:
+    return REGISTRY.render()
+
+
+class QueryRecord:
+    """Filled in by the caller of track_query(); `rows` is optional."""
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows: Optional[int] = None
+
+
+@contextmanager
+def track_query(name: str):
+    """
+    Times a named query (execute + fetch). Set `.rows` on the yielded record
+    to count rows. In a sampled trace the query is also a "db.query" span.
+    """
+    record = QueryRecord()
+    started = time.perf_counter()
+    with tracing.span("db.query", query=name) as query_span:
+        try:
+            yield record
+        except BaseException:
+            DB_QUERY_ERRORS.inc(query=name)
+            raise
+        finally:
+            DB_QUERY_SECONDS.observe(time.perf_counter() - started, query=name)
+            if record.rows is not None and record.rows >= 0:
+                DB_QUERY_ROWS.observe(record.rows, query=name)
+                if query_span is not None:
+                    query_span.set_attribute("rows", record.rows)
+
+
+# Called as listener(pipeline, stage, seconds, failed) after every stage, so a
+# job process can forward its stage timings to the API worker that serves /metrics.
+_stage_listeners: List[Callable[[str, str, float, bool], None]] = []
+
+
+def add_stage_listener(listener: Callable[[str, str, float, bool], None]) -> None:
+    _stage_listeners.append(listener)
+
+
+def observe_stage(pipeline: str, stage: str, seconds: float, failed: bool = False) -> None:
+    """Records a finished pipeline stage (also used for stages timed in another process)."""
+    PIPELINE_STAGE_SECONDS.observe(seconds, pipeline=pipeline, stage=stage)
+    if failed:
+        PIPELINE_STAGE_FAILURES.inc(pipeline=pipeline, stage=stage)
+
+
+@contextmanager
+def time_stage(pipeline: str, stage: str):
+    """Times one stage of the ETL ("etl") or folder generation ("folder_generation")."""
+    started = time.perf_counter()
+    failed = False
+    progress.stage_started(pipeline, stage)
+    try:
+        yield
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        seconds = time.perf_counter() - started
+        observe_stage(pipeline, stage, seconds, failed)
+        for listener in _stage_listeners:
+            listener(pipeline, stage, seconds, failed)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording http_request_duration_seconds. Requests are
+    labelled with the matched route template (e.g. /purchase-orders/{po_id}),
+    so ids in paths do not create new series; unmatched paths share one label.
+    Streamed responses are timed until their last chunk is sent.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = {"code": 500}
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                method=scope["method"], route=route_path, status=str(status["code"]))
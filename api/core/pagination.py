@@ -0,0 +1,87 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence, Tuple
+
+# Keyset (cursor) pagination helpers.
+# A cursor is the sort key of the last row of a page, JSON-encoded and base64'd
+# so clients treat it as an opaque token. The next page is then fetched with a
+# WHERE clause on that key instead of OFFSET, so page N costs the same as page 1.
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict) and "dt" in value:
+        return datetime.fromisoformat(value["dt"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encodes the sort key values of a row into an opaque cursor string."""
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, expected_length: int) -> List[Any]:
+    """
+    Decodes a cursor produced by encode_cursor.
+    Raises ValueError if the cursor is malformed or has the wrong number of values.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except Exception as e:
+        raise ValueError(f"Malformed cursor: {e}")
+    if not isinstance(values, list) or len(values) != expected_length:
+        raise ValueError("Malformed cursor: unexpected sort key.")
+    return [_decode_value(v) for v in values]
+
+
+def keyset_condition_desc(columns: Sequence[str], values: Sequence[Any], nullable_columns: Sequence[str] = ()) -> Tuple[str, List[Any]]:
+    """
+    Builds a WHERE fragment selecting the rows that come after `values` when
+    ordering by every column DESC. MySQL sorts NULL as the smallest value, i.e.
+    last in DESC order, so nullable columns get the matching IS NULL branches.
+    Returns (sql, params).
+    """
+    column, value = columns[0], values[0]
+    nullable = column in nullable_columns
+    params: List[Any] = []
+
+    if value is None:
+        less_sql = None  # Nothing sorts after NULL in this column
+        equal_sql = f"{column} IS NULL"
+    else:
+        less_sql = f"({column} < %s OR {column} IS NULL)" if nullable else f"{column} < %s"
+        params.append(value)
+        equal_sql = f"{column} = %s"
+
+    if len(columns) == 1:
+        return (less_sql or "FALSE"), params
+
+    rest_sql, rest_params = keyset_condition_desc(
+        columns[1:], values[1:], nullable_columns)
+    tie_sql = f"({equal_sql} AND {rest_sql})"
+    if value is not None:
+        params.append(value)
+    params.extend(rest_params)
+    if less_sql is None:
+        return tie_sql, params
+    return f"({less_sql} OR {tie_sql})", params
+
+
+def next_cursor_for(rows: List[dict], limit: int, key_columns: Sequence[str]) -> Optional[str]:
+    """
+    Given rows fetched with LIMIT limit + 1, trims the look-ahead row in place
+    and returns the cursor for the next page (None on the last page).
+    """
+    if len(rows) <= limit:
+        return None
+    del rows[limit:]
+    last_row = rows[-1]
+    return encode_cursor([last_row[col] for col in key_columns])
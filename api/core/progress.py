@@ -0,0 +1,46 @@
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Row-level progress of the ETL and folder generation pipelines. A stage
+# reports how many rows it has handled so far (and the total when known):
+#
+#     for start in range(0, len(rows), batch_size):
+#         ...
+#         report_progress("etl", "load", start + batch_size, len(rows))
+#
+# Listeners are called as listener(pipeline, stage, rows_done, rows_total);
+# the job process forwards them to the API worker, which streams them on
+# /process/jobs/{id}/events. Without listeners a report is a no-op.
+
+# Minimum seconds between two reports of the same stage; the last report of
+# a stage (rows_done == rows_total) always goes through.
+PROGRESS_INTERVAL = float(os.getenv("PROGRESS_INTERVAL", "0.5"))
+
+_listeners: List[Callable[[str, str, Optional[int], Optional[int]], None]] = []
+_last_report: Dict[Tuple[str, str], float] = {}
+
+
+def add_progress_listener(listener: Callable[[str, str, Optional[int], Optional[int]], None]) -> None:
+    _listeners.append(listener)
+
+
+def stage_started(pipeline: str, stage: str) -> None:
+    """Called by metrics.time_stage when a stage begins (rows_done is None)."""
+    if not _listeners:
+        return
+    _last_report[(pipeline, stage)] = time.monotonic()
+    for listener in _listeners:
+        listener(pipeline, stage, None, None)
+
+
+def report_progress(pipeline: str, stage: str, rows_done: int, rows_total: Optional[int] = None) -> None:
+    if not _listeners:
+        return
+    now = time.monotonic()
+    key = (pipeline, stage)
+    if rows_done != rows_total and now - _last_report.get(key, 0.0) < PROGRESS_INTERVAL:
+        return
+    _last_report[key] = now
+    for listener in _listeners:
+        listener(pipeline, stage, rows_done, rows_total)
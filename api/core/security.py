@@ -1,3 +1,7 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Optional, Any
 from jose import JWTError, jwt
@@ -12,7 +16,20 @@ ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30  # Token berlaku selama 30 menit
 
 # Password Hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# bcrypt cost factor for new hashes (each +1 doubles the work). Existing hashes
+# keep verifying at the cost they were created with.
+# Use benchmarks/bench_login_bcrypt.py to pick a value that fits the latency budget.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(
+    schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+# bcrypt is CPU-bound, so it runs in its own small thread pool: it neither
+# blocks the event loop nor occupies the database threads (see run_db).
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Hash/verify jobs allowed to be running or queued at once; beyond that,
+# requests are refused with PasswordHashingBusyError instead of piling up.
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", "32"))
 
 
 class TokenPayload(BaseModel):
@@ -42,6 +59,76 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
+
+class PasswordHashingBusyError(Exception):
+    """Raised when the password hashing queue is full."""
+
+
+_hash_executor: Optional[ThreadPoolExecutor] = None
+_hash_state_lock = threading.Lock()
+_hash_pending = 0
+_hash_rejected = 0
+
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    with _hash_state_lock:
+        if _hash_executor is None:
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+        return _hash_executor
+
+
+def _release_hash_slot(_future) -> None:
+    global _hash_pending
+    with _hash_state_lock:
+        _hash_pending -= 1
+
+
+async def _run_hash_job(func, *args):
+    global _hash_pending, _hash_rejected
+    executor = _get_hash_executor()
+    with _hash_state_lock:
+        if _hash_pending >= PASSWORD_HASH_MAX_PENDING:
+            _hash_rejected += 1
+            raise PasswordHashingBusyError(
+                f"{_hash_pending} password hashing jobs already pending.")
+        _hash_pending += 1
+    # The slot is freed when the job finishes (or is cancelled before starting),
+    # even if the awaiting request has gone away.
+    future = executor.submit(func, *args)
+    future.add_done_callback(_release_hash_slot)
+    return await asyncio.wrap_future(future)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password in the password hashing pool. Raises PasswordHashingBusyError when full."""
+    return await _run_hash_job(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """get_password_hash in the password hashing pool. Raises PasswordHashingBusyError when full."""
+    return await _run_hash_job(get_password_hash, password)
+
+
+def get_password_hash_stats() -> dict:
+    with _hash_state_lock:
+        return {
+            "workers": PASSWORD_HASH_WORKERS,
+            "max_pending": PASSWORD_HASH_MAX_PENDING,
+            "pending": _hash_pending,
+            "rejected": _hash_rejected,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+        }
+
+
+def shutdown_password_hash_executor() -> None:
+    global _hash_executor
+    with _hash_state_lock:
+        executor, _hash_executor = _hash_executor, None
+    if executor is not None:
+        executor.shutdown(wait=False, cancel_futures=True)
+
 # Fungsi untuk decode token dan mendapatkan payload (akan dikembangkan lebih lanjut
 # untuk digunakan dengan FastAPI dependency injection untuk mendapatkan current_user)
 # Contoh:
@@ -0,0 +1,302 @@
+import functools
+import inspect
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, List, Optional
+
+from fastapi.routing import APIRoute
+
+# Lightweight request tracing. A sampled request gets a trace id; the route
+# handler, service calls made through run_db, named queries and every SQL
+# execution become nested spans. When the request finishes its spans are
+# written as JSON lines, one span per line:
+#
+#     {"trace_id": "...", "span_id": "...", "parent_id": "...", "name": "sql.execute",
+#      "start": 1718000000.123, "duration_ms": 4.2, "status": "ok", "attributes": {...}}
+#
+# TRACE_SAMPLE_RATE is the fraction of requests traced (0 = off, the default).
+# Unsampled requests only pay for a context variable lookup per span.
+# TRACE_EXPORTER is "jsonl" (append to TRACE_FILE) or "stdout".
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "jsonl").lower()
+TRACE_FILE = os.getenv("TRACE_FILE", "traces.jsonl")
+TRACE_ID_HEADER = "X-Trace-Id"
+
+# Longest SQL text kept on a span
+MAX_STATEMENT_LENGTH = 500
+
+
+class Trace:
+    """The spans of one sampled request (or job), exported together when it ends."""
+    __slots__ = ("trace_id", "spans", "_lock")
+
+    def __init__(self, trace_id: Optional[str] = None):
+        self.trace_id = trace_id or uuid.uuid4().hex
+        self.spans: List["Span"] = []
+        self._lock = threading.Lock()
+
+    def add(self, span: "Span") -> None:
+        with self._lock:
+            self.spans.append(span)
+
+
+class Span:
+    __slots__ = ("trace", "span_id", "parent_id", "name", "attributes",
+                 "start", "_started", "duration_ms", "status", "error")
+
+    def __init__(self, trace: Trace, name: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.trace = trace
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.name = name
+        self.attributes = attributes
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+        self.status = "ok"
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        self.duration_ms = round((time.perf_counter() - self._started) * 1000, 3)
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"
+        self.trace.add(self)
+
+    def as_dict(self) -> Dict[str, Any]:
+        record = {
+            "trace_id": self.trace.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 6),
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "attributes": self.attributes,
+        }
+        if self.error:
+            record["error"] = self.error
+        return record
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_export_lock = threading.Lock()
+
+
+def tracing_enabled() -> bool:
+    return TRACE_SAMPLE_RATE > 0
+
+
+def is_tracing() -> bool:
+    """True inside a sampled trace."""
+    return _current_span.get() is not None
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current_span.get()
+    return span.trace.trace_id if span is not None else None
+
+
+def export_trace(trace: Trace) -> None:
+    """Writes the finished spans of a trace, in start order."""
+    lines = "".join(
+        json.dumps(span.as_dict(), default=str) + "\n"
+        for span in sorted(trace.spans, key=lambda span: span.start))
+    with _export_lock:
+        if TRACE_EXPORTER == "stdout":
+            sys.stdout.write(lines)
+            sys.stdout.flush()
+        else:
+            with open(TRACE_FILE, "a", encoding="utf-8") as trace_file:
+                trace_file.write(lines)
+
+
+@contextmanager
+def start_trace(name: str, trace_id: Optional[str] = None, force: bool = False, **attributes: Any):
+    """
+    Starts a trace with a root span if this call is sampled (or `force` is
+    set), exporting it when the block exits. Yields the root span, or None
+    when not sampled.
+    """
+    if not force and (TRACE_SAMPLE_RATE <= 0 or random.random() >= TRACE_SAMPLE_RATE):
+        yield None
+        return
+    trace = Trace(trace_id)
+    root = Span(trace, name, None, attributes)
+    token = _current_span.set(root)
+    try:
+        yield root
+    except BaseException as e:
+        root.finish(e)
+        raise
+    else:
+        root.finish()
+    finally:
+        _current_span.reset(token)
+        try:
+            export_trace(trace)
+        except Exception:
+            pass  # Losing a trace must never fail the request
+
+
+@contextmanager
+def span(name: str, **attributes: Any):
+    """
+    Child span of the current span; yields None (and records nothing) outside
+    a sampled trace.
+
+        with tracing.span("classification.parse_slug", slug=slug):
+            ...
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield None
+        return
+    child = Span(parent.trace, name, parent.span_id, attributes)
+    token = _current_span.set(child)
+    try:
+        yield child
+    except BaseException as e:
+        child.finish(e)
+        raise
+    else:
+        child.finish()
+    finally:
+        _current_span.reset(token)
+
+
+def _default_span_name(func: Callable) -> str:
+    module = (getattr(func, "__module__", None) or "").rsplit(".", 1)[-1]
+    function_name = getattr(func, "__name__", type(func).__name__)
+    return f"{module}.{function_name}" if module else function_name
+
+
+def traced(name: Optional[str] = None):
+    """Decorator running a sync or async function inside a span (default name: module.function)."""
+    def decorate(func: Callable) -> Callable:
+        span_name = name or _default_span_name(func)
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if _current_span.get() is None:
+                    return await func(*args, **kwargs)
+                with span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _current_span.get() is None:
+                return func(*args, **kwargs)
+            with span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+def _statement_text(statement: Any) -> str:
+    text = re.sub(r"\s+", " ", str(statement)).strip()
+    return text[:MAX_STATEMENT_LENGTH]
+
+
+class TracedCursor:
+    """Cursor proxy recording one span per execute()/executemany()."""
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def execute(self, operation, params=None, *args, **kwargs):
+        with span("sql.execute", statement=_statement_text(operation)) as sql_span:
+            result = self._cursor.execute(operation, params, *args, **kwargs)
+            if sql_span is not None:
+                sql_span.set_attribute("rowcount", self._cursor.rowcount)
+            return result
+
+    def executemany(self, operation, seq_params, *args, **kwargs):
+        with span("sql.executemany", statement=_statement_text(operation)) as sql_span:
+            result = self._cursor.executemany(operation, seq_params, *args, **kwargs)
+            if sql_span is not None:
+                sql_span.set_attribute("rowcount", self._cursor.rowcount)
+            return result
+
+
+def trace_cursor(cursor):
+    """Wraps a DB cursor so its statements show up in the current trace (no-op when not tracing)."""
+    if cursor is None or _current_span.get() is None:
+        return cursor
+    return TracedCursor(cursor)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware starting a trace for a sampled share of HTTP requests.
+    The root span is named after the matched route template; the trace id is
+    returned in the X-Trace-Id response header so a slow response can be
+    looked up in the trace file.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracing_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        with start_trace("http.request", method=scope["method"], path=scope["path"]) as root:
+            if root is None:
+                await self.app(scope, receive, send)
+                return
+
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("status", message["status"])
+                    headers = list(message.get("headers", []))
+                    headers.append((TRACE_ID_HEADER.lower().encode("latin-1"),
+                                    root.trace.trace_id.encode("latin-1")))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                route = scope.get("route")
+                root.name = f"{scope['method']} {getattr(route, 'path', None) or 'unmatched'}"
+
+
+class TracedRoute(APIRoute):
+    """
+    Route class giving each handler call its own span (request validation,
+    the handler itself and response serialization):
+
+        router = APIRouter(prefix="/classification", route_class=TracedRoute)
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        span_name = f"route.{self.name}"
+
+        async def traced_handler(request):
+            if _current_span.get() is None:
+                return await handler(request)
+            with span(span_name):
+                return await handler(request)
+
+        return traced_handler
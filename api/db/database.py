@@ -1,6 +1,11 @@
 import mysql.connector
 import os
+import threading
+import time
+from contextlib import contextmanager
 from dotenv import load_dotenv
+from ..core.metrics import DB_POOL_ACQUIRE_SECONDS, register_callback
+from ..core.tracing import trace_cursor
 
 # Load environment variables from .env file
 # This ensures that if this module is imported, .env is loaded.
@@ -12,21 +17,32 @@ MYSQL_HOST = os.getenv("MYSQL_HOST")
 MYSQL_USER = os.getenv("MYSQL_USER")
 MYSQL_PASSWORD = os.getenv("MYSQL_PASSWORD")
 MYSQL_DATABASE = os.getenv("MYSQL_DATABASE")
-MYSQL_PORT = os.getenv("MYSQL_PORT")
+MYSQL_PORT = os.getenv("MYSQL_PORT", "3306")
 
+# Connection pool settings. Size the pool to roughly the number of threads that
+# query MySQL concurrently in one worker; checkouts beyond that wait.
+MYSQL_POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", "10"))
+# Seconds a checkout waits for a free connection before giving up.
+MYSQL_POOL_TIMEOUT = float(os.getenv("MYSQL_POOL_TIMEOUT", "10"))
+# Idle connections older than this are pinged before being handed out.
+MYSQL_POOL_PING_AFTER_IDLE = float(
+    os.getenv("MYSQL_POOL_PING_AFTER_IDLE", "5"))
 
-def get_mysql_connection():
-    """Establishes and returns a connection to the MySQL database."""
+
+class DatabaseUnavailableError(Exception):
+    """Raised by mysql_connection() when no connection could be obtained."""
+
+
+def _open_raw_connection():
+    """Opens a new physical connection, or returns None on failure."""
     try:
-        conn = mysql.connector.connect(
+        return mysql.connector.connect(
             host=MYSQL_HOST,
             user=MYSQL_USER,
             password=MYSQL_PASSWORD,
             database=MYSQL_DATABASE,
             port=MYSQL_PORT
         )
-        # print("Successfully connected to MySQL from database.py.") # Optional: for debugging
-        return conn
     except mysql.connector.Error as err:
         print(f"Error connecting to MySQL from database.py: {err}")
         if err.errno == 1045:
@@ -39,16 +55,382 @@ def get_mysql_connection():
                 f"Can't connect to MySQL server on '{MYSQL_HOST}:{MYSQL_PORT}'. Check server status and host/port in .env.")
         else:
             print(f"Unhandled MySQL error from database.py: {err}")
-        # In a real application, you might want to raise the exception
-        # or handle it more gracefully depending on the context.
         return None
+    except Exception as e:  # e.g. malformed connection settings
+        print(f"Unexpected error connecting to MySQL from database.py: {e}")
+        return None
+
+
+class PooledConnection:
+    """
+    Wraps a pooled mysql-connector connection.
+    Behaves like the underlying connection, except that close() hands it back
+    to the pool instead of closing the socket.
+    """
+
+    def __init__(self, pool, raw_conn):
+        self._pool = pool
+        self._raw_conn = raw_conn
+
+    def __getattr__(self, name):
+        raw_conn = self.__dict__.get("_raw_conn")
+        if raw_conn is None:
+            raise AttributeError(
+                f"Connection already returned to the pool (accessing '{name}').")
+        return getattr(raw_conn, name)
+
+    def cursor(self, *args, **kwargs):
+        # In a sampled trace every statement becomes a span (see core.tracing)
+        return trace_cursor(self.__getattr__("cursor")(*args, **kwargs))
+
+    def is_connected(self) -> bool:
+        # True until the handle is returned to the pool, so the common
+        # `if conn.is_connected(): conn.close()` cleanup always releases it.
+        # A dead socket is detected on release or by the checkout health check.
+        return self._raw_conn is not None
+
+    def close(self):
+        raw_conn, self._raw_conn = self._raw_conn, None
+        if raw_conn is not None:
+            self._pool.release(raw_conn)
+
+    def discard(self):
+        """
+        Closes the underlying connection instead of returning it to the pool,
+        e.g. when a streamed (unbuffered) result was abandoned half-read and
+        draining the remaining rows would cost more than reconnecting.
+        """
+        raw_conn, self._raw_conn = self._raw_conn, None
+        if raw_conn is not None:
+            self._pool.discard(raw_conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class BoundedConnectionPool:
+    """
+    Thread-safe pool of at most `size` MySQL connections.
+    Connections are opened lazily, health-checked on checkout when they have
+    been idle for a while, and reset (rolled back) when they are returned.
+    """
+
+    def __init__(self, size: int, timeout: float, ping_after_idle: float):
+        self.size = size
+        self.timeout = timeout
+        self.ping_after_idle = ping_after_idle
+        self._condition = threading.Condition()
+        self._idle = []  # Stack of (raw_conn, returned_at)
+        self._open_count = 0
+        self._in_use = 0
+        # Statistics
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_seconds_total = 0.0
+        self._wait_seconds_max = 0.0
+        self._timeouts = 0
+        self._connections_opened = 0
+        self._health_check_failures = 0
+
+    def acquire(self):
+        """Checks out a connection, or returns None if none is available in time."""
+        started = time.monotonic()
+        deadline = started + self.timeout
+        waited = False
+        raw_conn = None
+        with self._condition:
+            while True:
+                if self._idle:
+                    raw_conn, returned_at = self._idle.pop()
+                    break
+                if self._open_count < self.size:
+                    self._open_count += 1  # Reserve a slot, connect outside the lock
+                    returned_at = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._timeouts += 1
+                    print(
+                        f"MySQL pool exhausted: no connection free after {self.timeout}s (size={self.size}).")
+                    return None
+                waited = True
+                self._condition.wait(remaining)
+            self._in_use += 1
+            self._checkouts += 1
+            if waited:
+                wait_seconds = time.monotonic() - started
+                self._waits += 1
+                self._wait_seconds_total += wait_seconds
+                self._wait_seconds_max = max(
+                    self._wait_seconds_max, wait_seconds)
+
+        if raw_conn is not None and time.monotonic() - returned_at >= self.ping_after_idle:
+            if not self._is_healthy(raw_conn):
+                with self._condition:
+                    self._health_check_failures += 1
+                self._close_quietly(raw_conn)
+                raw_conn = None
+
+        if raw_conn is None:
+            raw_conn = _open_raw_connection()
+            if raw_conn is None:
+                self._forget_slot()
+                return None
+            with self._condition:
+                self._connections_opened += 1
+
+        DB_POOL_ACQUIRE_SECONDS.observe(time.monotonic() - started)
+        return PooledConnection(self, raw_conn)
+
+    def prefill(self, count: int) -> int:
+        """
+        Opens connections until at least `count` (capped at the pool size) are
+        open, leaving them idle in the pool. Returns how many were checked out.
+        """
+        held = []
+        try:
+            for _ in range(min(count, self.size)):
+                conn = self.acquire()
+                if conn is None:
+                    break
+                held.append(conn)
+        finally:
+            for conn in held:
+                conn.close()
+        return len(held)
+
+    def release(self, raw_conn):
+        """Returns a connection to the pool, discarding it if it cannot be reset."""
+        try:
+            # End any open transaction (including the read view of a plain SELECT)
+            # so the next borrower neither inherits locks nor sees stale data.
+            if raw_conn.in_transaction:
+                raw_conn.rollback()
+        except Exception as e:
+            print(f"Discarding pooled MySQL connection that failed to reset: {e}")
+            self._close_quietly(raw_conn)
+            self._forget_slot()
+            return
+        with self._condition:
+            self._in_use -= 1
+            self._idle.append((raw_conn, time.monotonic()))
+            self._condition.notify()
+
+    def discard(self, raw_conn):
+        """Closes a checked-out connection and frees its slot."""
+        self._close_quietly(raw_conn)
+        self._forget_slot()
+
+    def stats(self) -> dict:
+        with self._condition:
+            return {
+                "size": self.size,
+                "open": self._open_count,
+                "in_use": self._in_use,
+                "idle": len(self._idle),
+                "checkouts": self._checkouts,
+                "waits": self._waits,
+                "wait_seconds_total": round(self._wait_seconds_total, 6),
+                "wait_seconds_max": round(self._wait_seconds_max, 6),
+                "timeouts": self._timeouts,
+                "connections_opened": self._connections_opened,
+                "health_check_failures": self._health_check_failures,
+            }
+
+    def close_all(self):
+        """Closes idle connections (e.g. at shutdown). Checked-out ones close on release."""
+        with self._condition:
+            idle, self._idle = self._idle, []
+            self._open_count -= len(idle)
+        for raw_conn, _ in idle:
+            self._close_quietly(raw_conn)
+
+    def _forget_slot(self):
+        with self._condition:
+            self._open_count -= 1
+            self._in_use -= 1
+            self._condition.notify()
+
+    @staticmethod
+    def _is_healthy(raw_conn) -> bool:
+        try:
+            raw_conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(raw_conn):
+        try:
+            raw_conn.close()
+        except Exception:
+            pass
+
+
+connection_pool = BoundedConnectionPool(
+    size=MYSQL_POOL_SIZE,
+    timeout=MYSQL_POOL_TIMEOUT,
+    ping_after_idle=MYSQL_POOL_PING_AFTER_IDLE
+)
+
+register_callback(
+    "db_pool_connections", "MySQL pool connections by state.", ("state",),
+    lambda: {(state,): value for state, value in connection_pool.stats().items()
+             if state in ("size", "open", "in_use", "idle")})
+register_callback(
+    "db_pool_events_total", "MySQL pool checkouts, waits, timeouts, new connections and failed health checks.",
+    ("event",),
+    lambda: {(event,): value for event, value in connection_pool.stats().items()
+             if event in ("checkouts", "waits", "timeouts", "connections_opened", "health_check_failures")},
+    metric_type="counter")
+
+
+def get_mysql_connection():
+    """
+    Checks out a connection to the MySQL database from the shared pool.
+    Calling close() on it returns it to the pool. Returns None if no
+    connection could be obtained.
+    """
+    return connection_pool.acquire()
+
+
+@contextmanager
+def mysql_connection():
+    """
+    Context manager around get_mysql_connection():
+
+        with mysql_connection() as conn:
+            ...
+
+    The connection is returned to the pool on exit.
+    Raises DatabaseUnavailableError if no connection could be obtained.
+    """
+    conn = get_mysql_connection()
+    if conn is None:
+        raise DatabaseUnavailableError("Could not obtain a MySQL connection.")
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+TEXT_DATA_TYPES = {"tinytext", "text", "mediumtext", "longtext",
+                   "tinyblob", "blob", "mediumblob", "longblob"}
+
+
+def ensure_index(conn, table_name: str, index_name: str, columns: list, text_prefix_length: int = 191) -> bool:
+    """
+    Creates `index_name` on `table_name` over `columns` unless it already exists.
+    TEXT/BLOB columns can only be indexed by prefix, so they get `text_prefix_length`.
+    For tables that persist across runs; returns True if the index exists afterwards.
+    """
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            "SELECT 1 FROM information_schema.statistics WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1",
+            (table_name, index_name)
+        )
+        if cursor.fetchone():
+            return True
+
+        cursor.execute(
+            "SELECT column_name, data_type FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = %s",
+            (table_name,)
+        )
+        data_types = {row[0]: row[1].lower() for row in cursor.fetchall()}
+        column_specs = []
+        for col in columns:
+            if data_types.get(col) in TEXT_DATA_TYPES:
+                column_specs.append(f"`{col}`({text_prefix_length})")
+            else:
+                column_specs.append(f"`{col}`")
+
+        query = f"CREATE INDEX `{index_name}` ON {table_name} ({', '.join(column_specs)})"
+        print(f"Creating index: {query}")
+        cursor.execute(query)
+        conn.commit()
+        return True
+    except mysql.connector.Error as err:
+        print(f"Error ensuring index {index_name} on {table_name}: {err}")
+        return False
+    finally:
+        cursor.close()
+
+
+# Columns per table, read from information_schema once. The ETL derives table
+# layouts from the source data, so queries check which columns actually exist.
+_table_columns_cache = {}
+_table_columns_lock = threading.Lock()
+
+# The ETL appends a row here whenever it has recreated its tables, so every API
+# worker (not only the one that ran the job) notices that cached layouts are stale.
+ETL_VERSIONS_TABLE_NAME = "etl_load_versions"
+_table_columns_version = None
+
+
+def get_table_columns(cursor, table_name: str) -> frozenset:
+    """
+    Returns the column names of `table_name` (empty if the table does not exist).
+    Cached per process; call reset_table_columns_cache() after a table is rebuilt.
+    """
+    columns = _table_columns_cache.get(table_name)
+    if columns is None:
+        cursor.execute(
+            "SELECT column_name AS column_name FROM information_schema.columns WHERE table_schema = DATABASE() AND table_name = %s",
+            (table_name,)
+        )
+        # Works with both tuple and dictionary cursors
+        columns = frozenset(row["column_name"] if isinstance(row, dict) else row[0]
+                            for row in cursor.fetchall())
+        with _table_columns_lock:
+            _table_columns_cache[table_name] = columns
+    return columns
+
+
+def reset_table_columns_cache() -> None:
+    """Forgets cached table layouts (e.g. after the ETL recreated its tables)."""
+    with _table_columns_lock:
+        _table_columns_cache.clear()
+
+
+def refresh_table_columns_if_stale() -> bool:
+    """
+    Clears the layout cache if the ETL published a load version since the last
+    check. Returns True if it was cleared. Polled by every API worker.
+    """
+    global _table_columns_version
+    conn = get_mysql_connection()
+    if not conn:
+        return False
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT MAX(id) FROM {ETL_VERSIONS_TABLE_NAME}")
+        row = cursor.fetchone()
+        version = row[0] if row else None
+    except mysql.connector.Error:
+        # The table only exists once an ETL has run
+        version = None
+    finally:
+        cursor.close()
+        conn.close()
+
+    with _table_columns_lock:
+        if version == _table_columns_version:
+            return False
+        _table_columns_version = version
+        _table_columns_cache.clear()
+    return True
+
+
+def get_pool_stats() -> dict:
+    """Returns connection pool statistics (in-use, waits, wait time, ...)."""
+    return connection_pool.stats()
 
 # Example of how to use:
 # if __name__ == "__main__":
-#     connection = get_mysql_connection()
-#     if connection:
+#     with mysql_connection() as connection:
 #         print("Test connection successful.")
-#         connection.close()
-#         print("Test connection closed.")
-#     else:
-#         print("Test connection failed.")
+#     print(get_pool_stats())
@@ -0,0 +1,30 @@
+"""
+Runs one ETL or folder generation job recorded in pipeline_jobs, outside
+the API workers. Started by job_service.submit_job:
+
+    python -m api.job_runner <job id>
+"""
+import argparse
+import logging
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from .services import job_service
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs one queued pipeline job.")
+    parser.add_argument("job_id")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(
+        level=os.getenv("LOG_LEVEL", "INFO").upper(),
+        format="%(asctime)s %(levelname)s %(name)s [job %(process)d]: %(message)s")
+    sys.exit(job_service.run_job(args.job_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,71 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
+from fastapi.encoders import jsonable_encoder
 from fastapi.middleware.cors import CORSMiddleware  # Import CORS Middleware
 from dotenv import load_dotenv
 # Import routers
 from .routers import etl_ml_router, po_router, classification_router, auth_router, dashboard_router
-import uvicorn
+from .services import folder_tree_service, warmup_service
+from .db.database import connection_pool, get_pool_stats, refresh_table_columns_if_stale
+from .core.concurrency import run_db
+from .core.security import shutdown_password_hash_executor
+from .core.metrics import MetricsMiddleware, PROMETHEUS_CONTENT_TYPE, render_metrics
+from .core.tracing import TracingMiddleware, TRACE_ID_HEADER
+import asyncio
+import logging
 import os
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Service modules log through `logging`; LOG_LEVEL=DEBUG also logs their SQL
+logging.basicConfig(
+    level=os.getenv("LOG_LEVEL", "INFO").upper(),
+    format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+# How often each worker checks whether folder generation published a new
+# hierarchy, or the ETL rebuilt purchase_orders (possibly with other columns)
+FOLDER_TREE_POLL_SECONDS = float(os.getenv("FOLDER_TREE_POLL_SECONDS", "30"))
+
+
+async def poll_published_versions():
+    while True:
+        await asyncio.sleep(FOLDER_TREE_POLL_SECONDS)
+        try:
+            await run_db(folder_tree_service.refresh_if_stale)
+        except Exception as e:
+            print(f"Error refreshing folder tree snapshot: {e}")
+        try:
+            await run_db(refresh_table_columns_if_stale)
+        except Exception as e:
+            print(f"Error checking the ETL load version: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm up in the background: the worker starts answering (/ready says 503)
+    # while it opens connections, loads the folder hierarchy, so layer browsing
+    # never waits on MySQL, and runs the landing-page queries once.
+    app.state.warmup = warmup_service.WarmupState()
+    warmup_task = asyncio.create_task(warmup_service.warm_up(app.state.warmup))
+    poll_task = asyncio.create_task(poll_published_versions())
+    yield
+    for task in (warmup_task, poll_task):
+        task.cancel()
+        with suppress(asyncio.CancelledError):
+            await task
+    # ETL / folder generation jobs run in job runner processes of their own
+    # (see job_service) and are left running
+    connection_pool.close_all()
+    shutdown_password_hash_executor()
+
+
 app = FastAPI(
     title="Purchase Order Classification API",
     description="API for managing and classifying purchase order data.",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -30,13 +83,42 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],  # Allows all headers
+    # Readable by the browser
+    expose_headers=[po_router.NEXT_CURSOR_HEADER, TRACE_ID_HEADER],
 )
 
+# Request timings by route template, served on /metrics
+app.add_middleware(MetricsMiddleware)
+# Sampled request traces (TRACE_SAMPLE_RATE), written to TRACE_FILE or stdout
+app.add_middleware(TracingMiddleware)
+
 
 @app.get("/", tags=["Root"])
 async def read_root():
     return {"message": "Welcome to the Purchase Order Classification API!"}
 
+
+@app.get("/ready", tags=["Root"])
+async def read_readiness():
+    """
+    Readiness probe for the load balancer: 503 until this worker finished its
+    warm-up, 200 afterwards. Liveness needs no probe of its own; use "/".
+    """
+    state = app.state.warmup.as_dict()
+    return JSONResponse(jsonable_encoder(state), status_code=200 if state["ready"] else 503)
+
+
+@app.get("/stats/db-pool", tags=["Root"])
+async def read_db_pool_stats():
+    """MySQL connection pool statistics for this worker, for sizing MYSQL_POOL_SIZE."""
+    return get_pool_stats()
+
+
+@app.get("/metrics", tags=["Root"], include_in_schema=False)
+async def read_metrics():
+    """Request, query, pool and pipeline metrics for this worker, in the Prometheus text format."""
+    return Response(render_metrics(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # Import routers
 app.include_router(etl_ml_router.router)
 app.include_router(po_router.router)
@@ -45,6 +127,8 @@ app.include_router(auth_router.router)
 app.include_router(dashboard_router.router)  # Include the dashboard router
 
 if __name__ == "__main__":
+    import uvicorn  # Workers started by the uvicorn CLI have it loaded already
+
     api_host = os.getenv("API_HOST", "0.0.0.0")
     api_port = int(os.getenv("API_PORT", "8000"))
 
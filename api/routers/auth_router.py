@@ -1,25 +1,37 @@
 from ..core.dependencies import get_current_active_user  # Import the dependency
-from fastapi import APIRouter, Depends, HTTPException, status
+from ..core.dependencies import get_current_active_spv_user
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, status
 from fastapi.security import OAuth2PasswordRequestForm
 from datetime import timedelta
 
 from ..schemas import user_schemas  # Token and TokenData are in user_schemas
 from ..services import auth_service
 from ..core import security
+from ..core.concurrency import run_db
+from ..core.tracing import TracedRoute
 
 router = APIRouter(
     prefix="/auth",
-    tags=["Authentication"]
+    tags=["Authentication"],
+    route_class=TracedRoute
 )
 
 
+def _hashing_busy_exception() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many logins in progress, please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=user_schemas.User)
 async def register_user(user_in: user_schemas.UserCreate):
     """
     Register a new user.
     Default role will be 'user'.
     """
-    db_user = auth_service.get_user_by_username(username=user_in.username)
+    db_user = await run_db(auth_service.get_user_by_username, username=user_in.username)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -31,7 +43,13 @@ async def register_user(user_in: user_schemas.UserCreate):
     # if existing_email_user:
     #     raise HTTPException(status_code=400, detail="Email already registered")
 
-    created_user = auth_service.create_user(user_in=user_in)
+    try:
+        hashed_password = await security.get_password_hash_async(user_in.password)
+    except security.PasswordHashingBusyError:
+        raise _hashing_busy_exception()
+
+    created_user = await run_db(
+        auth_service.create_user, user_in=user_in, hashed_password=hashed_password)
     if not created_user:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -44,9 +62,12 @@ async def register_user(user_in: user_schemas.UserCreate):
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends()):
     """
     OAuth2 compatible token login, get an access token for future requests.
+    Answers 503 when too many logins are already being verified.
     """
-    user = auth_service.authenticate_user(
-        username=form_data.username, password=form_data.password)
+    try:
+        user = await auth_service.authenticate_user(form_data.username, form_data.password)
+    except security.PasswordHashingBusyError:
+        raise _hashing_busy_exception()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -79,3 +100,25 @@ async def read_users_me(current_user: user_schemas.UserInDB = Depends(get_curren
     # Pydantic will automatically convert it to User schema for the response,
     # which excludes hashed_password.
     return current_user
+
+
+@router.put("/users/{username}/access", response_model=user_schemas.User)
+async def update_user_access(
+    username: str = Path(..., description="User whose access to change"),
+    access_update: user_schemas.UserAccessUpdate = Body(...),
+    current_user: user_schemas.UserInDB = Depends(get_current_active_spv_user)
+):
+    """
+    Change a user's role and/or disable or re-enable their account.
+    Takes effect on the user's next request.
+    Only accessible by users with 'spv' role.
+    """
+    updated_user = await run_db(
+        auth_service.update_user_access,
+        username=username, access_update=access_update)
+    if updated_user is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"User '{username}' not found or update failed."
+        )
+    return updated_user
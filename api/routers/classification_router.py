@@ -1,33 +1,32 @@
 from fastapi import APIRouter, HTTPException, Query, Path
-from typing import List, Optional, Any
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Any, Tuple
 # Import LayerNode, LayerItemsResponse, and the new LayerHierarchyResponse schemas
 from ..schemas.classification_schemas import LayerNode as LayerNodeSchema, LayerItemsResponse, LayerHierarchyResponse
 # Import the base PO schema used within LayerItemsResponse
 # Alias for PurchaseOrderBase
 from ..schemas.po_schemas import PurchaseOrderBase as ItemDetailSchema
-from ..services import classification_service
+from ..services import classification_service, folder_tree_service, export_service
+from ..core.concurrency import run_db
+from ..core import tracing
+from ..core import fast_json
+from ..db.database import DatabaseUnavailableError
 
 router = APIRouter(
     prefix="/classification",
-    tags=["Classification Layers"]
+    tags=["Classification Layers"],
+    route_class=tracing.TracedRoute
 )
 
 # Mock data and temporary LayerSchema removed.
 
 
-@router.get("/layers/{slug:path}", response_model=LayerHierarchyResponse)
-async def get_layers_by_slug(
-    slug: str = Path(..., description="Path representing the layer hierarchy, e.g., 'L1' or 'L1/123/L2'. '123' is a parent layer_definition primary key.")
-):
+def _parse_layer_slug(slug: str) -> Tuple[int, Optional[int]]:
     """
-    Retrieve classification categories based on a hierarchical slug.
-    Returns the sub-layers and the name of the direct parent layer if applicable.
-    - For L1: slug = "L1" (parent_name will be null)
-    - For L2 under L1 node with PK 123: slug = "L1/123/L2" (parent_name will be name of L1 node 123)
-
-    The numeric parts of the slug are the primary keys from the 'layer_definitions' table.
+    Parses a layer slug ("L1", "L1/123/L2", ...) into
+    (layer_level_to_fetch, parent_layer_definition_pk).
+    Raises HTTPException(400) for malformed slugs.
     """
-    print(f"GET /classification/layers/{slug}")
     parts = slug.strip("/").split("/")
 
     layer_level_to_fetch = 0
@@ -90,9 +89,38 @@ async def get_layers_by_slug(
         raise HTTPException(
             status_code=400, detail="Could not determine target layer level from slug.")
 
+    return layer_level_to_fetch, parent_layer_definition_pk
+
+
+@router.get("/layers/{slug:path}", response_model=LayerHierarchyResponse)
+async def get_layers_by_slug(
+    slug: str = Path(..., description="Path representing the layer hierarchy, e.g., 'L1' or 'L1/123/L2'. '123' is a parent layer_definition primary key.")
+):
+    """
+    Retrieve classification categories based on a hierarchical slug.
+    Returns the sub-layers and the name of the direct parent layer if applicable.
+    - For L1: slug = "L1" (parent_name will be null)
+    - For L2 under L1 node with PK 123: slug = "L1/123/L2" (parent_name will be name of L1 node 123)
+
+    The numeric parts of the slug are the primary keys from the 'layer_definitions' table.
+    """
+    print(f"GET /classification/layers/{slug}")
+    with tracing.span("classification.parse_slug", slug=slug):
+        layer_level_to_fetch, parent_layer_definition_pk = _parse_layer_slug(slug)
+
+    # Serve from the in-memory folder tree; only hit MySQL if no snapshot is loaded yet.
+    snapshot = folder_tree_service.get_snapshot()
+    if snapshot is not None:
+        with tracing.span("folder_tree.get_layers", version=snapshot.version):
+            return snapshot.get_layers(
+                layer_level_to_fetch=layer_level_to_fetch,
+                parent_layer_definition_pk=parent_layer_definition_pk
+            )
+
     print(
         f"Service call: fetch_distinct_layers_from_db(layer_level_to_fetch={layer_level_to_fetch}, parent_layer_definition_pk={parent_layer_definition_pk})")
-    layer_data = classification_service.fetch_distinct_layers_from_db(
+    layer_data = await run_db(
+        classification_service.fetch_distinct_layers_from_db,
         layer_level_to_fetch=layer_level_to_fetch,
         parent_layer_definition_pk=parent_layer_definition_pk
     )
@@ -102,11 +130,16 @@ async def get_layers_by_slug(
 @router.get("/item-details-by-layer-definition-pk/{layer_definition_pk}", response_model=LayerItemsResponse)
 async def get_item_details_by_layer_definition_pk(
     layer_definition_pk: int = Path(
-        ..., description="The primary key (id) of the layer_definition record.")
+        ..., description="The primary key (id) of the layer_definition record."),
+    limit: int = Query(
+        100, ge=1, le=500, description="Maximum number of items to return"),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from a previous response's next_cursor")
 ):
     """
     Retrieve item details (e.g., list of POs) associated with a specific 
     layer_definition primary key, along with the layer's name.
+    Items are ordered newest first; follow next_cursor to page further.
     """
     print(
         f"GET /classification/item-details-by-layer-definition-pk/{layer_definition_pk}")
@@ -115,9 +148,61 @@ async def get_item_details_by_layer_definition_pk(
         raise HTTPException(
             status_code=400, detail="Invalid layer_definition_pk. Must be a positive integer.")
 
-    # The service function now returns a dict {"layer_name": str, "items": List[Dict]}
-    layer_data_with_items = classification_service.fetch_items_for_layer_from_db(
-        layer_definition_pk=layer_definition_pk
-    )
+    # The service function returns a dict {"layer_name": str, "items": List[Dict], "next_cursor": Optional[str]}
+    try:
+        layer_data_with_items = await run_db(
+            classification_service.fetch_items_for_layer_from_db,
+            layer_definition_pk=layer_definition_pk,
+            limit=limit,
+            page_cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if fast_json.fast_json_enabled():
+        shaper = fast_json.get_row_shaper(ItemDetailSchema)
+        return fast_json.json_response({
+            "layer_name": layer_data_with_items["layer_name"],
+            "items": shaper.shape_many(layer_data_with_items["items"]),
+            "next_cursor": layer_data_with_items["next_cursor"],
+        })
     # FastAPI will validate the returned dict against the LayerItemsResponse model
     return layer_data_with_items
+
+
+@router.get("/item-details-by-layer-definition-pk/{layer_definition_pk}/export", response_class=StreamingResponse)
+async def export_item_details_by_layer_definition_pk(
+    layer_definition_pk: int = Path(..., ge=1,
+                                    description="The primary key (id) of the layer_definition record."),
+    format: str = Query("csv", pattern="^(csv|xlsx)$",
+                        description="File format: csv or xlsx")
+):
+    """
+    Download all items of a folder (same columns as item-details, newest first)
+    as CSV or XLSX. Rows are streamed as they are read. Answers 503 when too
+    many exports are already running.
+    """
+    print(
+        f"GET /classification/item-details-by-layer-definition-pk/{layer_definition_pk}/export: format={format}")
+    try:
+        opened = await export_service.open_export(
+            classification_service.open_layer_items_export_cursor,
+            layer_definition_pk=layer_definition_pk
+        )
+    except export_service.ExportsBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except DatabaseUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        print(f"Error starting folder export: {e}")
+        raise HTTPException(status_code=500, detail="Could not start the export.")
+    if opened is None:
+        raise HTTPException(status_code=404, detail="Layer definition not found")
+
+    layer_name, conn, cursor, column_names = opened
+    filename = export_service.export_filename(layer_name, format)
+    return StreamingResponse(
+        export_service.stream_export(
+            conn, cursor, column_names, format, title=layer_name),
+        media_type=export_service.media_type_for(format),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
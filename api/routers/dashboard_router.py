@@ -1,28 +1,114 @@
-from fastapi import APIRouter, Depends, HTTPException
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
 from ..schemas.dashboard_schemas import MiniDashboardData
+from ..schemas.dashboard_schemas import SpendTrendPoint, SupplierSpend, CategorySpend, CurrencySpend
 from ..services import dashboard_service
 # Assuming dashboard is a protected resource
 from ..core.dependencies import get_current_active_user
+from ..core.concurrency import run_db
+from ..core.tracing import TracedRoute
 from ..schemas import user_schemas  # For type hinting current_user
 
 router = APIRouter(
     prefix="/dashboard",
     tags=["Dashboard"],
     # Secure all dashboard routes
-    dependencies=[Depends(get_current_active_user)]
+    dependencies=[Depends(get_current_active_user)],
+    route_class=TracedRoute
 )
 
 
 @router.get("/mini-summary", response_model=MiniDashboardData)
-async def get_mini_dashboard_summary(current_user: user_schemas.UserInDB = Depends(get_current_active_user)):
+async def get_mini_dashboard_summary(
+    company_id: Optional[str] = Query(
+        None, description="Company to summarize; all companies when omitted"),
+    current_user: user_schemas.UserInDB = Depends(get_current_active_user)
+):
     """
     Retrieve aggregated data for the mini dashboard.
+    The numbers are precomputed after each ETL load and folder generation;
+    last_refreshed_at tells when.
     Requires authentication.
     """
     try:
-        data = dashboard_service.get_mini_dashboard_data()
+        data = await run_db(dashboard_service.get_mini_dashboard_data,
+                            company_id=company_id)
         return data
     except Exception as e:
         # Log the exception e
         raise HTTPException(
             status_code=500, detail=f"Failed to retrieve dashboard summary: {str(e)}")
+
+
+# --- Spend analytics ---
+# Each chart reads a small pre-aggregated rollup (rebuilt by the ETL and folder
+# generation), so response time does not grow with the PO history.
+
+MONTH_PATTERN = r"^\d{4}-(0[1-9]|1[0-2])$"
+
+
+def _parse_month(value: Optional[str]) -> Optional[date]:
+    if value is None:
+        return None
+    year, month = value.split("-")
+    return date(int(year), int(month), 1)
+
+
+async def _spend_query(func, **kwargs):
+    try:
+        return await run_db(func, **kwargs)
+    except Exception as e:
+        raise HTTPException(
+            status_code=500, detail=f"Failed to retrieve dashboard analytics: {str(e)}")
+
+
+@router.get("/spend-trend", response_model=List[SpendTrendPoint])
+async def get_spend_trend(
+    company_id: Optional[str] = Query(None, description="Company; all companies when omitted"),
+    from_month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="First month, YYYY-MM"),
+    to_month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last month, YYYY-MM")
+):
+    """Monthly spend (IDR) and PO line count, oldest month first."""
+    return await _spend_query(
+        dashboard_service.get_spend_trend, company_id=company_id,
+        from_month=_parse_month(from_month), to_month=_parse_month(to_month))
+
+
+@router.get("/top-suppliers", response_model=List[SupplierSpend])
+async def get_top_suppliers(
+    company_id: Optional[str] = Query(None, description="Company; all companies when omitted"),
+    from_month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="First month, YYYY-MM"),
+    to_month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last month, YYYY-MM"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Suppliers ranked by spend (IDR) in the period."""
+    return await _spend_query(
+        dashboard_service.get_top_suppliers, company_id=company_id,
+        from_month=_parse_month(from_month), to_month=_parse_month(to_month), limit=limit)
+
+
+@router.get("/top-categories", response_model=List[CategorySpend])
+async def get_top_categories(
+    level: int = Query(1, ge=1, le=2, description="1 for L1 folders, 2 for L2 folders"),
+    company_id: Optional[str] = Query(None, description="Company; all companies when omitted"),
+    from_month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="First month, YYYY-MM"),
+    to_month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last month, YYYY-MM"),
+    limit: int = Query(10, ge=1, le=100)
+):
+    """Folders ranked by spend (IDR) in the period."""
+    return await _spend_query(
+        dashboard_service.get_top_categories, level=level, company_id=company_id,
+        from_month=_parse_month(from_month), to_month=_parse_month(to_month), limit=limit)
+
+
+@router.get("/currency-mix", response_model=List[CurrencySpend])
+async def get_currency_mix(
+    company_id: Optional[str] = Query(None, description="Company; all companies when omitted"),
+    from_month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="First month, YYYY-MM"),
+    to_month: Optional[str] = Query(None, pattern=MONTH_PATTERN, description="Last month, YYYY-MM")
+):
+    """Spend per purchase currency, in IDR and in the original currency."""
+    return await _spend_query(
+        dashboard_service.get_currency_mix, company_id=company_id,
+        from_month=_parse_month(from_month), to_month=_parse_month(to_month))
@@ -1,8 +1,13 @@
-from etl.etl_script import main_etl_process
-from ml.training_pipeline import run_folder_generation_pipeline  # Changed function name
 from ml.inference import classify_item_by_parsing  # Changed function name
-from fastapi import APIRouter, HTTPException, BackgroundTasks, Query
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
+from typing import List
+from ..services import job_service
+from ..schemas.job_schemas import Job, JobSubmitted
+from ..core.concurrency import run_db
+from ..core.tracing import TracedRoute
+from ..db.database import DatabaseUnavailableError
 # Assuming NewItemClassificationResponse is defined in classification_schemas
 # from ..schemas.classification_schemas import NewItemClassificationResponse # Commenting out for now
 import sys
@@ -19,7 +24,8 @@ sys.path.append(project_root)
 
 router = APIRouter(
     prefix="/process",
-    tags=["ETL & ML Processing"]
+    tags=["ETL & ML Processing"],
+    route_class=TracedRoute
 )
 
 
@@ -33,50 +39,100 @@ class ETLParams(BaseModel):
     to_item_code: str = Field(..., example="ITEM999")
 
 
-@router.post("/trigger-etl", status_code=202)
-async def trigger_etl(params: ETLParams, background_tasks: BackgroundTasks):
+def _submitted(job: dict, message: str) -> dict:
+    return {"message": message, "job_id": job["id"], "status_url": f"{router.prefix}/jobs/{job['id']}"}
+
+
+@router.post("/trigger-etl", status_code=202, response_model=JobSubmitted)
+async def trigger_etl(params: ETLParams):
     """
-    Triggers the ETL process to fetch data from SQL Server, transform it,
-    and load it into MySQL. This is an asynchronous operation.
+    Queues the ETL process to fetch data from SQL Server, transform it,
+    and load it into MySQL. It runs in a job runner process of its own,
+    which API restarts do not stop; follow it on the returned status_url.
     """
     try:
-        print(f"Received request to trigger ETL with params: {params.dict()}")
-        # Run the ETL process in the background
-        background_tasks.add_task(
-            main_etl_process,
-            params.company_id,
-            str(params.from_month),  # etl_script expects string for month/year
-            str(params.from_year),
-            str(params.to_month),
-            str(params.to_year),
-            params.from_item_code,
-            params.to_item_code
-        )
-        return {"message": "ETL process started in the background. Check server logs for progress."}
+        print(f"Received request to trigger ETL with params: {params.model_dump()}")
+        job = await run_db(job_service.submit_job, job_service.JOB_KIND_ETL, params.model_dump())
+        return _submitted(job, "ETL process queued.")
+    except DatabaseUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Error triggering ETL process: {e}")
         raise HTTPException(
             status_code=500, detail=f"Failed to trigger ETL process: {str(e)}")
 
 
-@router.post("/train-ml-model", status_code=202)
-async def train_ml_model(background_tasks: BackgroundTasks):
+@router.post("/train-ml-model", status_code=202, response_model=JobSubmitted)
+async def train_ml_model():
     """
-    Triggers the ML model training pipeline.
-    This is an asynchronous operation.
+    Queues folder generation (formerly ML model training). It runs in a
+    job runner process of its own, after any ETL run still in progress.
     """
     try:
         print("Received request to train ML model (now folder generation).")
-        # The parameters for run_training_pipeline (like num_clusters_l1) might also come from request body if needed.
-        # Changed function call
-        background_tasks.add_task(run_folder_generation_pipeline)
-        return {"message": "Folder generation process started in the background. Check server logs for progress."}
+        job = await run_db(job_service.submit_job, job_service.JOB_KIND_FOLDER_GENERATION)
+        return _submitted(job, "Folder generation process queued.")
+    except DatabaseUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         print(f"Error triggering folder generation process: {e}")
         raise HTTPException(
             status_code=500, detail=f"Failed to trigger folder generation process: {str(e)}")
 
 
+async def _run_job_query(func, *args):
+    try:
+        return await run_db(func, *args)
+    except DatabaseUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+@router.get("/jobs", response_model=List[Job])
+async def list_jobs():
+    """The latest ETL and folder generation jobs, submitted to any API worker, newest first."""
+    return await _run_job_query(job_service.list_jobs)
+
+
+@router.get("/jobs/{job_id}", response_model=Job)
+async def get_job(job_id: str):
+    job = await _run_job_query(job_service.get_job, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return job
+
+
+@router.get("/jobs/{job_id}/events", response_class=StreamingResponse)
+async def stream_job_events(job_id: str):
+    """
+    Server-sent events with the job's stage, rows processed, throughput and
+    ETA as they change (EventSource-compatible). The stream ends with an
+    "end" event once the job finished.
+    """
+    if await _run_job_query(job_service.get_job, job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return StreamingResponse(
+        job_service.stream_job_events(job_id),
+        media_type="text/event-stream",
+        # Stop reverse proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/jobs/{job_id}/cancel", response_model=Job)
+async def cancel_job(job_id: str):
+    """
+    Cancels a queued job, or stops a running one (within a few seconds).
+    A stopped ETL leaves purchase_orders partially loaded until the next run.
+    """
+    try:
+        job = await _run_job_query(job_service.cancel_job, job_id)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found.")
+    return job
+
+
 # Removed response_model for now
 @router.post("/classify-new-item", status_code=200)
 async def classify_new_item(item_description: str = Query(..., description="Description of the item to classify")):
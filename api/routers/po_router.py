@@ -1,64 +1,186 @@
-from fastapi import APIRouter, HTTPException, Query, Path, Body, Depends
+from fastapi import APIRouter, HTTPException, Query, Path, Body, Depends, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 
 # Import actual schemas and service functions
 from ..schemas.po_schemas import PurchaseOrder as PurchaseOrderResponseSchema
 from ..schemas.po_schemas import PurchaseOrderCreate as PurchaseOrderCreateSchema
 from ..schemas.po_schemas import PurchaseOrderUpdate as PurchaseOrderUpdateSchema
+from ..schemas.po_schemas import PurchaseOrderBulkUpdate as PurchaseOrderBulkUpdateSchema
+from ..schemas.po_schemas import PurchaseOrderBulkUpdateResponse as PurchaseOrderBulkUpdateResponseSchema
+from ..schemas.po_schemas import PO_FIELD_PRESETS, resolve_po_fields, get_po_projection_adapter
 from ..schemas import user_schemas  # For UserInDB type hint
 # Assuming PurchaseOrderList is also defined in po_schemas for a paginated response
 # from ..schemas.po_schemas import PurchaseOrderList
-from ..services import po_service
+from ..services import po_service, export_service
 from ..core.dependencies import get_current_active_spv_user  # Import SPV dependency
+from ..core.concurrency import run_db
+from ..core.tracing import TracedRoute
+from ..core import fast_json
+from ..db.database import DatabaseUnavailableError
 
 router = APIRouter(
     prefix="/purchase-orders",
-    tags=["Purchase Orders"]
+    tags=["Purchase Orders"],
+    route_class=TracedRoute
 )
 
 # Mock database and temporary schemas are removed.
 
+# The list endpoint keeps returning a plain JSON array for compatibility,
+# so the keyset cursor for the next page travels in a response header.
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+FIELDS_DESCRIPTION = (
+    "Comma-separated PurchaseOrder fields and/or presets to return "
+    f"({', '.join(PO_FIELD_PRESETS)}); `id` is always included. Default: all fields.")
+
+
+def _parse_fields(fields: Optional[str]):
+    try:
+        return resolve_po_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
 
 # Using imported schema
 @router.get("/", response_model=List[PurchaseOrderResponseSchema])
 async def get_all_purchase_orders(
+    response: Response,
     skip: int = Query(
-        0, ge=0, description="Number of records to skip for pagination"),
+        0, ge=0, description="Number of records to skip for pagination (ignored when cursor is given)"),
     limit: int = Query(
         10, ge=1, le=100, description="Maximum number of records to return"),
     search: Optional[str] = Query(
-        None, description="Search term for item name or PO number"),
-    layer_filter: Optional[str] = Query(
-        None, description="Filter by classification layer (e.g., L1_ClusterX)"),
+        None, description="Search words over item code/description, purchase text, PO number and supplier (relevance-ranked)"),
+    layer_filter: Optional[int] = Query(
+        None, ge=1, description="Filter by folder (layer_definitions.id); an L1 folder includes all its L2 folders"),
     month_filter: Optional[int] = Query(
-        None, ge=1, le=12, description="Filter by month (1-12)")
+        None, ge=1, le=12, description="Filter by month (1-12)"),
+    year_filter: Optional[int] = Query(
+        None, ge=1900, le=2100, description="Filter by year of TGL_PO"),
+    cursor: Optional[str] = Query(
+        None, description="Opaque cursor from a previous response's X-Next-Cursor header"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
 ):
     """
     Retrieve a list of purchase orders with optional pagination, search, and filters.
+    The cursor for the next page is returned in the X-Next-Cursor response header
+    (absent on the last page); cursor paging stays fast however deep you go.
+    With `fields`, only those columns are read and returned.
     """
+    field_names = _parse_fields(fields)
     print(
-        f"GET /purchase-orders: skip={skip}, limit={limit}, search='{search}', layer='{layer_filter}', month='{month_filter}'")
+        f"GET /purchase-orders: skip={skip}, limit={limit}, search='{search}', layer='{layer_filter}', month='{month_filter}', year='{year_filter}', cursor='{cursor}'")
 
-    db_pos = po_service.fetch_all_pos_from_db(
-        skip=skip,
-        limit=limit,
-        search=search
-        # TODO: Pass layer_filter and month_filter to service layer
-    )
+    try:
+        page = await run_db(
+            po_service.fetch_all_pos_from_db,
+            skip=skip,
+            limit=limit,
+            search=search,
+            page_cursor=cursor,
+            layer_filter=layer_filter,
+            month_filter=month_filter,
+            year_filter=year_filter,
+            columns=field_names
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if fast_json.fast_json_enabled():
+        # Rows come straight from our own table: shape them to the schema and
+        # encode with orjson instead of validating ~40 fields per row.
+        shaper = fast_json.get_row_shaper(
+            PurchaseOrderResponseSchema, field_names)
+        headers = {NEXT_CURSOR_HEADER: page["next_cursor"]} if page["next_cursor"] else None
+        return fast_json.json_response(shaper.shape_many(page["items"]), headers=headers)
+
+    if field_names is not None:
+        # Validate and serialize against the projected model only; returning a
+        # Response directly skips the full response_model pass.
+        adapter = get_po_projection_adapter(field_names)
+        response = Response(
+            content=adapter.dump_json(adapter.validate_python(page["items"])),
+            media_type="application/json")
+    if page["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    if field_names is not None:
+        return response
     # The service returns list of dicts, Pydantic will validate them against PurchaseOrderResponseSchema
-    return db_pos
+    return page["items"]
+
+
+# Declared before /{po_id} so "export" is not parsed as an id
+@router.get("/export", response_class=StreamingResponse)
+async def export_purchase_orders(
+    format: str = Query("csv", pattern="^(csv|xlsx)$",
+                        description="File format: csv or xlsx"),
+    search: Optional[str] = Query(
+        None, description="Search words, as for the listing"),
+    layer_filter: Optional[int] = Query(
+        None, ge=1, description="Filter by folder (layer_definitions.id); an L1 folder includes all its L2 folders"),
+    month_filter: Optional[int] = Query(
+        None, ge=1, le=12, description="Filter by month (1-12)"),
+    year_filter: Optional[int] = Query(
+        None, ge=1900, le=2100, description="Filter by year of TGL_PO"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
+    """
+    Download every purchase order matching the listing filters as CSV or XLSX,
+    in listing order. Rows are streamed as they are read, so exports of any
+    size start immediately and use constant memory. Answers 503 when too many
+    exports are already running.
+    """
+    field_names = _parse_fields(fields)
+    print(
+        f"GET /purchase-orders/export: format={format}, search='{search}', layer='{layer_filter}', month='{month_filter}', year='{year_filter}'")
+    try:
+        conn, cursor, column_names = await export_service.open_export(
+            po_service.open_po_export_cursor,
+            search=search,
+            layer_filter=layer_filter,
+            month_filter=month_filter,
+            year_filter=year_filter,
+            columns=field_names
+        )
+    except export_service.ExportsBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except DatabaseUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    except Exception as e:
+        print(f"Error starting purchase order export: {e}")
+        raise HTTPException(status_code=500, detail="Could not start the export.")
+
+    filename = export_service.export_filename("purchase_orders", format)
+    return StreamingResponse(
+        export_service.stream_export(
+            conn, cursor, column_names, format, title="Purchase Orders"),
+        media_type=export_service.media_type_for(format),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 # Using imported schema
 @router.get("/{po_id}", response_model=PurchaseOrderResponseSchema)
-async def get_purchase_order_by_id(po_id: int = Path(..., description="The ID of the purchase order to retrieve")):
+async def get_purchase_order_by_id(
+    po_id: int = Path(..., description="The ID of the purchase order to retrieve"),
+    fields: Optional[str] = Query(None, description=FIELDS_DESCRIPTION)
+):
     """
     Retrieve a specific purchase order by its ID.
     """
     print(f"GET /purchase-orders/{po_id}")
-    db_po = po_service.fetch_po_by_id_from_db(po_id=po_id)
+    field_names = _parse_fields(fields)
+    db_po = await run_db(po_service.fetch_po_by_id_from_db,
+                         po_id=po_id, columns=field_names)
     if db_po is None:
         raise HTTPException(status_code=404, detail="Purchase Order not found")
+    if field_names is not None:
+        adapter = get_po_projection_adapter(field_names, many=False)
+        return Response(content=adapter.dump_json(adapter.validate_python(db_po)),
+                        media_type="application/json")
     return db_po
 
 
@@ -71,7 +193,7 @@ async def create_purchase_order(po_data: PurchaseOrderCreateSchema = Body(...)):
     (Service layer for creation not yet implemented)
     """
     print(f"POST /purchase-orders with data: {po_data.dict()}")
-    new_po_db = po_service.create_po_in_db(po_data=po_data)
+    new_po_db = await run_db(po_service.create_po_in_db, po_data=po_data)
     if not new_po_db:
         # Consider more specific error codes based on service layer feedback if available
         raise HTTPException(
@@ -79,6 +201,27 @@ async def create_purchase_order(po_data: PurchaseOrderCreateSchema = Body(...)):
     return new_po_db
 
 
+# Declared before PUT /{po_id} so "bulk" is not parsed as an id
+@router.put("/bulk", response_model=PurchaseOrderBulkUpdateResponseSchema)
+async def bulk_update_purchase_order_fields(
+    bulk_data: PurchaseOrderBulkUpdateSchema = Body(...),
+    current_user: user_schemas.UserInDB = Depends(
+        get_current_active_spv_user)  # Secure endpoint
+):
+    """
+    Update Checklist/Keterangan of many purchase orders at once, in one transaction.
+    Returns the updated rows and the ids that do not exist.
+    Only accessible by users with 'spv' role.
+    """
+    print(f"PUT /purchase-orders/bulk with {len(bulk_data.updates)} updates")
+    result = await run_db(po_service.bulk_update_po_fields_in_db,
+                          updates=bulk_data.updates)
+    if result is None:
+        raise HTTPException(
+            status_code=500, detail="Failed to update Purchase Orders in database.")
+    return result
+
+
 # Using imported schema
 @router.put("/{po_id}", response_model=PurchaseOrderResponseSchema)
 async def update_purchase_order_fields(
@@ -96,7 +239,8 @@ async def update_purchase_order_fields(
     """
     print(
         f"PUT /purchase-orders/{po_id} with data: {update_data.dict(exclude_unset=True)}")
-    updated_po_db = po_service.update_po_fields_in_db(
+    updated_po_db = await run_db(
+        po_service.update_po_fields_in_db,
         po_id=po_id, update_data=update_data)
     if not updated_po_db:
         # update_po_fields_in_db returns None if PO not found after attempt,
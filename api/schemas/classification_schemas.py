@@ -32,6 +32,8 @@ class LayerHierarchyResponse(BaseModel):
 class LayerItemsResponse(BaseModel):
     layer_name: str = Field(..., example="DUPLEX 450GSM/58.5X92CM")
     items: List[PurchaseOrderBase]
+    # Opaque keyset cursor for the next page; None on the last page
+    next_cursor: Optional[str] = None
 
     class Config:
         from_attributes = True
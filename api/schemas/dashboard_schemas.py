@@ -1,3 +1,5 @@
+from datetime import date, datetime
+from typing import Optional
 from pydantic import BaseModel
 
 
@@ -6,6 +8,39 @@ class MiniDashboardData(BaseModel):
     total_order_amount_idr: float
     total_l1_categories: int
     total_l2_categories: int
+    # None means all companies
+    company_id: Optional[str] = None
+    # When dashboard_summary was last rebuilt; None if it never was
+    last_refreshed_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
+
+
+# --- Spend analytics (served from the spend rollup tables) ---
+
+class SpendTrendPoint(BaseModel):
+    month: date  # First day of the month
+    po_lines: int
+    total_amount_idr: float
+
+
+class SupplierSpend(BaseModel):
+    supplier_code: str  # SUPPLIER_CODE, or the supplier name when the code is missing
+    supplier_name: Optional[str] = None
+    po_lines: int
+    total_amount_idr: float
+
+
+class CategorySpend(BaseModel):
+    l1_folder: str
+    l2_folder: Optional[str] = None  # Only for level 2
+    po_lines: int
+    total_amount_idr: float
+
+
+class CurrencySpend(BaseModel):
+    currency: str
+    po_lines: int
+    total_amount_idr: float
+    total_original_amount: float
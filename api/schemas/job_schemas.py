@@ -0,0 +1,41 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+
+
+class JobStage(BaseModel):
+    stage: str = Field(..., example="transform")
+    seconds: float = Field(..., example=12.4)
+    failed: bool = False
+
+
+class Job(BaseModel):
+    id: str = Field(..., example="9f2c4a1b3e5d7a60")
+    kind: str = Field(..., example="etl")  # "etl" or "folder_generation"
+    params: Dict[str, Any] = Field(default_factory=dict)
+    # queued, running, succeeded, failed or cancelled
+    status: str = Field(..., example="running")
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    # Current or last stage, or "waiting_for_lock" while another pipeline runs
+    stage: Optional[str] = Field(None, example="transform")
+    stages: List[JobStage] = Field(default_factory=list)
+    # Progress of the current stage; rows_total and eta_seconds only when the
+    # stage knows its row count up front
+    rows_done: Optional[int] = Field(None, example=45000)
+    rows_total: Optional[int] = Field(None, example=120000)
+    rows_per_second: Optional[float] = Field(None, example=15000.0)
+    eta_seconds: Optional[float] = Field(None, example=5.0)
+    error: Optional[str] = None
+    # Increases with every change of the job
+    revision: int = 0
+
+    class Config:
+        from_attributes = True
+
+
+class JobSubmitted(BaseModel):
+    message: str
+    job_id: str = Field(..., example="9f2c4a1b3e5d7a60")
+    status_url: str = Field(..., example="/process/jobs/9f2c4a1b3e5d7a60")
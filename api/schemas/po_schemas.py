@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
-from typing import Optional, List
+from functools import lru_cache
+from pydantic import BaseModel, Field, TypeAdapter, create_model
+from typing import Optional, List, Tuple
 # Assuming TGL_PO and other date fields will be datetime
 from datetime import datetime
 
@@ -100,6 +101,15 @@ class PurchaseOrderUpdate(BaseModel):
         from_attributes = True  # Replaced orm_mode
 
 
+# One entry of a bulk update: the PO id plus the fields to change
+class PurchaseOrderBulkUpdateItem(PurchaseOrderUpdate):
+    id: int
+
+
+class PurchaseOrderBulkUpdate(BaseModel):
+    updates: List[PurchaseOrderBulkUpdateItem] = Field(..., min_length=1, max_length=1000)
+
+
 # Schema for reading/returning a PO (includes all fields, including ID from DB)
 class PurchaseOrder(PurchaseOrderBase):
     id: int  # Primary key from MySQL table
@@ -113,6 +123,64 @@ class PurchaseOrder(PurchaseOrderBase):
     # Layer3_Name: Optional[str] = None
 
 
+class PurchaseOrderBulkUpdateResponse(BaseModel):
+    items: List[PurchaseOrder]  # Updated rows, in request order
+    not_found_ids: List[int] = []
+
+
+# Column projection (`fields=` on the PO endpoints).
+# Named presets expand to field lists; any other token must be a PurchaseOrder field.
+PO_FIELD_PRESETS = {
+    # What the po-data table shows
+    "list": ("id", "PO_No", "PO_No_Line", "TGL_PO", "ITEM", "ITEM_DESC", "QTY_ORDER", "UNIT",
+             "Supplier_Name", "IDR_PRICE", "Sum_of_Order_Amount_IDR", "Checklist", "Keterangan"),
+    "full": tuple(PurchaseOrder.model_fields),
+}
+
+
+def resolve_po_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """
+    Parses a comma-separated `fields` value (field names and/or preset names)
+    into PurchaseOrder field names in schema order, always including `id`.
+    Returns None when no projection was requested (or it covers every field).
+    Raises ValueError on unknown names.
+    """
+    if not fields or not fields.strip():
+        return None
+    requested = {"id"}
+    for token in (token.strip() for token in fields.split(",")):
+        if not token:
+            continue
+        if token in PO_FIELD_PRESETS:
+            requested.update(PO_FIELD_PRESETS[token])
+        elif token in PurchaseOrder.model_fields:
+            requested.add(token)
+        else:
+            raise ValueError(
+                f"Unknown field '{token}'. Use a PurchaseOrder field or one of the presets: {', '.join(PO_FIELD_PRESETS)}.")
+    if len(requested) == len(PurchaseOrder.model_fields):
+        return None
+    return tuple(name for name in PurchaseOrder.model_fields if name in requested)
+
+
+@lru_cache(maxsize=64)
+def get_po_projection_model(field_names: Tuple[str, ...]):
+    """PurchaseOrder restricted to `field_names` (as returned by resolve_po_fields)."""
+    return create_model(
+        "PurchaseOrderProjection",
+        __config__=PurchaseOrder.model_config,
+        **{name: (PurchaseOrder.model_fields[name].annotation, PurchaseOrder.model_fields[name])
+           for name in field_names}
+    )
+
+
+@lru_cache(maxsize=64)
+def get_po_projection_adapter(field_names: Tuple[str, ...], many: bool = True) -> TypeAdapter:
+    """Cached TypeAdapter validating and serializing one projected PO (or a list)."""
+    model = get_po_projection_model(field_names)
+    return TypeAdapter(List[model] if many else model)
+
+
 # Schema for paginated list of POs
 class PurchaseOrderList(BaseModel):
     total: int
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional
+from typing import Literal, Optional
 
 
 class UserBase(BaseModel):
@@ -29,6 +29,11 @@ class UserInDB(UserInDBBase):  # Schema for user data stored in DB (with hashed_
     hashed_password: str
 
 
+class UserAccessUpdate(BaseModel):  # Role / account status changes made by an SPV
+    role: Optional[Literal["user", "spv"]] = None
+    disabled: Optional[bool] = None
+
+
 class Token(BaseModel):
     access_token: str
     token_type: str
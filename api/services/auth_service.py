@@ -1,7 +1,10 @@
 from typing import Optional
 from ..db.database import get_mysql_connection
-from ..schemas.user_schemas import UserCreate, UserInDB, User
-from ..core.security import get_password_hash, verify_password
+from ..schemas.user_schemas import UserCreate, UserInDB, User, UserAccessUpdate
+from ..core.security import get_password_hash, verify_password_async
+from ..core.cache import invalidate_cached_user
+from ..core.concurrency import run_db
+from ..core.metrics import track_query
 
 USERS_TABLE_NAME = "users"
 
@@ -15,8 +18,9 @@ def get_user_by_username(username: str) -> Optional[UserInDB]:
     cursor = conn.cursor(dictionary=True)
     query = f"SELECT id, username, email, full_name, hashed_password, role, disabled FROM {USERS_TABLE_NAME} WHERE username = %s"
     try:
-        cursor.execute(query, (username,))
-        user_data = cursor.fetchone()
+        with track_query("user_by_username"):
+            cursor.execute(query, (username,))
+            user_data = cursor.fetchone()
         if user_data:
             return UserInDB(**user_data)
         return None
@@ -31,7 +35,11 @@ def get_user_by_username(username: str) -> Optional[UserInDB]:
             conn.close()
 
 
-def create_user(user_in: UserCreate) -> Optional[User]:
+def create_user(user_in: UserCreate, hashed_password: Optional[str] = None) -> Optional[User]:
+    """
+    Inserts a new user. Pass hashed_password when the password was already
+    hashed elsewhere (e.g. in the password hashing pool); otherwise it is hashed here.
+    """
     # Check if user already exists
     existing_user = get_user_by_username(user_in.username)
     if existing_user:
@@ -40,7 +48,8 @@ def create_user(user_in: UserCreate) -> Optional[User]:
             f"AuthService: Username '{user_in.username}' already registered.")
         return None
 
-    hashed_password = get_password_hash(user_in.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user_in.password)
 
     conn = get_mysql_connection()
     if not conn:
@@ -93,14 +102,53 @@ def create_user(user_in: UserCreate) -> Optional[User]:
             conn.close()
 
 
-def authenticate_user(username: str, password: str) -> Optional[UserInDB]:
-    user = get_user_by_username(username)
+def update_user_access(username: str, access_update: UserAccessUpdate) -> Optional[UserInDB]:
+    """
+    Changes a user's role and/or disabled flag, and drops their cached sessions
+    so the change applies to their next request.
+    Returns the updated user, or None if the user does not exist or the update failed.
+    """
+    update_values = access_update.dict(exclude_unset=True, exclude_none=True)
+    if not update_values:
+        return get_user_by_username(username)
+
+    conn = get_mysql_connection()
+    if not conn:
+        print("AuthService: DB connection failed for updating user access.")
+        return None
+
+    cursor = conn.cursor()
+    set_clauses = ", ".join(f"`{key}` = %s" for key in update_values)
+    query = f"UPDATE {USERS_TABLE_NAME} SET {set_clauses} WHERE username = %s"
+    try:
+        cursor.execute(query, tuple(update_values.values()) + (username,))
+        conn.commit()
+    except Exception as e:
+        print(f"AuthService: Error updating access of user '{username}': {e}")
+        conn.rollback()
+        return None
+    finally:
+        if cursor:
+            cursor.close()
+        if conn and conn.is_connected():
+            conn.close()
+
+    invalidate_cached_user(username)
+    return get_user_by_username(username)
+
+
+async def authenticate_user(username: str, password: str) -> Optional[UserInDB]:
+    """
+    The user lookup runs on a database thread (run_db) and the bcrypt verify in
+    the password hashing pool. Raises PasswordHashingBusyError when that pool is full.
+    """
+    user = await run_db(get_user_by_username, username=username)
     if not user:
         return None
     if user.disabled:  # Check if user account is disabled
         print(
             f"AuthService: Authentication failed for disabled user '{username}'.")
         return None  # Or raise a specific exception/return a specific status
-    if not verify_password(password, user.hashed_password):
+    if not await verify_password_async(password, user.hashed_password):
         return None
     return user
@@ -1,5 +1,8 @@
-from typing import List, Optional, Dict, Any
-from ..db.database import get_mysql_connection
+import logging
+from typing import List, Optional, Dict, Any, Tuple
+from ..db.database import DatabaseUnavailableError, get_mysql_connection, get_table_columns
+from ..core.pagination import decode_cursor, keyset_condition_desc, next_cursor_for
+from ..core.metrics import track_query
 # Assuming FrontendLayerNode structure is what we want to return,
 # or we define a similar Pydantic schema for API response.
 # from ..schemas.classification_schemas import LayerNode as LayerNodeSchema # If defined
@@ -7,8 +10,12 @@ from ..db.database import get_mysql_connection
 # For now, let's define a simple structure for what the DB might hold or how we aggregate it.
 # The 'item_classifications' table currently stores: item_po_id, item_description, cluster_label, layer_name
 
+logger = logging.getLogger(__name__)
+
 CLASSIFICATIONS_TABLE_NAME = "item_classifications"
 DEFINITIONS_TABLE_NAME = "layer_definitions"
+# Side table holding the wide text columns of purchase_orders (see po_service)
+PO_DETAILS_TABLE_NAME = "purchase_order_details"
 
 
 def fetch_distinct_layers_from_db(
@@ -27,7 +34,7 @@ def fetch_distinct_layers_from_db(
     conn = get_mysql_connection()
     default_response = {"parent_name": None, "layers": []}
     if not conn:
-        print("ClassificationService: DB connection failed.")
+        logger.error("ClassificationService: DB connection failed.")
         return default_response
 
     cursor = conn.cursor(dictionary=True)
@@ -39,16 +46,17 @@ def fetch_distinct_layers_from_db(
     if parent_layer_definition_pk is not None:
         # Fetch parent name if parent_layer_definition_pk is provided
         try:
-            cursor.execute(
-                f"SELECT descriptive_name FROM {DEFINITIONS_TABLE_NAME} WHERE id = %s",
-                (parent_layer_definition_pk,)
-            )
-            parent_row = cursor.fetchone()
+            with track_query("layer_parent_name"):
+                cursor.execute(
+                    f"SELECT descriptive_name FROM {DEFINITIONS_TABLE_NAME} WHERE id = %s",
+                    (parent_layer_definition_pk,)
+                )
+                parent_row = cursor.fetchone()
             if parent_row:
                 parent_name = parent_row["descriptive_name"]
         except Exception as e:
-            print(
-                f"ClassificationService: Error fetching parent layer name for PK {parent_layer_definition_pk}: {e}")
+            logger.error(
+                "ClassificationService: Error fetching parent layer name for PK %s: %s", parent_layer_definition_pk, e)
             # Not returning early, just parent_name might be None
 
     if parent_layer_definition_pk is None:  # Fetching L1 definitions
@@ -85,8 +93,8 @@ def fetch_distinct_layers_from_db(
     # For now, the user's request implies L2 is the final folder before item list.
     # So, layer_level_to_fetch == 3 (items) is handled by fetch_items_for_layer_from_db
     else:  # Should not happen if UI calls correctly for L1 or L2 nodes
-        print(
-            f"ClassificationService: Unexpected layer_level_to_fetch: {layer_level_to_fetch} with parent_pk: {parent_layer_definition_pk}")
+        logger.warning(
+            "ClassificationService: Unexpected layer_level_to_fetch: %s with parent_pk: %s", layer_level_to_fetch, parent_layer_definition_pk)
         # Ensure cursor and connection are closed in this path too
         if cursor:
             cursor.close()
@@ -95,10 +103,12 @@ def fetch_distinct_layers_from_db(
         return default_response  # Return default response structure
 
     try:
-        print(
-            f"ClassificationService: Executing query for layers: {full_query} with params: {params}")
-        cursor.execute(full_query, params)
-        raw_results = cursor.fetchall()
+        logger.debug(
+            "ClassificationService: Executing query for layers: %s with params: %s", full_query, params)
+        with track_query(f"layers_l{layer_level_to_fetch}") as query_record:
+            cursor.execute(full_query, params)
+            raw_results = cursor.fetchall()
+            query_record.rows = len(raw_results)
 
         for row in raw_results:
             results.append({
@@ -109,10 +119,10 @@ def fetch_distinct_layers_from_db(
                 # parent_id is the PK of the parent in layer_definitions
                 "parent_id": str(row["parent_layer_id"]) if row["parent_layer_id"] is not None else None
             })
-        print(
-            f"ClassificationService: Fetched {len(results)} layer categories for level {layer_level_to_fetch}, parent_pk {parent_layer_definition_pk}.")
+        logger.debug(
+            "ClassificationService: Fetched %d layer categories for level %s, parent_pk %s.", len(results), layer_level_to_fetch, parent_layer_definition_pk)
     except Exception as e:
-        print(f"ClassificationService: Error fetching layer categories: {e}")
+        logger.error("ClassificationService: Error fetching layer categories: %s", e)
         # results will be empty, parent_name might be set or None
     finally:
         if cursor:  # Check if cursor was initialized
@@ -123,21 +133,32 @@ def fetch_distinct_layers_from_db(
     return {"parent_name": parent_name, "layers": results}
 
 
-def fetch_items_for_layer_from_db(layer_definition_pk: int) -> Dict[str, Any]:
+# Sort key of the folder item listing, matching ORDER BY po.TGL_PO DESC, po.id DESC
+ITEMS_CURSOR_COLUMNS = ("TGL_PO", "id")
+
+
+def fetch_items_for_layer_from_db(layer_definition_pk: int, limit: int = 100, page_cursor: Optional[str] = None) -> Dict[str, Any]:
     """
     Fetches item details (POs) that belong to a specific layer definition,
     and the name of the layer itself.
     The layer_definition_pk is the primary key 'id' from the 'layer_definitions' table.
-    Returns a dictionary: {"layer_name": str, "items": List[Dict[str, Any]]}
+    Items are keyset-paginated: pass the returned next_cursor as page_cursor to get the following page.
+    Raises ValueError for a malformed cursor.
+    Returns a dictionary: {"layer_name": str, "items": List[Dict[str, Any]], "next_cursor": Optional[str]}
     """
+    cursor_values = decode_cursor(
+        page_cursor, len(ITEMS_CURSOR_COLUMNS)) if page_cursor else None
+
     conn = get_mysql_connection()
-    default_response = {"layer_name": "Unknown Layer", "items": []}
+    default_response = {"layer_name": "Unknown Layer",
+                        "items": [], "next_cursor": None}
     if not conn:
-        print("ClassificationService: DB connection failed for fetching items.")
+        logger.error("ClassificationService: DB connection failed for fetching items.")
         return default_response
 
     cursor = conn.cursor(dictionary=True)
     items = []
+    next_cursor = None
     layer_descriptive_name = "Unknown Layer"
 
     # 1. Get layer_name_db, cluster_label_id, and descriptive_name from layer_definitions table
@@ -146,15 +167,15 @@ def fetch_items_for_layer_from_db(layer_definition_pk: int) -> Dict[str, Any]:
         cursor.execute(get_layer_info_query, (layer_definition_pk,))
         layer_info = cursor.fetchone()
     except Exception as e:
-        print(
-            f"ClassificationService: Error fetching layer definition info for PK {layer_definition_pk}: {e}")
+        logger.error(
+            "ClassificationService: Error fetching layer definition info for PK %s: %s", layer_definition_pk, e)
         cursor.close()
         conn.close()
         return default_response
 
     if not layer_info:
-        print(
-            f"ClassificationService: No layer definition found for PK {layer_definition_pk}")
+        logger.info(
+            "ClassificationService: No layer definition found for PK %s", layer_definition_pk)
         cursor.close()
         conn.close()
         return default_response
@@ -165,85 +186,155 @@ def fetch_items_for_layer_from_db(layer_definition_pk: int) -> Dict[str, Any]:
     layer_descriptive_name = layer_info["descriptive_name"]
 
     # 2. Fetch items from purchase_orders joined with item_classifications
-    # Ensure column names like ITEM_NAME are correct for purchase_orders table.
-    # Based on etl_script.py, it's 'ITEM' and 'ITEM_DESC'.
-    query_items = f"""
-        SELECT 
-            po.id, 
-            po.PO_No,
-            po.ITEM AS ITEM_NAME, 
-            po.ITEM_DESC,
-            po.Supplier_Name,
-            po.QTY_ORDER,
-            po.Original_PRICE AS ITEM_PRICE,
-            po.Currency AS ITEM_CURRENCY,
-            po.TGL_PO,
-            po.PR_No,
-            po.UNIT,
-            po.PR_Date,
-            po.PR_Ref_A,
-            po.PR_Ref_B,
-            po.Term_Payment_at_PO,
-            po.RECEIVED_DATE,
-            po.Sum_of_Order_Amount_IDR,
-            po.Total_Cumulative_QTY_Order, -- This is global cumulative, not per item
-            po.Total_Cumulative_IDR_Amount, -- This is global cumulative, not per item
-            po.Checklist,
-            po.Keterangan,
-            SUM(po.QTY_ORDER) OVER (PARTITION BY po.ITEM ORDER BY po.TGL_PO ASC, po.id ASC ROWS UNBOUNDED PRECEDING) AS Cumulative_Item_QTY,
-            SUM(po.Sum_of_Order_Amount_IDR) OVER (PARTITION BY po.ITEM ORDER BY po.TGL_PO ASC, po.id ASC ROWS UNBOUNDED PRECEDING) AS Cumulative_Item_Amount_IDR
-        FROM purchase_orders po
-        JOIN {CLASSIFICATIONS_TABLE_NAME} ic ON po.id = ic.item_po_id
-        WHERE ic.layer_name = %s AND ic.cluster_label = %s
-        ORDER BY po.TGL_PO DESC, po.id DESC 
-        LIMIT 100 -- Consider pagination in the future. Note: Window functions are applied before LIMIT.
-    """
-    params_items = (target_layer_name_db, target_cluster_label_id)
+    # The keyset condition only drops rows newer than the cursor, which come after
+    # the page's rows in the ascending window order, so the per-item cumulative
+    # sums stay correct on every page.
+    keyset_condition = ""
+    params_items = [target_layer_name_db, target_cluster_label_id]
+    if cursor_values is not None:
+        condition_sql, condition_params = keyset_condition_desc(
+            ["po.TGL_PO", "po.id"], cursor_values, nullable_columns=["po.TGL_PO"])
+        keyset_condition = f"AND {condition_sql}"
+        params_items.extend(condition_params)
+    params_items.append(limit + 1)  # One look-ahead row tells us if there is a next page
 
     try:
-        print(
-            f"ClassificationService: Executing query for items: {query_items} with params: {params_items}")
-        cursor.execute(query_items, params_items)
-        raw_items = cursor.fetchall()
-
-        for row in raw_items:
-            # Map to the Pydantic model (PurchaseOrder / PurchaseOrderBase) fields
-            items.append({
-                "id": row.get("id"),
-                "PO_No": str(row.get("PO_No") or ""),
-                "ITEM": str(row.get("ITEM_NAME") or ""),
-                "ITEM_DESC": str(row.get("ITEM_DESC") or ""),
-                "Supplier_Name": str(row.get("Supplier_Name") or ""),
-                "QTY_ORDER": row.get("QTY_ORDER"),
-                "Original_PRICE": row.get("ITEM_PRICE"),
-                "Currency": str(row.get("ITEM_CURRENCY") or ""),
-                "TGL_PO": row.get("TGL_PO"),
-                "PR_No": str(row.get("PR_No") or ""),
-                "UNIT": str(row.get("UNIT") or ""),
-                "PR_Date": row.get("PR_Date"),
-                "PR_Ref_A": str(row.get("PR_Ref_A") or ""),
-                "PR_Ref_B": str(row.get("PR_Ref_B") or ""),
-                "Term_Payment_at_PO": str(row.get("Term_Payment_at_PO") or ""),
-                "RECEIVED_DATE": row.get("RECEIVED_DATE"),
-                "Sum_of_Order_Amount_IDR": row.get("Sum_of_Order_Amount_IDR"),
-                # Keep existing global cumulative
-                "Total_Cumulative_QTY_Order": row.get("Total_Cumulative_QTY_Order"),
-                # Keep existing global cumulative
-                "Total_Cumulative_IDR_Amount": row.get("Total_Cumulative_IDR_Amount"),
-                # Add new per-item cumulative
-                "Cumulative_Item_QTY": row.get("Cumulative_Item_QTY"),
-                # Add new per-item cumulative
-                "Cumulative_Item_Amount_IDR": row.get("Cumulative_Item_Amount_IDR"),
-                "Checklist": bool(row.get("Checklist")) if row.get("Checklist") is not None else None,
-                "Keterangan": str(row.get("Keterangan") or "")
-            })
-        print(
-            f"ClassificationService: Fetched {len(items)} items for layer definition PK '{layer_definition_pk}' (layer_name: '{target_layer_name_db}', cluster: '{target_cluster_label_id}').")
+        # The PR references live in the side table. They are joined to the page
+        # rows only, after the window functions have run over the narrow rows.
+        # Tables loaded before the split still hold them in purchase_orders.
+        pr_refs_in_po = "PR_Ref_A" in get_table_columns(cursor, "purchase_orders")
+        inner_pr_refs = "COALESCE(po.PR_Ref_A, '') AS PR_Ref_A, COALESCE(po.PR_Ref_B, '') AS PR_Ref_B," if pr_refs_in_po else ""
+        outer_pr_refs = "" if pr_refs_in_po else ", COALESCE(d.PR_Ref_A, '') AS PR_Ref_A, COALESCE(d.PR_Ref_B, '') AS PR_Ref_B"
+        details_join = "" if pr_refs_in_po else f"LEFT JOIN {PO_DETAILS_TABLE_NAME} d ON d.id = page.id"
+
+        # Columns are selected under their PurchaseOrderBase names, with text
+        # columns defaulting to '' in SQL, so rows are returned as fetched.
+        query_items = f"""
+            SELECT page.*{outer_pr_refs} FROM (
+            SELECT 
+                po.id, 
+                COALESCE(po.PO_No, '') AS PO_No,
+                COALESCE(po.ITEM, '') AS ITEM,
+                COALESCE(po.ITEM_DESC, '') AS ITEM_DESC,
+                COALESCE(po.Supplier_Name, '') AS Supplier_Name,
+                po.QTY_ORDER,
+                po.Original_PRICE,
+                COALESCE(po.Currency, '') AS Currency,
+                po.TGL_PO,
+                COALESCE(po.PR_No, '') AS PR_No,
+                COALESCE(po.UNIT, '') AS UNIT,
+                po.PR_Date,
+                {inner_pr_refs}
+                COALESCE(po.Term_Payment_at_PO, '') AS Term_Payment_at_PO,
+                po.RECEIVED_DATE,
+                po.Sum_of_Order_Amount_IDR,
+                po.Total_Cumulative_QTY_Order, -- This is global cumulative, not per item
+                po.Total_Cumulative_IDR_Amount, -- This is global cumulative, not per item
+                po.Checklist,
+                COALESCE(po.Keterangan, '') AS Keterangan,
+                SUM(po.QTY_ORDER) OVER (PARTITION BY po.ITEM ORDER BY po.TGL_PO ASC, po.id ASC ROWS UNBOUNDED PRECEDING) AS Cumulative_Item_QTY,
+                SUM(po.Sum_of_Order_Amount_IDR) OVER (PARTITION BY po.ITEM ORDER BY po.TGL_PO ASC, po.id ASC ROWS UNBOUNDED PRECEDING) AS Cumulative_Item_Amount_IDR
+            FROM purchase_orders po
+            JOIN {CLASSIFICATIONS_TABLE_NAME} ic ON po.id = ic.item_po_id
+            WHERE ic.layer_name = %s AND ic.cluster_label = %s {keyset_condition}
+            ORDER BY po.TGL_PO DESC, po.id DESC
+            LIMIT %s -- Note: Window functions are applied before LIMIT.
+            ) page
+            {details_join}
+            ORDER BY page.TGL_PO DESC, page.id DESC
+        """
+        logger.debug(
+            "ClassificationService: Executing query for items: %s with params: %s", query_items, params_items)
+        with track_query("layer_items") as query_record:
+            cursor.execute(query_items, tuple(params_items))
+            items = cursor.fetchall()
+            query_record.rows = len(items)
+        next_cursor = next_cursor_for(items, limit, ITEMS_CURSOR_COLUMNS)
+        logger.debug(
+            "ClassificationService: Fetched %d items for layer definition PK '%s' (layer_name: '%s', cluster: '%s').",
+            len(items), layer_definition_pk, target_layer_name_db, target_cluster_label_id)
     except Exception as e:
-        print(
-            f"ClassificationService: Error fetching items for layer definition PK '{layer_definition_pk}': {e}")
+        logger.error(
+            "ClassificationService: Error fetching items for layer definition PK '%s': %s", layer_definition_pk, e)
     finally:
         cursor.close()
         conn.close()
 
-    return {"layer_name": layer_descriptive_name, "items": items}
+    return {"layer_name": layer_descriptive_name, "items": items, "next_cursor": next_cursor}
+
+
+def open_layer_items_export_cursor(layer_definition_pk: int) -> Optional[Tuple[str, Any, Any, List[str]]]:
+    """
+    Runs the fetch_items_for_layer_from_db query for all items of a folder, for
+    streaming exports. Columns carry the PurchaseOrder field names (ITEM,
+    Original_PRICE, Currency, ...). Rows are left on the server (unbuffered
+    cursor) and read in batches with cursor.fetchmany().
+    Returns (layer_name, conn, cursor, column_names), the caller closes conn
+    and cursor; None if the layer definition does not exist.
+    Raises DatabaseUnavailableError if no connection could be obtained.
+    """
+    conn = get_mysql_connection()
+    if not conn:
+        raise DatabaseUnavailableError("Could not obtain a MySQL connection.")
+    cursor = None
+    try:
+        lookup_cursor = conn.cursor(dictionary=True, buffered=True)
+        try:
+            lookup_cursor.execute(
+                f"SELECT layer_name_db, cluster_label_id, descriptive_name FROM {DEFINITIONS_TABLE_NAME} WHERE id = %s",
+                (layer_definition_pk,))
+            layer_info = lookup_cursor.fetchone()
+            pr_refs_in_po = "PR_Ref_A" in get_table_columns(
+                lookup_cursor, "purchase_orders")
+        finally:
+            lookup_cursor.close()
+        if not layer_info:
+            logger.info(
+                "ClassificationService: No layer definition found for PK %s", layer_definition_pk)
+            conn.close()
+            return None
+
+        inner_pr_refs = "po.PR_Ref_A, po.PR_Ref_B," if pr_refs_in_po else ""
+        outer_pr_refs = "" if pr_refs_in_po else ", d.PR_Ref_A, d.PR_Ref_B"
+        details_join = "" if pr_refs_in_po else f"LEFT JOIN {PO_DETAILS_TABLE_NAME} d ON d.id = items.id"
+        query_items = f"""
+            SELECT items.*{outer_pr_refs} FROM (
+            SELECT
+                po.id,
+                po.PO_No,
+                po.ITEM,
+                po.ITEM_DESC,
+                po.Supplier_Name,
+                po.QTY_ORDER,
+                po.UNIT,
+                po.Original_PRICE,
+                po.Currency,
+                po.TGL_PO,
+                po.PR_No,
+                po.PR_Date,
+                {inner_pr_refs}
+                po.Term_Payment_at_PO,
+                po.RECEIVED_DATE,
+                po.Sum_of_Order_Amount_IDR,
+                SUM(po.QTY_ORDER) OVER (PARTITION BY po.ITEM ORDER BY po.TGL_PO ASC, po.id ASC ROWS UNBOUNDED PRECEDING) AS Cumulative_Item_QTY,
+                SUM(po.Sum_of_Order_Amount_IDR) OVER (PARTITION BY po.ITEM ORDER BY po.TGL_PO ASC, po.id ASC ROWS UNBOUNDED PRECEDING) AS Cumulative_Item_Amount_IDR,
+                po.Checklist,
+                po.Keterangan
+            FROM purchase_orders po
+            JOIN {CLASSIFICATIONS_TABLE_NAME} ic ON po.id = ic.item_po_id
+            WHERE ic.layer_name = %s AND ic.cluster_label = %s
+            ) items
+            {details_join}
+            ORDER BY items.TGL_PO DESC, items.id DESC
+        """
+        cursor = conn.cursor()
+        logger.debug(
+            "ClassificationService: Executing export query for layer definition PK %s", layer_definition_pk)
+        with track_query("layer_items_export_open"):
+            cursor.execute(query_items, (layer_info["layer_name_db"], layer_info["cluster_label_id"]))
+        return layer_info["descriptive_name"], conn, cursor, list(cursor.column_names)
+    except Exception:
+        if cursor is not None:
+            cursor.close()
+        conn.close()
+        raise
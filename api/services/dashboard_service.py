@@ -1,82 +1,462 @@
-from ..db.database import get_mysql_connection
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+import mysql.connector
+from ..db.database import (DatabaseUnavailableError, get_mysql_connection, get_table_columns,
+                           mysql_connection, reset_table_columns_cache)
 from ..schemas.dashboard_schemas import MiniDashboardData
+from ..core.metrics import track_query
 import logging
 
 logger = logging.getLogger(__name__)
 
+# One row per company plus ALL_COMPANIES_KEY for the grand total, rebuilt by
+# refresh_dashboard_summary() after every ETL load and folder generation, so
+# the dashboard endpoint is a single primary-key read.
+SUMMARY_TABLE_NAME = "dashboard_summary"
+ALL_COMPANIES_KEY = "*"
+L1_LAYER_NAME_DB = "L1_Parsed_Folders"
+L2_LAYER_NAME_DB = "L2_Parsed_Folders"
 
-def get_mini_dashboard_data() -> MiniDashboardData:
+# Spend rollups behind the /dashboard analytics endpoints, one row per
+# (company, month, supplier, currency) and per (company, month, L1/L2 folder).
+# Months are stored as their first day.
+SUPPLIER_ROLLUP_TABLE_NAME = "spend_by_supplier_month"
+FOLDER_ROLLUP_TABLE_NAME = "spend_by_folder_month"
+
+# MySQL error raised when the summary table has not been created yet
+ER_NO_SUCH_TABLE = 1146
+
+
+def _empty_dashboard_data(company_id: Optional[str] = None) -> MiniDashboardData:
+    return MiniDashboardData(
+        total_purchase_orders=0,
+        total_order_amount_idr=0.0,
+        total_l1_categories=0,
+        total_l2_categories=0,
+        company_id=company_id
+    )
+
+
+def _company_expr(po_columns) -> str:
+    return "COALESCE(po.Company_ID, '')" if "Company_ID" in po_columns else "''"
+
+
+def _amount_idr_expr(po_columns) -> str:
+    if "Order_Amount_IDR" in po_columns:
+        return "po.Order_Amount_IDR"
+    if "Sum_of_Order_Amount_IDR" in po_columns:
+        return "po.Sum_of_Order_Amount_IDR"
+    return "0"
+
+
+def _build_summary_query(cursor) -> str:
     """
-    Fetches and aggregates data for the mini dashboard.
+    The single aggregate pass over purchase_orders. Columns are picked from the
+    actual table layout, since older loads may lack Company_ID.
+    """
+    po_columns = get_table_columns(cursor, "purchase_orders")
+    company_expr = _company_expr(po_columns)
+    amount_expr = _amount_idr_expr(po_columns)
+
+    # WITH ROLLUP adds the all-companies row, whose company_id is NULL
+    return f"""
+        SELECT
+            {company_expr} AS company_id,
+            COUNT(*) AS total_purchase_orders,
+            COALESCE(SUM({amount_expr}), 0) AS total_order_amount_idr
+        FROM purchase_orders po
+        GROUP BY {company_expr} WITH ROLLUP
     """
-    conn = None
+
+
+def _count_folders(cursor) -> Tuple[int, int]:
+    """Every defined L1 and L2 folder in layer_definitions; (0, 0) before the first folder generation."""
+    if not get_table_columns(cursor, "layer_definitions"):
+        return 0, 0
+    cursor.execute(
+        """
+        SELECT layer_name_db, COUNT(*) AS folders FROM layer_definitions
+        WHERE layer_name_db IN (%s, %s) GROUP BY layer_name_db
+        """,
+        (L1_LAYER_NAME_DB, L2_LAYER_NAME_DB))
+    counts = {row["layer_name_db"]: int(row["folders"]) for row in cursor.fetchall()}
+    return counts.get(L1_LAYER_NAME_DB, 0), counts.get(L2_LAYER_NAME_DB, 0)
+
+
+def refresh_dashboard_summary() -> bool:
+    """
+    Recomputes dashboard_summary in one aggregate pass and swaps the rows in a
+    single transaction, so readers see either the old or the new numbers.
+    Returns True on success.
+    """
+    conn = get_mysql_connection()
+    if not conn:
+        logger.error("Failed to connect to the database for refreshing the dashboard summary.")
+        return False
+
+    cursor = conn.cursor(dictionary=True)
     try:
-        conn = get_mysql_connection()
-        if not conn:
-            logger.error(
-                "Failed to connect to the database for dashboard data.")
-            # Return default/empty data or raise an exception
-            return MiniDashboardData(
-                total_purchase_orders=0,
-                total_order_amount_idr=0.0,
-                total_l1_categories=0,
-                total_l2_categories=0
+        # Tables may have just been rebuilt by the caller
+        reset_table_columns_cache()
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {SUMMARY_TABLE_NAME} (
+                company_id VARCHAR(64) PRIMARY KEY,
+                total_purchase_orders BIGINT NOT NULL,
+                total_order_amount_idr DOUBLE NOT NULL,
+                total_l1_categories INT NOT NULL,
+                total_l2_categories INT NOT NULL,
+                refreshed_at DATETIME NOT NULL
             )
+        """)
 
-        cursor = conn.cursor(dictionary=True)
+        if get_table_columns(cursor, "purchase_orders"):
+            cursor.execute(_build_summary_query(cursor))
+            rows = cursor.fetchall()
+        else:
+            rows = []
+        if not rows:
+            # Nothing loaded yet: still record an all-companies row with the refresh time
+            rows = [{"company_id": None, "total_purchase_orders": 0, "total_order_amount_idr": 0}]
+        # Folders are not per company: every row counts all defined folders
+        l1_folders, l2_folders = _count_folders(cursor)
+
+        cursor.execute(f"DELETE FROM {SUMMARY_TABLE_NAME}")
+        cursor.executemany(
+            f"""
+            INSERT INTO {SUMMARY_TABLE_NAME}
+                (company_id, total_purchase_orders, total_order_amount_idr,
+                 total_l1_categories, total_l2_categories, refreshed_at)
+            VALUES (%s, %s, %s, %s, %s, NOW())
+            """,
+            [(row["company_id"] if row["company_id"] is not None else ALL_COMPANIES_KEY,
+              int(row["total_purchase_orders"]),
+              float(row["total_order_amount_idr"]),
+              l1_folders,
+              l2_folders)
+             for row in rows]
+        )
+        conn.commit()
+        logger.info("Dashboard summary refreshed (%d rows).", len(rows))
+        return True
+    except Exception as e:
+        logger.error("Error refreshing dashboard summary: %s", e, exc_info=True)
+        conn.rollback()
+        return False
+    finally:
+        cursor.close()
+        conn.close()
 
-        # 1. Total Purchase Orders
-        cursor.execute("SELECT COUNT(*) as total_pos FROM purchase_orders")
-        total_pos_result = cursor.fetchone()
-        total_purchase_orders = total_pos_result['total_pos'] if total_pos_result else 0
 
-        # 2. Total Order Amount IDR
-        cursor.execute(
-            "SELECT SUM(Order_Amount_IDR) as total_amount FROM purchase_orders")
-        total_amount_result = cursor.fetchone()
-        total_order_amount_idr = total_amount_result[
-            'total_amount'] if total_amount_result and total_amount_result['total_amount'] is not None else 0.0
-
-        # 3. Number of L1 Categories
-        # Assuming L1 folders have parent_id IS NULL or a specific marker if you have a root node for L1s
-        # Based on systemPatterns.md: L1 has parent_id=NULL and layer_name_db="L1_Parsed_Folders"
-        # However, the actual schema for layer_definitions might be simpler:
-        # L1: level = 1
-        # L2: level = 2
-        # Let's assume 'level' column exists in 'layer_definitions'
-        cursor.execute(
-            "SELECT COUNT(DISTINCT id) as total_l1 FROM layer_definitions WHERE level = 1")
-        total_l1_result = cursor.fetchone()
-        total_l1_categories = total_l1_result['total_l1'] if total_l1_result else 0
+def _fetch_summary_row(summary_key: str) -> Optional[dict]:
+    with mysql_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            with track_query("dashboard_summary") as query_record:
+                cursor.execute(
+                    f"""
+                    SELECT total_purchase_orders, total_order_amount_idr, total_l1_categories,
+                           total_l2_categories, refreshed_at
+                    FROM {SUMMARY_TABLE_NAME} WHERE company_id = %s
+                    """,
+                    (summary_key,)
+                )
+                row = cursor.fetchone()
+                query_record.rows = 1 if row else 0
+            return row
+        finally:
+            cursor.close()
 
-        # 4. Number of L2 Categories
-        cursor.execute(
-            "SELECT COUNT(DISTINCT id) as total_l2 FROM layer_definitions WHERE level = 2")
-        total_l2_result = cursor.fetchone()
-        total_l2_categories = total_l2_result['total_l2'] if total_l2_result else 0
+
+def get_mini_dashboard_data(company_id: Optional[str] = None) -> MiniDashboardData:
+    """
+    Reads the precomputed dashboard numbers for one company, or for all
+    companies when company_id is None.
+    """
+    summary_key = company_id if company_id is not None else ALL_COMPANIES_KEY
+    try:
+        try:
+            row = _fetch_summary_row(summary_key)
+        except mysql.connector.Error as err:
+            if err.errno != ER_NO_SUCH_TABLE:
+                raise
+            # First run after an upgrade: build the summary once
+            logger.info("Dashboard summary table missing, building it now.")
+            if not refresh_dashboard_summary():
+                return _empty_dashboard_data(company_id)
+            row = _fetch_summary_row(summary_key)
+        if not row:
+            return _empty_dashboard_data(company_id)
 
         dashboard_data = MiniDashboardData(
-            total_purchase_orders=total_purchase_orders,
+            total_purchase_orders=row["total_purchase_orders"],
             total_order_amount_idr=float(
-                total_order_amount_idr),  # Ensure float
-            total_l1_categories=total_l1_categories,
-            total_l2_categories=total_l2_categories
+                row["total_order_amount_idr"]),  # Ensure float
+            total_l1_categories=row["total_l1_categories"],
+            total_l2_categories=row["total_l2_categories"],
+            company_id=company_id,
+            last_refreshed_at=row["refreshed_at"]
         )
 
-        logger.info(f"Fetched dashboard data: {dashboard_data}")
+        logger.info("Fetched dashboard data: %s", dashboard_data)
         return dashboard_data
 
+    except DatabaseUnavailableError:
+        logger.error("Failed to connect to the database for dashboard data.")
+        return _empty_dashboard_data(company_id)
     except Exception as e:
-        logger.error(f"Error fetching dashboard data: {e}", exc_info=True)
+        logger.error("Error fetching dashboard data: %s", e, exc_info=True)
         # Return default/empty data in case of any error
-        return MiniDashboardData(
-            total_purchase_orders=0,
-            total_order_amount_idr=0.0,
-            total_l1_categories=0,
-            total_l2_categories=0
-        )
+        return _empty_dashboard_data(company_id)
+
+
+# --- Spend rollups ---
+
+# First day of the PO's month (no '%' format string: queries use %s parameters)
+MONTH_EXPR = "DATE(po.TGL_PO - INTERVAL (DAYOFMONTH(po.TGL_PO) - 1) DAY)"
+
+
+def _next_month(month: date) -> date:
+    return date(month.year + 1, 1, 1) if month.month == 12 else date(month.year, month.month + 1, 1)
+
+
+def _rollup_windows(cursor, company_expr: str, company_id: Optional[str],
+                    from_month: Optional[date], to_month: Optional[date]) -> List[Tuple[str, date, date]]:
+    """
+    The (company, first month, month after the last) ranges to rebuild: the
+    given load window, or else every month present in purchase_orders.
+    """
+    if company_id is not None and from_month and to_month:
+        return [(company_id, from_month.replace(day=1), _next_month(to_month.replace(day=1)))]
+
+    query = f"""
+        SELECT {company_expr} AS company_key, MIN(po.TGL_PO) AS first_po, MAX(po.TGL_PO) AS last_po
+        FROM purchase_orders po
+        WHERE po.TGL_PO IS NOT NULL{f" AND {company_expr} = %s" if company_id is not None else ""}
+        GROUP BY {company_expr}
+    """
+    cursor.execute(query, (company_id,) if company_id is not None else ())
+    return [(row["company_key"], row["first_po"].date().replace(day=1),
+             _next_month(row["last_po"].date().replace(day=1)))
+            for row in cursor.fetchall()]
+
+
+def _replace_rollup_windows(cursor, table_name: str, columns: str, select_sql: str,
+                            windows: List[Tuple[str, date, date]]) -> None:
+    """
+    Deletes each window from the rollup and re-inserts it from purchase_orders.
+    select_sql must filter on (company, TGL_PO >= start, TGL_PO < end), in that order.
+    """
+    for company_key, start, end in windows:
+        cursor.execute(
+            f"DELETE FROM {table_name} WHERE company_id = %s AND month >= %s AND month < %s",
+            (company_key, start, end))
+        cursor.execute(f"INSERT INTO {table_name} ({columns}) {select_sql}",
+                       (company_key, start, end))
+
+
+def _refresh_rollup(table_name: str, create_sql: str, build_sql, company_id: Optional[str],
+                    from_month: Optional[date], to_month: Optional[date]) -> bool:
+    conn = get_mysql_connection()
+    if not conn:
+        logger.error("Failed to connect to the database for refreshing %s.", table_name)
+        return False
+
+    cursor = conn.cursor(dictionary=True)
+    try:
+        reset_table_columns_cache()
+        cursor.execute(create_sql)
+        po_columns = get_table_columns(cursor, "purchase_orders")
+        if "TGL_PO" not in po_columns:
+            logger.info("%s: purchase_orders has no TGL_PO, nothing to roll up.", table_name)
+            return True
+        columns, select_sql = build_sql(cursor, po_columns)
+        if select_sql is None:
+            return True
+        windows = _rollup_windows(cursor, _company_expr(po_columns), company_id, from_month, to_month)
+        _replace_rollup_windows(cursor, table_name, columns, select_sql, windows)
+        conn.commit()
+        logger.info("%s refreshed for %d company window(s).", table_name, len(windows))
+        return True
+    except Exception as e:
+        logger.error("Error refreshing %s: %s", table_name, e, exc_info=True)
+        conn.rollback()
+        return False
     finally:
-        if conn and conn.is_connected():
-            cursor.close()
-            conn.close()
-            logger.debug("Database connection closed for dashboard service.")
+        cursor.close()
+        conn.close()
+
+
+def _supplier_rollup_sql(cursor, po_columns) -> Tuple[str, Optional[str]]:
+    company_expr = _company_expr(po_columns)
+    month_expr = MONTH_EXPR
+    code_expr = "NULLIF(po.SUPPLIER_CODE, '')" if "SUPPLIER_CODE" in po_columns else "NULL"
+    name_expr = "po.Supplier_Name" if "Supplier_Name" in po_columns else "NULL"
+    supplier_expr = f"LEFT(COALESCE({code_expr}, {name_expr}, ''), 255)"
+    currency_expr = "LEFT(COALESCE(po.Currency, ''), 16)" if "Currency" in po_columns else "''"
+    original_expr = "po.ORDER_AMOUNT" if "ORDER_AMOUNT" in po_columns else "0"
+    columns = "company_id, month, supplier_key, currency, supplier_name, po_lines, total_amount_idr, total_original_amount"
+    select_sql = f"""
+        SELECT {company_expr}, {month_expr}, {supplier_expr}, {currency_expr},
+               LEFT(MAX({name_expr}), 255), COUNT(*),
+               COALESCE(SUM({_amount_idr_expr(po_columns)}), 0), COALESCE(SUM({original_expr}), 0)
+        FROM purchase_orders po
+        WHERE {company_expr} = %s AND po.TGL_PO >= %s AND po.TGL_PO < %s
+        GROUP BY {company_expr}, {month_expr}, {supplier_expr}, {currency_expr}
+    """
+    return columns, select_sql
+
+
+def _folder_rollup_sql(cursor, po_columns) -> Tuple[str, Optional[str]]:
+    if not (get_table_columns(cursor, "item_classifications")
+            and get_table_columns(cursor, "layer_definitions")):
+        return "", None  # No folders generated yet
+    company_expr = _company_expr(po_columns)
+    month_expr = MONTH_EXPR
+    # Folders are keyed by name: layer_definitions ids change on every generation
+    l1_expr, l2_expr = "LEFT(l1.descriptive_name, 255)", "LEFT(l2.descriptive_name, 255)"
+    columns = "company_id, month, l1_folder, l2_folder, po_lines, total_amount_idr"
+    select_sql = f"""
+        SELECT {company_expr}, {month_expr}, {l1_expr}, {l2_expr}, COUNT(*),
+               COALESCE(SUM({_amount_idr_expr(po_columns)}), 0)
+        FROM purchase_orders po
+        JOIN item_classifications ic ON ic.item_po_id = po.id AND ic.layer_name = '{L2_LAYER_NAME_DB}'
+        JOIN layer_definitions l2 ON l2.layer_name_db = ic.layer_name AND l2.cluster_label_id = ic.cluster_label
+        JOIN layer_definitions l1 ON l1.id = l2.parent_layer_id
+        WHERE {company_expr} = %s AND po.TGL_PO >= %s AND po.TGL_PO < %s
+        GROUP BY {company_expr}, {month_expr}, {l1_expr}, {l2_expr}
+    """
+    return columns, select_sql
+
+
+def refresh_supplier_spend_rollup(company_id: Optional[str] = None,
+                                  from_month: Optional[date] = None, to_month: Optional[date] = None) -> bool:
+    """
+    Rebuilds spend_by_supplier_month for a company's load window (both months
+    inclusive), or for every month in purchase_orders when no window is given.
+    Months outside the window keep their rows, so history accumulates across loads.
+    """
+    return _refresh_rollup(
+        SUPPLIER_ROLLUP_TABLE_NAME,
+        f"""
+        CREATE TABLE IF NOT EXISTS {SUPPLIER_ROLLUP_TABLE_NAME} (
+            company_id VARCHAR(64) NOT NULL,
+            month DATE NOT NULL,
+            supplier_key VARCHAR(255) NOT NULL,
+            currency VARCHAR(16) NOT NULL,
+            supplier_name VARCHAR(255),
+            po_lines INT NOT NULL,
+            total_amount_idr DOUBLE NOT NULL,
+            total_original_amount DOUBLE NOT NULL,
+            PRIMARY KEY (company_id, month, supplier_key, currency),
+            KEY idx_sbsm_month (month)
+        )
+        """,
+        _supplier_rollup_sql, company_id, from_month, to_month)
+
+
+def refresh_folder_spend_rollup(company_id: Optional[str] = None,
+                                from_month: Optional[date] = None, to_month: Optional[date] = None) -> bool:
+    """
+    Rebuilds spend_by_folder_month from the current folder classification,
+    for the given window or every month in purchase_orders. Run after each
+    ETL load (its window) and each folder generation (every month).
+    """
+    return _refresh_rollup(
+        FOLDER_ROLLUP_TABLE_NAME,
+        f"""
+        CREATE TABLE IF NOT EXISTS {FOLDER_ROLLUP_TABLE_NAME} (
+            company_id VARCHAR(64) NOT NULL,
+            month DATE NOT NULL,
+            l1_folder VARCHAR(255) NOT NULL,
+            l2_folder VARCHAR(255) NOT NULL,
+            po_lines INT NOT NULL,
+            total_amount_idr DOUBLE NOT NULL,
+            PRIMARY KEY (company_id, month, l1_folder, l2_folder),
+            KEY idx_sbfm_month (month)
+        )
+        """,
+        _folder_rollup_sql, company_id, from_month, to_month)
+
+
+def _rollup_filters(company_id: Optional[str], from_month: Optional[date], to_month: Optional[date]) -> Tuple[str, list]:
+    conditions, params = [], []
+    if company_id is not None:
+        conditions.append("company_id = %s")
+        params.append(company_id)
+    if from_month is not None:
+        conditions.append("month >= %s")
+        params.append(from_month.replace(day=1))
+    if to_month is not None:
+        conditions.append("month <= %s")
+        params.append(to_month.replace(day=1))
+    return (" WHERE " + " AND ".join(conditions)) if conditions else "", params
+
+
+def _read_rollup(query_name: str, query: str, params: list) -> List[Dict[str, Any]]:
+    """Runs a rollup read; a rollup that was never built reads as empty."""
+    try:
+        with mysql_connection() as conn:
+            cursor = conn.cursor(dictionary=True)
+            try:
+                with track_query(query_name) as query_record:
+                    cursor.execute(query, tuple(params))
+                    rows = cursor.fetchall()
+                    query_record.rows = len(rows)
+                return rows
+            finally:
+                cursor.close()
+    except mysql.connector.Error as err:
+        if err.errno == ER_NO_SUCH_TABLE:
+            return []
+        raise
+
+
+def get_spend_trend(company_id: Optional[str] = None, from_month: Optional[date] = None,
+                    to_month: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Monthly IDR spend and PO line count, oldest month first."""
+    where_sql, params = _rollup_filters(company_id, from_month, to_month)
+    return _read_rollup(
+        "spend_trend", f"""
+        SELECT month, SUM(po_lines) AS po_lines, SUM(total_amount_idr) AS total_amount_idr
+        FROM {SUPPLIER_ROLLUP_TABLE_NAME}{where_sql}
+        GROUP BY month ORDER BY month
+        """, params)
+
+
+def get_top_suppliers(company_id: Optional[str] = None, from_month: Optional[date] = None,
+                      to_month: Optional[date] = None, limit: int = 10) -> List[Dict[str, Any]]:
+    """Suppliers with the highest IDR spend in the period."""
+    where_sql, params = _rollup_filters(company_id, from_month, to_month)
+    return _read_rollup(
+        "top_suppliers", f"""
+        SELECT supplier_key AS supplier_code, MAX(supplier_name) AS supplier_name,
+               SUM(po_lines) AS po_lines, SUM(total_amount_idr) AS total_amount_idr
+        FROM {SUPPLIER_ROLLUP_TABLE_NAME}{where_sql}
+        GROUP BY supplier_key ORDER BY total_amount_idr DESC LIMIT %s
+        """, params + [limit])
+
+
+def get_top_categories(level: int = 1, company_id: Optional[str] = None, from_month: Optional[date] = None,
+                       to_month: Optional[date] = None, limit: int = 10) -> List[Dict[str, Any]]:
+    """L1 (level=1) or L2 (level=2) folders with the highest IDR spend in the period."""
+    where_sql, params = _rollup_filters(company_id, from_month, to_month)
+    folder_columns = "l1_folder" if level == 1 else "l1_folder, l2_folder"
+    return _read_rollup(
+        "top_categories", f"""
+        SELECT {folder_columns}, SUM(po_lines) AS po_lines, SUM(total_amount_idr) AS total_amount_idr
+        FROM {FOLDER_ROLLUP_TABLE_NAME}{where_sql}
+        GROUP BY {folder_columns} ORDER BY total_amount_idr DESC LIMIT %s
+        """, params + [limit])
+
+
+def get_currency_mix(company_id: Optional[str] = None, from_month: Optional[date] = None,
+                     to_month: Optional[date] = None) -> List[Dict[str, Any]]:
+    """Spend per purchase currency, in IDR and in the original currency."""
+    where_sql, params = _rollup_filters(company_id, from_month, to_month)
+    return _read_rollup(
+        "currency_mix", f"""
+        SELECT currency, SUM(po_lines) AS po_lines, SUM(total_amount_idr) AS total_amount_idr,
+               SUM(total_original_amount) AS total_original_amount
+        FROM {SUPPLIER_ROLLUP_TABLE_NAME}{where_sql}
+        GROUP BY currency ORDER BY total_amount_idr DESC
+        """, params)
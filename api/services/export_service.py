@@ -0,0 +1,118 @@
+import os
+import re
+import threading
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Tuple
+
+import anyio
+
+from ..core.concurrency import run_db
+from ..core.export_formats import CsvExportWriter, XlsxExportWriter, make_export_writer
+from ..db.database import MYSQL_POOL_SIZE
+
+# Rows fetched from MySQL and encoded per step of an export stream
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "1000"))
+# Exports streaming at once in one worker. Each holds a pooled connection for
+# the whole download, so this stays well below MYSQL_POOL_SIZE and slow
+# downloads cannot starve the other endpoints; beyond it exports get a 503.
+EXPORT_MAX_CONCURRENT = int(
+    os.getenv("EXPORT_MAX_CONCURRENT", str(max(1, MYSQL_POOL_SIZE // 4))))
+
+
+class ExportsBusyError(Exception):
+    """Raised when EXPORT_MAX_CONCURRENT exports are already streaming."""
+
+
+_export_slots_lock = threading.Lock()
+_exports_running = 0
+
+
+def _acquire_export_slot() -> None:
+    global _exports_running
+    with _export_slots_lock:
+        if _exports_running >= EXPORT_MAX_CONCURRENT:
+            raise ExportsBusyError(f"{_exports_running} exports already running, please retry shortly.")
+        _exports_running += 1
+
+
+def _release_export_slot() -> None:
+    global _exports_running
+    with _export_slots_lock:
+        _exports_running -= 1
+
+
+def export_filename(title: str, extension: str) -> str:
+    """e.g. ("Kertas Duplex", "csv") -> "Kertas_Duplex_20250101-0930.csv"."""
+    safe_title = re.sub(r"[^A-Za-z0-9_-]+", "_", title).strip("_") or "export"
+    return f"{safe_title}_{datetime.now().strftime('%Y%m%d-%H%M')}.{extension}"
+
+
+def media_type_for(export_format: str) -> str:
+    return XlsxExportWriter.media_type if export_format == "xlsx" else CsvExportWriter.media_type
+
+
+def _next_chunk(cursor, writer) -> Tuple[bytes, bool]:
+    """Fetches and encodes one batch. Returns (data, whether rows remain)."""
+    rows = cursor.fetchmany(EXPORT_BATCH_SIZE)
+    if not rows:
+        return writer.finish(), False
+    return writer.write_rows(rows), True
+
+
+def _close_export(conn, cursor, completed: bool) -> None:
+    if not completed:
+        # Closing a half-read unbuffered cursor would read the rest of the
+        # result first; dropping the connection ends the query instead.
+        conn.discard()
+        return
+    try:
+        cursor.close()
+    finally:
+        conn.close()
+
+
+async def open_export(opener: Callable[..., Any], **kwargs) -> Any:
+    """
+    Takes an export slot and runs opener (e.g. po_service.open_po_export_cursor)
+    in the database thread pool. The slot is handed on to stream_export, or
+    freed here if the opener fails or finds nothing (returns None).
+    Raises ExportsBusyError when every slot is taken.
+    """
+    _acquire_export_slot()
+    try:
+        opened = await run_db(opener, **kwargs)
+    except BaseException:
+        _release_export_slot()
+        raise
+    if opened is None:
+        _release_export_slot()
+    return opened
+
+
+async def stream_export(conn, cursor, column_names, export_format: str, title: str = "Export") -> AsyncIterator[bytes]:
+    """
+    Streams the rows of an export cursor opened by open_export() as CSV or
+    XLSX bytes, and frees its export slot at the end.
+    The header goes out immediately; then one batch of EXPORT_BATCH_SIZE rows
+    is fetched and encoded at a time in the database thread pool, so memory
+    stays flat however many rows there are. The connection is released when
+    the stream ends or the client goes away.
+    """
+    writer = make_export_writer(export_format, column_names, title=title)
+    completed = False
+    try:
+        yield writer.begin()
+        more = True
+        while more:
+            chunk, more = await run_db(_next_chunk, cursor, writer)
+            if chunk:
+                yield chunk
+        completed = True
+    finally:
+        # Also runs when the download is cancelled; shield the cleanup from it
+        with anyio.CancelScope(shield=True):
+            try:
+                await run_db(_close_export, conn, cursor, completed)
+            finally:
+                _release_export_slot()
+
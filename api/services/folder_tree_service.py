@@ -0,0 +1,287 @@
+import logging
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import mysql.connector
+
+from ..db.database import get_mysql_connection
+from ..core.metrics import track_query
+from .classification_service import CLASSIFICATIONS_TABLE_NAME, DEFINITIONS_TABLE_NAME
+
+logger = logging.getLogger(__name__)
+
+# Folder generation appends a row here when it finishes, so API workers can
+# notice a new hierarchy with a single primary-key read.
+VERSIONS_TABLE_NAME = "folder_generation_versions"
+
+L1_LAYER_NAME_DB = "L1_Parsed_Folders"
+L2_LAYER_NAME_DB = "L2_Parsed_Folders"
+
+# MySQL error raised when the folder tables have not been created yet
+ER_NO_SUCH_TABLE = 1146
+
+
+@dataclass(frozen=True)
+class FolderNode:
+    """One row of layer_definitions, as served by /classification/layers."""
+    id: int
+    name: str
+    level: int
+    parent_id: Optional[int]
+    item_count: int
+    layer_name_db: str
+    cluster_label_id: str
+
+    def as_layer_dict(self) -> Dict[str, Any]:
+        # Same shape as classification_service.fetch_distinct_layers_from_db
+        return {
+            "id": str(self.id),
+            "name": self.name,
+            "item_count": self.item_count,
+            "level": self.level,
+            "parent_id": str(self.parent_id) if self.parent_id is not None else None,
+        }
+
+
+@dataclass(frozen=True)
+class FolderTreeSnapshot:
+    """
+    Immutable view of the L1/L2 folder hierarchy.
+    A snapshot is never modified after it is built; a new generation produces
+    a new snapshot which replaces the old one in a single assignment.
+    """
+    version: int
+    loaded_at: datetime
+    nodes_by_id: Mapping[int, FolderNode]
+    l1_nodes: Tuple[FolderNode, ...]
+    children_by_parent_id: Mapping[int, Tuple[FolderNode, ...]]
+
+    def get_node(self, layer_definition_pk: int) -> Optional[FolderNode]:
+        return self.nodes_by_id.get(layer_definition_pk)
+
+    def get_layers(self, layer_level_to_fetch: int, parent_layer_definition_pk: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Mirrors fetch_distinct_layers_from_db: L1 nodes when there is no parent,
+        the L2 children of an L1 node for level 2, and an empty result otherwise.
+        """
+        if parent_layer_definition_pk is None:
+            return {"parent_name": None, "layers": [node.as_layer_dict() for node in self.l1_nodes]}
+        if layer_level_to_fetch != 2:
+            return {"parent_name": None, "layers": []}
+
+        parent = self.nodes_by_id.get(parent_layer_definition_pk)
+        children = self.children_by_parent_id.get(parent_layer_definition_pk, ())
+        return {
+            "parent_name": parent.name if parent else None,
+            "layers": [node.as_layer_dict() for node in children],
+        }
+
+
+_snapshot: Optional[FolderTreeSnapshot] = None
+_reload_lock = threading.Lock()
+
+
+def get_snapshot() -> Optional[FolderTreeSnapshot]:
+    """Returns the current snapshot, or None if none has been loaded yet."""
+    return _snapshot
+
+
+def publish_snapshot(snapshot: FolderTreeSnapshot) -> None:
+    """Atomically replaces the served snapshot."""
+    global _snapshot
+    _snapshot = snapshot
+    logger.info("Folder tree snapshot v%d published (%d nodes).",
+                snapshot.version, len(snapshot.nodes_by_id))
+
+
+def build_snapshot(definition_rows: List[Dict[str, Any]], item_count_rows: List[Dict[str, Any]], version: int) -> FolderTreeSnapshot:
+    """Builds a snapshot from raw layer_definitions and L2 item count rows."""
+    item_counts = {row["cluster_label"]: int(row["item_count"])
+                   for row in item_count_rows}
+
+    l2_rows = [row for row in definition_rows
+               if row["layer_name_db"] == L2_LAYER_NAME_DB and row["parent_layer_id"] is not None]
+    l2_child_counts: Dict[int, int] = {}
+    for row in l2_rows:
+        l2_child_counts[row["parent_layer_id"]] = l2_child_counts.get(
+            row["parent_layer_id"], 0) + 1
+
+    nodes_by_id: Dict[int, FolderNode] = {}
+    l1_nodes: List[FolderNode] = []
+    children: Dict[int, List[FolderNode]] = {}
+
+    for row in definition_rows:
+        if row["layer_name_db"] == L1_LAYER_NAME_DB and row["parent_layer_id"] is None:
+            # For L1, item_count is the number of L2 children
+            node = FolderNode(
+                id=int(row["id"]),
+                name=str(row["descriptive_name"]),
+                level=1,
+                parent_id=None,
+                item_count=l2_child_counts.get(row["id"], 0),
+                layer_name_db=row["layer_name_db"],
+                cluster_label_id=str(row["cluster_label_id"]),
+            )
+            l1_nodes.append(node)
+        elif row["layer_name_db"] == L2_LAYER_NAME_DB and row["parent_layer_id"] is not None:
+            # For L2, item_count is the number of distinct PO items in the folder
+            node = FolderNode(
+                id=int(row["id"]),
+                name=str(row["descriptive_name"]),
+                level=2,
+                parent_id=int(row["parent_layer_id"]),
+                item_count=item_counts.get(row["cluster_label_id"], 0),
+                layer_name_db=row["layer_name_db"],
+                cluster_label_id=str(row["cluster_label_id"]),
+            )
+            children.setdefault(node.parent_id, []).append(node)
+        else:
+            continue
+        nodes_by_id[node.id] = node
+
+    l1_nodes.sort(key=lambda node: node.name)
+    for nodes in children.values():
+        nodes.sort(key=lambda node: node.name)
+
+    return FolderTreeSnapshot(
+        version=version,
+        loaded_at=datetime.now(),
+        nodes_by_id=MappingProxyType(nodes_by_id),
+        l1_nodes=tuple(l1_nodes),
+        children_by_parent_id=MappingProxyType(
+            {parent_id: tuple(nodes) for parent_id, nodes in children.items()}),
+    )
+
+
+def _fetch_published_version(cursor) -> int:
+    try:
+        cursor.execute(f"SELECT MAX(id) AS version FROM {VERSIONS_TABLE_NAME}")
+        row = cursor.fetchone()
+        return int(row["version"]) if row and row["version"] is not None else 0
+    except Exception as e:
+        # The table only exists once a generation has been published.
+        logger.debug("Could not read %s: %s", VERSIONS_TABLE_NAME, e)
+        return 0
+
+
+def get_published_version() -> Optional[int]:
+    """Reads the latest published generation version, or None if the DB is unreachable."""
+    conn = get_mysql_connection()
+    if not conn:
+        return None
+    cursor = conn.cursor(dictionary=True)
+    try:
+        return _fetch_published_version(cursor)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def load_snapshot_from_db() -> Optional[FolderTreeSnapshot]:
+    """Loads the complete folder hierarchy and publishes it."""
+    with _reload_lock:
+        conn = get_mysql_connection()
+        if not conn:
+            logger.error("Folder tree: DB connection failed, keeping current snapshot.")
+            return _snapshot
+
+        cursor = conn.cursor(dictionary=True)
+        definition_rows, item_count_rows = [], []
+        try:
+            version = _fetch_published_version(cursor)
+            with track_query("folder_tree_definitions") as query_record:
+                cursor.execute(
+                    f"""
+                    SELECT id, layer_name_db, cluster_label_id, descriptive_name, parent_layer_id
+                    FROM {DEFINITIONS_TABLE_NAME}
+                    WHERE layer_name_db IN (%s, %s)
+                    """,
+                    (L1_LAYER_NAME_DB, L2_LAYER_NAME_DB)
+                )
+                definition_rows = cursor.fetchall()
+                query_record.rows = len(definition_rows)
+            with track_query("folder_tree_item_counts") as query_record:
+                cursor.execute(
+                    f"""
+                    SELECT cluster_label, COUNT(DISTINCT item_po_id) AS item_count
+                    FROM {CLASSIFICATIONS_TABLE_NAME}
+                    WHERE layer_name = %s
+                    GROUP BY cluster_label
+                    """,
+                    (L2_LAYER_NAME_DB,)
+                )
+                item_count_rows = cursor.fetchall()
+                query_record.rows = len(item_count_rows)
+        except mysql.connector.Error as err:
+            if err.errno != ER_NO_SUCH_TABLE:
+                logger.error("Folder tree: Error loading hierarchy: %s", err)
+                return _snapshot
+            # No folder generation has run yet: publish what exists (no folders)
+            logger.info("Folder tree: %s, publishing an empty hierarchy.", err.msg)
+        except Exception as e:
+            logger.error("Folder tree: Error loading hierarchy: %s", e)
+            return _snapshot
+        finally:
+            cursor.close()
+            conn.close()
+
+        snapshot = build_snapshot(definition_rows, item_count_rows, version)
+        publish_snapshot(snapshot)
+        return snapshot
+
+
+def refresh_if_stale() -> Optional[FolderTreeSnapshot]:
+    """
+    Reloads the hierarchy if a newer generation has been published since
+    the current snapshot was built (or if nothing is loaded yet).
+    """
+    current = _snapshot
+    if current is None:
+        return load_snapshot_from_db()
+
+    published_version = get_published_version()
+    if published_version is None or published_version == current.version:
+        return current
+    logger.info("Folder tree: generation v%d published, reloading (was v%d).",
+                published_version, current.version)
+    return load_snapshot_from_db()
+
+
+def resolve_l2_cluster_labels(layer_definition_pk: int) -> List[str]:
+    """
+    Returns the item_classifications.cluster_label values of the L2 folders
+    under a folder: the folder itself for an L2 node, all its children for L1.
+    Uses the snapshot when loaded, otherwise asks MySQL.
+    """
+    snapshot = _snapshot
+    if snapshot is not None:
+        node = snapshot.get_node(layer_definition_pk)
+        if node is None:
+            return []
+        if node.level == 2:
+            return [node.cluster_label_id]
+        return [child.cluster_label_id for child in snapshot.children_by_parent_id.get(node.id, ())]
+
+    conn = get_mysql_connection()
+    if not conn:
+        return []
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"""
+            SELECT cluster_label_id FROM {DEFINITIONS_TABLE_NAME}
+            WHERE layer_name_db = %s AND (id = %s OR parent_layer_id = %s)
+            """,
+            (L2_LAYER_NAME_DB, layer_definition_pk, layer_definition_pk)
+        )
+        return [row[0] for row in cursor.fetchall()]
+    except Exception as e:
+        logger.error(
+            "Folder tree: Error resolving folders under PK %s: %s", layer_definition_pk, e)
+        return []
+    finally:
+        cursor.close()
+        conn.close()
@@ -0,0 +1,608 @@
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import queue
+import socket
+import subprocess
+import sys
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import mysql.connector
+
+from ..core.concurrency import run_db
+from ..db.database import DatabaseUnavailableError, get_mysql_connection, mysql_connection
+from ..schemas.job_schemas import Job as JobSchema
+
+logger = logging.getLogger(__name__)
+
+# ETL and folder generation run as jobs recorded in the pipeline_jobs table.
+# Submitting one starts a job runner process (python -m api.job_runner <id>)
+# in its own session: it waits for its turn, runs the pipeline in a child
+# process and writes status, stage and rows processed to the job's row. Any
+# API worker can therefore report or cancel any job, and restarting or
+# deploying the API does not stop a running ETL.
+JOB_KIND_ETL = "etl"
+JOB_KIND_FOLDER_GENERATION = "folder_generation"
+JOB_KINDS = (JOB_KIND_ETL, JOB_KIND_FOLDER_GENERATION)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED, JOB_CANCELLED)
+
+JOBS_TABLE_NAME = "pipeline_jobs"
+# MySQL error raised when no job was ever submitted (the table does not exist)
+ER_NO_SUCH_TABLE = 1146
+
+# Finished jobs kept for the status endpoints
+JOB_HISTORY = int(os.getenv("JOB_HISTORY", "50"))
+# Seconds a job waits for a pipeline running elsewhere to finish
+PIPELINE_LOCK_TIMEOUT = int(os.getenv("PIPELINE_LOCK_TIMEOUT", "3600"))
+# MySQL named lock held for the whole run of either pipeline, so folder
+# generation never reads a purchase_orders table the ETL is still loading.
+PIPELINE_LOCK_NAME = "po_pipeline"
+# How often a job runner records that it is alive and checks for a cancel
+# request; a queued or running job silent for JOB_STALE_SECONDS is marked failed.
+JOB_HEARTBEAT_SECONDS = int(os.getenv("JOB_HEARTBEAT_SECONDS", "2"))
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "60"))
+# Output of the job runner processes (they outlive the worker's stdout)
+JOB_LOG_FILE = os.getenv("JOB_LOG_FILE", "job_runner.log")
+# How often an event stream reads its job for changes, and the longest
+# silence before it sends a keep-alive comment (proxies close idle streams).
+JOB_EVENTS_POLL_SECONDS = float(os.getenv("JOB_EVENTS_POLL_SECONDS", "1"))
+JOB_EVENTS_KEEPALIVE_SECONDS = 15.0
+
+# Directory holding the api package, for starting `python -m api.job_runner`
+_PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# "spawn" gives the pipeline a fresh interpreter: no copied connections,
+# threads or locks from the job runner.
+_mp_context = multiprocessing.get_context("spawn")
+
+_JOB_COLUMNS = ("id, kind, params, status, created_at, started_at, finished_at, stage, stages, "
+                "rows_done, rows_total, rows_per_second, eta_seconds, error, revision")
+# True for an unfinished job whose runner stopped reporting
+_STALE_SQL = f"(status IN ('{JOB_QUEUED}', '{JOB_RUNNING}') AND heartbeat_at < NOW() - INTERVAL %s SECOND)"
+
+
+def _create_jobs_table(cursor) -> None:
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {JOBS_TABLE_NAME} (
+            seq BIGINT AUTO_INCREMENT PRIMARY KEY,
+            id VARCHAR(32) NOT NULL,
+            kind VARCHAR(32) NOT NULL,
+            params TEXT NOT NULL,
+            status VARCHAR(16) NOT NULL,
+            created_at DATETIME NOT NULL,
+            started_at DATETIME NULL,
+            finished_at DATETIME NULL,
+            stage VARCHAR(64) NULL,
+            stages TEXT NULL,
+            rows_done BIGINT NULL,
+            rows_total BIGINT NULL,
+            rows_per_second DOUBLE NULL,
+            eta_seconds DOUBLE NULL,
+            error TEXT NULL,
+            revision INT NOT NULL DEFAULT 0,
+            cancel_requested TINYINT(1) NOT NULL DEFAULT 0,
+            heartbeat_at DATETIME NOT NULL,
+            runner VARCHAR(128) NULL,
+            UNIQUE KEY uq_pj_id (id),
+            KEY idx_pj_status_seq (status, seq)
+        )
+    """)
+
+
+def _row_to_job(row: Dict[str, Any]) -> Dict[str, Any]:
+    job = dict(row)
+    job.pop("stale", None)
+    job["params"] = json.loads(job["params"]) if job["params"] else {}
+    job["stages"] = json.loads(job["stages"]) if job["stages"] else []
+    return job
+
+
+def _fail_stale_jobs(cursor) -> None:
+    """Marks failed the jobs whose runner stopped reporting (killed, host restarted...)."""
+    cursor.execute(
+        f"""
+        UPDATE {JOBS_TABLE_NAME}
+        SET status = %s, error = %s, finished_at = NOW(), revision = revision + 1
+        WHERE {_STALE_SQL}
+        """,
+        (JOB_FAILED, f"The job runner stopped reporting for over {JOB_STALE_SECONDS}s; see {JOB_LOG_FILE}.",
+         JOB_STALE_SECONDS))
+
+
+# --- Pipeline process ---
+
+def _run_pipeline(kind: str, params: Dict[str, Any]) -> bool:
+    # Imported here so only the pipeline process loads pandas and the pipelines
+    if kind == JOB_KIND_ETL:
+        from etl.etl_script import main_etl_process
+        return main_etl_process(
+            params["company_id"],
+            str(params["from_month"]),  # etl_script expects string for month/year
+            str(params["from_year"]),
+            str(params["to_month"]),
+            str(params["to_year"]),
+            params["from_item_code"],
+            params["to_item_code"]
+        )
+    from ml.training_pipeline import run_folder_generation_pipeline
+    return run_folder_generation_pipeline()
+
+
+def _pipeline_process_main(kind: str, params: Dict[str, Any], events) -> None:
+    """Entry point of the pipeline process. Reports back through `events` as (event, payload) tuples."""
+    from ..core.metrics import add_stage_listener
+    from ..core.progress import add_progress_listener
+
+    add_stage_listener(lambda pipeline, stage, seconds, failed: events.put(
+        ("stage", {"pipeline": pipeline, "stage": stage, "seconds": seconds, "failed": failed})))
+    add_progress_listener(lambda pipeline, stage, rows_done, rows_total: events.put(
+        ("progress", {"stage": stage, "rows_done": rows_done, "rows_total": rows_total})))
+    try:
+        success = bool(_run_pipeline(kind, params))
+    except Exception as e:
+        traceback.print_exc()
+        events.put(("finished", {"success": False, "error": f"{type(e).__name__}: {e}"}))
+        return
+    events.put(("finished", {
+        "success": success,
+        "error": None if success else "The pipeline stopped early; see the job runner log."}))
+
+
+# --- Job runner process ---
+
+@dataclass
+class JobProgress:
+    """Stage and row progress of the running job, as reported by the pipeline process."""
+    stage: Optional[str] = None
+    stages: List[Dict[str, Any]] = field(default_factory=list)
+    # Rows the current stage has handled, out of rows_total when it is known
+    rows_done: Optional[int] = None
+    rows_total: Optional[int] = None
+    stage_started: Optional[float] = None
+    stage_seconds: Optional[float] = None  # Set once the current stage finished
+
+    def rate(self):
+        """(rows per second, seconds remaining) of the current stage, where known."""
+        if not self.rows_done or self.stage_started is None:
+            return None, None
+        elapsed = self.stage_seconds if self.stage_seconds is not None else time.monotonic() - self.stage_started
+        if elapsed <= 0:
+            return None, None
+        rows_per_second = self.rows_done / elapsed
+        if self.rows_total is None or self.stage_seconds is not None:
+            return rows_per_second, None
+        return rows_per_second, max(0.0, (self.rows_total - self.rows_done) / rows_per_second)
+
+    def apply(self, event: str, payload: Dict[str, Any]) -> None:
+        if event == "stage":
+            self.stage = payload["stage"]
+            self.stages.append({"stage": payload["stage"],
+                                "seconds": round(payload["seconds"], 3),
+                                "failed": payload["failed"]})
+            if self.stage_started is not None:
+                self.stage_seconds = time.monotonic() - self.stage_started
+        elif payload["rows_done"] is None:
+            # A new stage began
+            self.stage = payload["stage"]
+            self.rows_done = self.rows_total = None
+            self.stage_started = time.monotonic()
+            self.stage_seconds = None
+        else:
+            self.stage = payload["stage"]
+            self.rows_done = payload["rows_done"]
+            self.rows_total = payload["rows_total"]
+
+
+class _JobRecord:
+    """The job runner's handle on its pipeline_jobs row, on a connection of its own."""
+
+    def __init__(self, conn, job_id: str):
+        self.conn = conn
+        self.cursor = conn.cursor(dictionary=True)
+        self.job_id = job_id
+
+    def _write(self, sql: str, params: tuple) -> int:
+        self.cursor.execute(sql, params)
+        self.conn.commit()
+        return self.cursor.rowcount
+
+    def read(self) -> Optional[Dict[str, Any]]:
+        self.cursor.execute(
+            f"SELECT kind, params, status, cancel_requested FROM {JOBS_TABLE_NAME} WHERE id = %s",
+            (self.job_id,))
+        row = self.cursor.fetchone()
+        self.conn.commit()  # Ends the read view, so the next read sees other workers' changes
+        return row
+
+    def heartbeat(self) -> Optional[Dict[str, Any]]:
+        """Records that the runner is alive and returns the row's status and cancel flag."""
+        self._write(f"UPDATE {JOBS_TABLE_NAME} SET heartbeat_at = NOW() WHERE id = %s", (self.job_id,))
+        return self.read()
+
+    def set_stage(self, stage: str) -> None:
+        self._write(
+            f"UPDATE {JOBS_TABLE_NAME} SET stage = %s, heartbeat_at = NOW(), revision = revision + 1 WHERE id = %s",
+            (stage, self.job_id))
+
+    def claim(self) -> bool:
+        """queued -> running; False if the job was cancelled meanwhile."""
+        return self._write(
+            f"""
+            UPDATE {JOBS_TABLE_NAME}
+            SET status = %s, started_at = NOW(), stage = 'started', heartbeat_at = NOW(), revision = revision + 1
+            WHERE id = %s AND status = %s AND cancel_requested = 0
+            """,
+            (JOB_RUNNING, self.job_id, JOB_QUEUED)) == 1
+
+    def save_progress(self, progress: JobProgress) -> None:
+        rows_per_second, eta_seconds = progress.rate()
+        self._write(
+            f"""
+            UPDATE {JOBS_TABLE_NAME}
+            SET stage = %s, stages = %s, rows_done = %s, rows_total = %s, rows_per_second = %s,
+                eta_seconds = %s, heartbeat_at = NOW(), revision = revision + 1
+            WHERE id = %s
+            """,
+            (progress.stage, json.dumps(progress.stages), progress.rows_done, progress.rows_total,
+             round(rows_per_second, 1) if rows_per_second is not None else None,
+             round(eta_seconds, 1) if eta_seconds is not None else None, self.job_id))
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        self._write(
+            f"""
+            UPDATE {JOBS_TABLE_NAME}
+            SET status = %s, error = %s, finished_at = NOW(), eta_seconds = NULL, revision = revision + 1
+            WHERE id = %s AND status NOT IN (%s, %s, %s)
+            """,
+            (status, error, self.job_id, *FINISHED_STATUSES))
+        if error:
+            logger.info("Job %s %s: %s", self.job_id, status, error)
+        else:
+            logger.info("Job %s %s.", self.job_id, status)
+
+    def is_first_in_line(self) -> bool:
+        """True when no job submitted earlier is still queued (jobs start in submission order)."""
+        self.cursor.execute(
+            f"""
+            SELECT COUNT(*) AS earlier FROM {JOBS_TABLE_NAME}
+            WHERE status = %s AND seq < (SELECT seq FROM (SELECT seq FROM {JOBS_TABLE_NAME} WHERE id = %s) own)
+            """,
+            (JOB_QUEUED, self.job_id))
+        earlier = self.cursor.fetchone()["earlier"]
+        self.conn.commit()
+        return earlier == 0
+
+    def fail_stale_jobs(self) -> None:
+        _fail_stale_jobs(self.cursor)
+        self.conn.commit()
+
+    def close(self) -> None:
+        self.cursor.close()
+        self.conn.close()
+
+
+def _wait_for_turn(record: _JobRecord, lock_cursor) -> Optional[str]:
+    """
+    Waits until every earlier job has started and the pipeline lock is free,
+    then takes the lock. Returns None once it is held, or why the job must not run:
+    JOB_CANCELLED, or an error message.
+    """
+    record.set_stage("waiting_for_lock")
+    deadline = time.monotonic() + PIPELINE_LOCK_TIMEOUT
+    while True:
+        row = record.heartbeat()
+        if row is None or row["status"] != JOB_QUEUED or row["cancel_requested"]:
+            return JOB_CANCELLED
+        record.fail_stale_jobs()
+        if record.is_first_in_line():
+            lock_cursor.execute("SELECT GET_LOCK(%s, %s)", (PIPELINE_LOCK_NAME, JOB_HEARTBEAT_SECONDS))
+            if lock_cursor.fetchone()[0] == 1:
+                return None
+        else:
+            time.sleep(JOB_HEARTBEAT_SECONDS)
+        if time.monotonic() >= deadline:
+            return f"Another pipeline still held the '{PIPELINE_LOCK_NAME}' lock after {PIPELINE_LOCK_TIMEOUT}s."
+
+
+def _follow_pipeline(record: _JobRecord, kind: str, params: Dict[str, Any]) -> None:
+    """Runs the pipeline process, recording its progress until it exits; stops it on a cancel request."""
+    events = _mp_context.Queue()
+    # daemon: the pipeline stops with its runner instead of running on unrecorded
+    process = _mp_context.Process(
+        target=_pipeline_process_main, args=(kind, params, events),
+        name=f"job-{record.job_id}-{kind}", daemon=True)
+    progress = JobProgress()
+    outcome: Dict[str, Any] = {}
+    cancelled = False
+    try:
+        process.start()
+        logger.info("Job %s (%s) started in process %s.", record.job_id, kind, process.pid)
+        next_heartbeat = time.monotonic() + JOB_HEARTBEAT_SECONDS
+        while process.is_alive() or not events.empty():
+            try:
+                event, payload = events.get(timeout=0.5)
+            except queue.Empty:
+                event = None
+            if event == "finished":
+                outcome.update(payload)
+            elif event is not None:
+                progress.apply(event, payload)
+                record.save_progress(progress)
+            if time.monotonic() >= next_heartbeat:
+                next_heartbeat = time.monotonic() + JOB_HEARTBEAT_SECONDS
+                row = record.heartbeat()
+                if not cancelled and (row is None or row["cancel_requested"]):
+                    cancelled = True
+                    logger.info("Job %s: cancel requested, stopping process %s.", record.job_id, process.pid)
+                    process.terminate()
+        process.join()
+    except Exception as e:
+        logger.error("Job %s: pipeline process failed: %s", record.job_id, e)
+        outcome = {"success": False, "error": str(e)}
+        if process.is_alive():
+            process.terminate()
+    finally:
+        events.close()
+
+    if cancelled:
+        record.finish(JOB_CANCELLED)
+    elif outcome.get("success"):
+        record.finish(JOB_SUCCEEDED)
+    else:
+        record.finish(JOB_FAILED, outcome.get(
+            "error") or f"The pipeline process exited with code {process.exitcode}.")
+
+
+def run_job(job_id: str) -> int:
+    """
+    Runs one submitted job to its end; the body of `python -m api.job_runner`.
+    Returns the process exit status.
+    """
+    state_conn = get_mysql_connection()
+    lock_conn = get_mysql_connection()
+    if not state_conn or not lock_conn:
+        # The job is marked failed once its heartbeat goes stale
+        logger.error("Job %s: could not connect to MySQL.", job_id)
+        return 1
+    record = _JobRecord(state_conn, job_id)
+    lock_cursor = lock_conn.cursor()
+    holding_lock = False
+    try:
+        row = record.read()
+        if row is None:
+            logger.error("Job %s not found in %s.", job_id, JOBS_TABLE_NAME)
+            return 1
+        if row["status"] != JOB_QUEUED:
+            return 0
+        refusal = _wait_for_turn(record, lock_cursor)
+        holding_lock = refusal is None
+        if refusal == JOB_CANCELLED or (refusal is None and not record.claim()):
+            record.finish(JOB_CANCELLED)
+            return 0
+        if refusal is not None:
+            record.finish(JOB_FAILED, refusal)
+            return 1
+        _follow_pipeline(record, row["kind"], json.loads(row["params"]))
+        return 0
+    except Exception as e:
+        logger.error("Job %s: unexpected runner error: %s", job_id, e)
+        try:
+            record.finish(JOB_FAILED, str(e))
+        except Exception:
+            pass  # Reported as stale instead
+        return 1
+    finally:
+        if holding_lock:
+            try:
+                lock_cursor.execute("SELECT RELEASE_LOCK(%s)", (PIPELINE_LOCK_NAME,))
+                lock_cursor.fetchall()
+            except Exception as e:
+                logger.warning("Could not release the '%s' lock: %s", PIPELINE_LOCK_NAME, e)
+        lock_cursor.close()
+        lock_conn.close()
+        record.close()
+
+
+# --- API worker side ---
+
+def _start_runner(job_id: str) -> None:
+    with open(JOB_LOG_FILE, "ab") as log_file:
+        # Own session: signals sent to the worker's process group (Ctrl+C,
+        # a restart) do not reach the runner.
+        subprocess.Popen(
+            [sys.executable, "-m", "api.job_runner", job_id],
+            cwd=_PROJECT_ROOT, stdin=subprocess.DEVNULL, stdout=log_file, stderr=subprocess.STDOUT,
+            start_new_session=True)
+
+
+def submit_job(kind: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Records a pipeline run and starts its job runner. Jobs run one after
+    another, in submission order across all workers.
+    Raises DatabaseUnavailableError if MySQL cannot be reached.
+    """
+    if kind not in JOB_KINDS:
+        raise ValueError(f"Unknown job kind '{kind}'.")
+    job_id = os.urandom(8).hex()
+    with mysql_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            _create_jobs_table(cursor)
+            cursor.execute(
+                f"""
+                INSERT INTO {JOBS_TABLE_NAME} (id, kind, params, status, created_at, heartbeat_at, runner)
+                VALUES (%s, %s, %s, %s, NOW(), NOW(), %s)
+                """,
+                (job_id, kind, json.dumps(params or {}), JOB_QUEUED, socket.gethostname()[:128]))
+            # Keep the newest JOB_HISTORY finished jobs
+            cursor.execute(
+                f"""
+                SELECT seq FROM {JOBS_TABLE_NAME} WHERE status IN (%s, %s, %s)
+                ORDER BY seq DESC LIMIT 1 OFFSET %s
+                """,
+                (*FINISHED_STATUSES, JOB_HISTORY))
+            oldest_kept = cursor.fetchone()
+            if oldest_kept:
+                cursor.execute(
+                    f"DELETE FROM {JOBS_TABLE_NAME} WHERE status IN (%s, %s, %s) AND seq <= %s",
+                    (*FINISHED_STATUSES, oldest_kept["seq"]))
+            conn.commit()
+        finally:
+            cursor.close()
+
+        try:
+            _start_runner(job_id)
+        except Exception as e:
+            logger.error("Job %s: could not start the job runner: %s", job_id, e)
+            cursor = conn.cursor()
+            try:
+                cursor.execute(
+                    f"""
+                    UPDATE {JOBS_TABLE_NAME} SET status = %s, error = %s, finished_at = NOW(),
+                        revision = revision + 1
+                    WHERE id = %s
+                    """,
+                    (JOB_FAILED, f"Could not start the job runner: {e}", job_id))
+                conn.commit()
+            finally:
+                cursor.close()
+    logger.info("Job %s (%s) queued.", job_id, kind)
+    return get_job(job_id)
+
+
+def get_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """The job as recorded in pipeline_jobs, whichever worker submitted it; None if unknown."""
+    query = f"SELECT {_JOB_COLUMNS}, {_STALE_SQL} AS stale FROM {JOBS_TABLE_NAME} WHERE id = %s"
+    with mysql_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(query, (JOB_STALE_SECONDS, job_id))
+            row = cursor.fetchone()
+            if row and row["stale"]:
+                _fail_stale_jobs(cursor)
+                conn.commit()
+                cursor.execute(query, (JOB_STALE_SECONDS, job_id))
+                row = cursor.fetchone()
+        except mysql.connector.Error as err:
+            if err.errno == ER_NO_SUCH_TABLE:
+                return None
+            raise
+        finally:
+            cursor.close()
+    return _row_to_job(row) if row else None
+
+
+def list_jobs() -> List[Dict[str, Any]]:
+    """The latest jobs of all workers, newest first."""
+    with mysql_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            _fail_stale_jobs(cursor)
+            conn.commit()
+            cursor.execute(
+                f"SELECT {_JOB_COLUMNS} FROM {JOBS_TABLE_NAME} ORDER BY seq DESC LIMIT %s",
+                (JOB_HISTORY,))
+            rows = cursor.fetchall()
+        except mysql.connector.Error as err:
+            if err.errno == ER_NO_SUCH_TABLE:
+                return []
+            raise
+        finally:
+            cursor.close()
+    return [_row_to_job(row) for row in rows]
+
+
+def cancel_job(job_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Cancels a queued job, or asks the runner of a running one to stop its
+    pipeline (within JOB_HEARTBEAT_SECONDS). Works from any worker.
+    Returns the job, or None if it is unknown. Raises ValueError if it already finished.
+    """
+    with mysql_connection() as conn:
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"""
+                UPDATE {JOBS_TABLE_NAME}
+                SET cancel_requested = 1, revision = revision + 1,
+                    status = IF(status = %s, %s, status),
+                    finished_at = IF(status = %s, NOW(), finished_at)
+                WHERE id = %s AND status IN (%s, %s)
+                """,
+                (JOB_QUEUED, JOB_CANCELLED, JOB_CANCELLED, job_id, JOB_QUEUED, JOB_RUNNING))
+            updated = cursor.rowcount
+            conn.commit()
+        except mysql.connector.Error as err:
+            if err.errno == ER_NO_SUCH_TABLE:
+                return None
+            raise
+        finally:
+            cursor.close()
+    job = get_job(job_id)
+    if job is not None and not updated:
+        raise ValueError(f"Job {job_id} already {job['status']}.")
+    return job
+
+
+def _sse_message(event: str, data: str, event_id: Optional[int] = None) -> str:
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {event}", f"data: {data}"]
+    return "\n".join(lines) + "\n\n"
+
+
+def _refresh_after_success(job: Dict[str, Any]) -> None:
+    """Picks up what a finished job wrote on this worker now; the others do on their next poll."""
+    from . import folder_tree_service
+    from ..db.database import refresh_table_columns_if_stale
+
+    if job["kind"] == JOB_KIND_ETL:
+        refresh_table_columns_if_stale()
+    else:
+        folder_tree_service.refresh_if_stale()
+
+
+async def stream_job_events(job_id: str) -> AsyncIterator[str]:
+    """
+    Server-sent events for one job: a "progress" event with the full job
+    status whenever it changes, then a final "end" event once it finished.
+    Reads the job's row every JOB_EVENTS_POLL_SECONDS, so any worker can serve it.
+    """
+    last_revision = None
+    last_sent = time.monotonic()
+    while True:
+        try:
+            job = await run_db(get_job, job_id)
+        except (DatabaseUnavailableError, mysql.connector.Error) as e:
+            # The job itself is not affected; read it again on the next poll
+            logger.warning("Job %s: could not read its status: %s", job_id, e)
+        else:
+            if job is None:
+                yield _sse_message("end", "{}")
+                return
+            if job["status"] in FINISHED_STATUSES:
+                if job["status"] == JOB_SUCCEEDED:
+                    try:
+                        await run_db(_refresh_after_success, job)
+                    except Exception as e:
+                        logger.error("Job %s: refreshing after the run failed: %s", job_id, e)
+                yield _sse_message("end", JobSchema.model_validate(job).model_dump_json(), job["revision"])
+                return
+            if job["revision"] != last_revision:
+                last_revision = job["revision"]
+                last_sent = time.monotonic()
+                yield _sse_message("progress", JobSchema.model_validate(job).model_dump_json(), last_revision)
+        if time.monotonic() - last_sent >= JOB_EVENTS_KEEPALIVE_SECONDS:
+            last_sent = time.monotonic()
+            yield ": keep-alive\n\n"
+        await asyncio.sleep(JOB_EVENTS_POLL_SECONDS)
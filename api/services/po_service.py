@@ -1,99 +1,471 @@
 from ..schemas.po_schemas import PurchaseOrderCreate as PurchaseOrderCreateSchema
 from ..schemas.po_schemas import PurchaseOrderUpdate as PurchaseOrderUpdateSchema
-from typing import List, Optional, Dict, Any
-from ..db.database import get_mysql_connection
+from ..schemas.po_schemas import PurchaseOrderBulkUpdateItem as PurchaseOrderBulkUpdateItemSchema
+import logging
+import re
+from datetime import datetime
+from typing import List, Optional, Dict, Any, Sequence, Tuple
+import mysql.connector
+from ..db.database import DatabaseUnavailableError, get_mysql_connection, get_table_columns, reset_table_columns_cache
+from .classification_service import CLASSIFICATIONS_TABLE_NAME
+from .folder_tree_service import L2_LAYER_NAME_DB
+from . import folder_tree_service
+from ..core.pagination import decode_cursor, keyset_condition_desc, next_cursor_for
+from ..core.metrics import track_query
 # We'll use the schemas defined earlier
 # Renaming to avoid conflict
 from ..schemas.po_schemas import PurchaseOrder as PurchaseOrderSchema
 
+logger = logging.getLogger(__name__)
+
 # Note: The table name and column names must match your actual MySQL table.
 # The `purchase_orders` table is assumed to be created by the ETL script.
 TABLE_NAME = "purchase_orders"
+# Rarely read wide text columns are stored by the ETL in a side table keyed by
+# purchase_orders.id, so list/sort/aggregate scans stay on a narrow row.
+# Keep in sync with DETAIL_COLUMNS in etl_script.py.
+DETAILS_TABLE_NAME = "purchase_order_details"
+DETAIL_COLUMNS = ("ITEM_PURCHASE_TEXT", "PR_Ref_A", "PR_Ref_B", "Supplier_Tlp")
+DETAILS_JOIN = f" LEFT JOIN {DETAILS_TABLE_NAME} d ON d.id = po.id"
+
+
+# Columns covered by the FULLTEXT indexes that the ETL builds: ft_po_search on
+# purchase_orders and ft_pod_search on the side table.
+# MATCH() must name exactly the indexed columns, so keep the lists in sync.
+SEARCH_COLUMNS = ("ITEM", "ITEM_DESC", "PO_No", "Supplier_Name")
+DETAIL_SEARCH_COLUMNS = ("ITEM_PURCHASE_TEXT",)
+# MySQL error raised when no FULLTEXT index matches the MATCH() column list
+ER_FT_MATCHING_KEY_NOT_FOUND = 1191
+# InnoDB does not index words shorter than innodb_ft_min_token_size (default 3)
+FT_MIN_TOKEN_SIZE = 3
+
+
+def build_boolean_search_query(search: str) -> str:
+    """
+    Turns free text into a MySQL BOOLEAN MODE query requiring every word as a prefix,
+    e.g. "duplex 450gsm" -> "+duplex* +450gsm*". Operator characters are dropped.
+    Words shorter than FT_MIN_TOKEN_SIZE are left out: they are not indexed, so
+    requiring them would match nothing ("kertas a4" -> "+kertas*"). The query
+    can be "" for a searchable text such as "PO"; it then only matches PO_No.
+    """
+    words = re.findall(r"\w+", search)
+    return " ".join(f"+{word}*" for word in words if len(word) >= FT_MIN_TOKEN_SIZE)
+
+
+def is_unsearchable(search: Optional[str]) -> bool:
+    """True for a non-blank search without any word character (e.g. "-/"); it matches no rows."""
+    return bool(search and search.strip()) and not re.search(r"\w", search)
+
+
+def po_no_prefix_pattern(search: str) -> str:
+    """LIKE pattern matching PO numbers that start with the search text, e.g. "PO-2301-0045%"."""
+    escaped = search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return escaped + "%"
+
+
+# Sort key of the PO listing: ORDER BY TGL_PO DESC, PO_No DESC, id DESC.
+# The ETL builds a matching composite index so every page is an index range scan.
+PO_LIST_CURSOR_COLUMNS = ("TGL_PO", "PO_No", "id")
+
+# MySQL errors raised when a selected column / joined table does not exist
+ER_BAD_FIELD_ERROR = 1054
+ER_NO_SUCH_TABLE = 1146
+
+def _side_table_columns(cursor) -> List[str]:
+    """
+    DETAIL_COLUMNS stored in the side table. Empty for a purchase_orders table
+    loaded before the split, which still holds them itself.
+    """
+    hot_columns = get_table_columns(cursor, TABLE_NAME)
+    detail_columns = get_table_columns(cursor, DETAILS_TABLE_NAME)
+    return [col for col in DETAIL_COLUMNS if col in detail_columns and col not in hot_columns]
+
+
+def _build_select_list(cursor, columns: Optional[Sequence[str]], required: Sequence[str] = (), include_details: bool = False) -> Tuple[str, bool]:
+    """
+    Without a projection: `po.*`, plus the side table columns if include_details.
+    With one: only the requested (plus required) columns that exist, from
+    whichever table holds them. Missing ones validate to their defaults.
+    Returns (select list, whether DETAILS_JOIN is needed).
+    """
+    side_columns = _side_table_columns(cursor)
+    if columns is None:
+        select = ["po.*"]
+        detail_columns = side_columns if include_details else []
+    else:
+        hot_columns = get_table_columns(cursor, TABLE_NAME)
+        wanted = list(dict.fromkeys([*required, *columns]))
+        select = [f"po.`{col}`" for col in wanted if col in hot_columns]
+        detail_columns = [col for col in wanted if col in side_columns]
+    select.extend(f"d.`{col}`" for col in detail_columns)
+    return ", ".join(select), bool(detail_columns)
+
+
+def month_range(year: int, month: int) -> Tuple[datetime, datetime]:
+    """[start, end) datetimes of a calendar month, for sargable TGL_PO filters."""
+    start = datetime(year, month, 1)
+    end = datetime(year + 1, 1, 1) if month == 12 else datetime(year, month + 1, 1)
+    return start, end
+
+
+def _resolve_date_ranges(cursor, month_filter: Optional[int], year_filter: Optional[int]) -> List[Tuple[datetime, datetime]]:
+    """
+    Turns the month/year filters into TGL_PO ranges so the (TGL_PO, ...) index
+    can be range-scanned instead of evaluating MONTH(TGL_PO) on every row.
+    A month without a year becomes one range per year present in the data.
+    """
+    if year_filter and month_filter:
+        return [month_range(year_filter, month_filter)]
+    if year_filter:
+        return [(datetime(year_filter, 1, 1), datetime(year_filter + 1, 1, 1))]
+
+    # MIN/MAX on the leading index column is resolved from the index alone
+    cursor.execute(
+        f"SELECT MIN(TGL_PO) AS min_tgl_po, MAX(TGL_PO) AS max_tgl_po FROM {TABLE_NAME}")
+    bounds = cursor.fetchone()
+    if not bounds or bounds["min_tgl_po"] is None:
+        return []
+    return [month_range(year, month_filter)
+            for year in range(bounds["min_tgl_po"].year, bounds["max_tgl_po"].year + 1)]
+
+
+def _match_sql(qualified_columns: Sequence[str]) -> str:
+    return f"MATCH({', '.join(qualified_columns)}) AGAINST(%s IN BOOLEAN MODE)"
+
+
+def _build_list_query(
+    skip: int,
+    limit: Optional[int],
+    search: Optional[str],
+    boolean_query: str,
+    cursor_values: Optional[List[Any]],
+    layer_cluster_labels: Optional[List[str]] = None,
+    date_ranges: Optional[List[Tuple[datetime, datetime]]] = None,
+    select_list: str = "po.*",
+    join_details: bool = False,
+    hot_search_columns: Sequence[str] = SEARCH_COLUMNS,
+    side_search_columns: Sequence[str] = DETAIL_SEARCH_COLUMNS,
+    use_fulltext: bool = True
+) -> tuple:
+    """
+    Builds the SELECT for fetch_all_pos_from_db. Returns (query, params).
+    limit=None builds the unpaged query used by exports. An empty (not None)
+    layer_cluster_labels or date_ranges matches no rows.
+    A search matches POs having every word of boolean_query, or whose PO_No
+    starts with the search text; the PO_No matches come first.
+    """
+    searching = bool(search and search.strip()) and not is_unsearchable(search)
+    base_query = f"SELECT {select_list} FROM {TABLE_NAME} po"
+    join_params = []
+    conditions = []
+    where_params = []
+    # id breaks ties between lines of the same PO so the cursor is unambiguous
+    order_by = "po.TGL_PO DESC, po.PO_No DESC, po.id DESC"
+    order_params = []
+
+    if searching and use_fulltext and side_search_columns:
+        # Every word must match in either table, as when all search columns
+        # shared one index: each word is looked up through both FULLTEXT
+        # indexes, and a PO qualifies once all words were found, in whichever
+        # table. It ranks by the sum of its relevance scores. A PO_No prefix
+        # match (idx_po_po_no) is one more branch that qualifies on its own.
+        hot_match = _match_sql(hot_search_columns)
+        side_match = _match_sql(side_search_columns)
+        terms = boolean_query.split()
+        po_no_term = len(terms)
+        branches = []
+        for term_number, term in enumerate(terms):
+            branches.append(
+                f"SELECT id, {term_number} AS term, {hot_match} AS score FROM {TABLE_NAME} WHERE {hot_match}")
+            branches.append(
+                f"SELECT id, {term_number} AS term, {side_match} AS score FROM {DETAILS_TABLE_NAME} WHERE {side_match}")
+            join_params.extend([term] * 4)
+        branches.append(
+            f"SELECT id, {po_no_term} AS term, 0 AS score FROM {TABLE_NAME} WHERE PO_No LIKE %s")
+        join_params.append(po_no_prefix_pattern(search))
+        base_query += (
+            " JOIN (SELECT id, SUM(score) AS score, MAX(term) = %s AS po_no_match FROM ("
+            + " UNION ALL ".join(branches)
+            + ") matches GROUP BY id HAVING COUNT(DISTINCT term) = %s OR MAX(term) = %s) s ON s.id = po.id")
+        join_params = [po_no_term] + join_params + [len(terms), po_no_term]
+        order_by = "s.po_no_match DESC, s.score DESC, " + order_by
+    elif searching and use_fulltext:
+        po_no_sql = "po.PO_No LIKE %s"
+        if boolean_query:
+            match_sql = _match_sql([f"po.{col}" for col in hot_search_columns])
+            conditions.append(f"({match_sql} OR {po_no_sql})")
+            where_params.extend([boolean_query, po_no_prefix_pattern(search)])
+            # Most relevant first; MySQL evaluates the identical MATCH() only once
+            order_by = f"{po_no_sql} DESC, {match_sql} DESC, " + order_by
+            order_params.extend([po_no_prefix_pattern(search), boolean_query])
+        else:
+            conditions.append(po_no_sql)
+            where_params.append(po_no_prefix_pattern(search))
+    elif searching:
+        # Unindexed substring scan, only used while a FULLTEXT index is missing
+        like_columns = [f"po.{col}" for col in hot_search_columns] + \
+            [f"d.{col}" for col in side_search_columns]
+        join_details = join_details or bool(side_search_columns)
+        conditions.append(
+            "(" + " OR ".join(f"{col} LIKE %s" for col in like_columns) + ")")
+        where_params.extend([f"%{search}%"] * len(like_columns))
+
+    if join_details:
+        base_query += DETAILS_JOIN
+
+    if layer_cluster_labels == [] or date_ranges == [] or is_unsearchable(search):
+        conditions.append("FALSE")
+
+    if layer_cluster_labels:
+        # Driven by idx_ic_layer_cluster_po, then a primary-key lookup per PO line
+        placeholders = ", ".join(["%s"] * len(layer_cluster_labels))
+        base_query += (f" JOIN {CLASSIFICATIONS_TABLE_NAME} ic ON ic.item_po_id = po.id"
+                       f" AND ic.layer_name = %s AND ic.cluster_label IN ({placeholders})")
+        join_params.append(L2_LAYER_NAME_DB)
+        join_params.extend(layer_cluster_labels)
+
+    if date_ranges:
+        conditions.append(
+            "(" + " OR ".join(["(po.TGL_PO >= %s AND po.TGL_PO < %s)"] * len(date_ranges)) + ")")
+        for range_start, range_end in date_ranges:
+            where_params.extend([range_start, range_end])
+
+    if cursor_values is not None:
+        keyset_sql, keyset_params = keyset_condition_desc(
+            ["po.TGL_PO", "po.PO_No", "po.id"], cursor_values, nullable_columns=["po.TGL_PO", "po.PO_No"])
+        conditions.append(keyset_sql)
+        where_params.extend(keyset_params)
+
+    if conditions:
+        base_query += " WHERE " + " AND ".join(conditions)
+
+    base_query += f" ORDER BY {order_by}"
+    query_params = join_params + where_params + order_params
+    # One look-ahead row tells us whether there is a next page
+    if limit is None:
+        pass
+    elif cursor_values is not None:
+        base_query += " LIMIT %s"
+        query_params.append(limit + 1)
+    else:
+        base_query += " LIMIT %s OFFSET %s"
+        query_params.extend([limit + 1, skip])
+    return base_query, tuple(query_params)
 
 
 def fetch_all_pos_from_db(
     skip: int = 0,
     limit: int = 10,
     search: Optional[str] = None,
-    # layer_filter: Optional[str] = None, # TODO: Implement layer filtering
-    # month_filter: Optional[int] = None # TODO: Implement month filtering
-) -> List[Dict[str, Any]]:  # Returning list of dicts for now
+    page_cursor: Optional[str] = None,
+    layer_filter: Optional[int] = None,
+    month_filter: Optional[int] = None,
+    year_filter: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None
+) -> Dict[str, Any]:
     """
-    Fetches purchase orders from the MySQL database with pagination and search.
+    Fetches purchase orders from the MySQL database with pagination, search and filters.
+    Search uses the FULLTEXT indexes over SEARCH_COLUMNS and DETAIL_SEARCH_COLUMNS (every
+    word of FT_MIN_TOKEN_SIZE or more characters must match in one of them) and ranks
+    results by relevance; POs whose PO_No starts with the search text match too, first.
+    Search results are paged with skip/limit only.
+    Otherwise, with page_cursor (a previous next_cursor), the page is selected by keyset
+    on (TGL_PO, PO_No, id) and skip is ignored; without it skip/limit OFFSET paging is used.
+    layer_filter is a layer_definitions.id: an L2 folder, or an L1 folder meaning all of its L2 folders.
+    month_filter (1-12) and year_filter restrict TGL_PO; a month without a year matches that month in every year.
+    columns limits the selected columns (the sort key is always included); None selects
+    every purchase_orders column. Side table (DETAIL_COLUMNS) columns are only read
+    when named in columns.
+    Raises ValueError for a malformed cursor.
+    Returns a dictionary: {"items": List[Dict[str, Any]], "next_cursor": Optional[str]}
     """
+    empty_page = {"items": [], "next_cursor": None}
+    cursor_values = decode_cursor(
+        page_cursor, len(PO_LIST_CURSOR_COLUMNS)) if page_cursor else None
+    boolean_query = build_boolean_search_query(search) if search else ""
+    if is_unsearchable(search):
+        return empty_page
+    searching = bool(search and search.strip())
+    if searching:
+        cursor_values = None  # Relevance order has no keyset
+
+    layer_cluster_labels = None
+    if layer_filter is not None:
+        layer_cluster_labels = folder_tree_service.resolve_l2_cluster_labels(
+            layer_filter)
+        if not layer_cluster_labels:
+            return empty_page  # Unknown or empty folder
+
     conn = get_mysql_connection()
     if not conn:
         # Consider raising an HTTPException or returning an empty list with an error message
-        return []
+        return empty_page
 
     # dictionary=True returns rows as dicts
     cursor = conn.cursor(dictionary=True)
 
-    query_params = []
-    base_query = f"SELECT * FROM {TABLE_NAME}"
-    conditions = []
-
-    if search:
-        # Assuming search applies to ITEM_NAME and PO_No for now
-        # Adjust column names if they are different in your DB
-        conditions.append("(ITEM_NAME LIKE %s OR PO_No LIKE %s)")
-        query_params.extend([f"%{search}%", f"%{search}%"])
-
-    # TODO: Add layer_filter logic. This will require joining with layer tables
-    # if layer_filter:
-    #     conditions.append("layer_column = %s") # Example
-    #     query_params.append(layer_filter)
-
-    # TODO: Add month_filter logic. This will require date functions on TGL_PO
-    # if month_filter:
-    #     conditions.append("MONTH(TGL_PO) = %s") # Example for MySQL
-    #     query_params.append(month_filter)
-
-    if conditions:
-        base_query += " WHERE " + " AND ".join(conditions)
-
-    # Using PO_No for secondary sort as 'id' might not be a guaranteed auto-increment primary key
-    # from the ETL process unless explicitly defined. TGL_PO should exist.
-    base_query += " ORDER BY TGL_PO DESC, PO_No DESC"
-    base_query += " LIMIT %s OFFSET %s"
-    query_params.extend([limit, skip])
-
     pos = []
+    next_cursor = None
     try:
-        print(f"Executing DB query: {base_query} with params: {query_params}")
-        cursor.execute(base_query, tuple(query_params))
-        pos = cursor.fetchall()
-        print(f"Fetched {len(pos)} POs from database.")
+        date_ranges = None
+        if month_filter or year_filter:
+            date_ranges = _resolve_date_ranges(
+                cursor, month_filter, year_filter)
+            if not date_ranges:
+                return empty_page
+
+        # The listing shows hot columns only; side table columns are joined in
+        # when explicitly requested through `columns`.
+        select_list, join_details = _build_select_list(
+            cursor, columns, required=PO_LIST_CURSOR_COLUMNS)
+        query_args = dict(
+            skip=skip, limit=limit, search=search, boolean_query=boolean_query,
+            cursor_values=cursor_values, layer_cluster_labels=layer_cluster_labels,
+            date_ranges=date_ranges, select_list=select_list, join_details=join_details)
+        if searching:
+            # A table loaded before the split still has the text columns (and
+            # their FULLTEXT index) on purchase_orders itself.
+            side_columns = _side_table_columns(cursor)
+            hot_columns = get_table_columns(cursor, TABLE_NAME)
+            query_args["side_search_columns"] = [
+                col for col in DETAIL_SEARCH_COLUMNS if col in side_columns]
+            query_args["hot_search_columns"] = list(SEARCH_COLUMNS) + [
+                col for col in DETAIL_SEARCH_COLUMNS if col in hot_columns]
+        base_query, query_params = _build_list_query(**query_args)
+        logger.debug("Executing DB query: %s with params: %s", base_query, query_params)
+        with track_query("po_search" if searching else "po_list") as query_record:
+            try:
+                cursor.execute(base_query, query_params)
+            except mysql.connector.Error as err:
+                if err.errno in (ER_BAD_FIELD_ERROR, ER_NO_SUCH_TABLE):
+                    reset_table_columns_cache()  # Tables were rebuilt with other columns
+                if not searching or err.errno != ER_FT_MATCHING_KEY_NOT_FOUND:
+                    raise
+                logger.warning(
+                    "FULLTEXT index missing on purchase_orders, falling back to LIKE search. Re-run the ETL to build it.")
+                base_query, query_params = _build_list_query(
+                    **query_args, use_fulltext=False)
+                cursor.execute(base_query, query_params)
+            pos = cursor.fetchall()
+            query_record.rows = len(pos)
+        if searching:
+            del pos[limit:]
+        else:
+            next_cursor = next_cursor_for(pos, limit, PO_LIST_CURSOR_COLUMNS)
+        logger.debug("Fetched %d POs from database.", len(pos))
     except Exception as e:
-        print(f"Error fetching POs from database: {e}")
+        logger.error("Error fetching POs from database: %s", e)
         # Handle error appropriately
     finally:
         cursor.close()
         conn.close()
 
-    return pos
+    return {"items": pos, "next_cursor": next_cursor}
 
 
-def fetch_po_by_id_from_db(po_id: int) -> Optional[Dict[str, Any]]:
+def open_po_export_cursor(
+    search: Optional[str] = None,
+    layer_filter: Optional[int] = None,
+    month_filter: Optional[int] = None,
+    year_filter: Optional[int] = None,
+    columns: Optional[Sequence[str]] = None
+) -> Tuple[Any, Any, List[str]]:
     """
-    Fetches a single purchase order by its ID from the MySQL database.
+    Runs the fetch_all_pos_from_db query without paging, for streaming exports.
+    Same filters and order; the side table columns are included unless columns
+    says otherwise. Rows are left on the server (unbuffered cursor) and read in
+    batches with cursor.fetchmany(), as tuples in column_names order.
+    Returns (conn, cursor, column_names); the caller closes both.
+    Raises DatabaseUnavailableError if no connection could be obtained.
+    """
+    boolean_query = build_boolean_search_query(search) if search else ""
+    searching = bool(search and search.strip())
+    layer_cluster_labels = None
+    if layer_filter is not None:
+        layer_cluster_labels = folder_tree_service.resolve_l2_cluster_labels(
+            layer_filter)
+
+    conn = get_mysql_connection()
+    if not conn:
+        raise DatabaseUnavailableError("Could not obtain a MySQL connection.")
+    cursor = None
+    try:
+        # Lookups run on a buffered cursor; the export streams from its own one
+        lookup_cursor = conn.cursor(dictionary=True, buffered=True)
+        try:
+            date_ranges = None
+            if month_filter or year_filter:
+                date_ranges = _resolve_date_ranges(
+                    lookup_cursor, month_filter, year_filter)
+            select_list, join_details = _build_select_list(
+                lookup_cursor, columns, include_details=True)
+            query_args = dict(
+                skip=0, limit=None, search=search, boolean_query=boolean_query,
+                cursor_values=None, layer_cluster_labels=layer_cluster_labels,
+                date_ranges=date_ranges, select_list=select_list, join_details=join_details)
+            if searching:
+                side_columns = _side_table_columns(lookup_cursor)
+                hot_columns = get_table_columns(lookup_cursor, TABLE_NAME)
+                query_args["side_search_columns"] = [
+                    col for col in DETAIL_SEARCH_COLUMNS if col in side_columns]
+                query_args["hot_search_columns"] = list(SEARCH_COLUMNS) + [
+                    col for col in DETAIL_SEARCH_COLUMNS if col in hot_columns]
+        finally:
+            lookup_cursor.close()
+
+        cursor = conn.cursor()
+        base_query, query_params = _build_list_query(**query_args)
+        logger.debug("Executing DB export query: %s with params: %s", base_query, query_params)
+        # Times the query until its first row is ready; rows are streamed later
+        with track_query("po_export_open"):
+            try:
+                cursor.execute(base_query, query_params)
+            except mysql.connector.Error as err:
+                if err.errno in (ER_BAD_FIELD_ERROR, ER_NO_SUCH_TABLE):
+                    reset_table_columns_cache()
+                if not searching or err.errno != ER_FT_MATCHING_KEY_NOT_FOUND:
+                    raise
+                logger.warning(
+                    "FULLTEXT index missing on purchase_orders, falling back to LIKE search. Re-run the ETL to build it.")
+                base_query, query_params = _build_list_query(
+                    **query_args, use_fulltext=False)
+                cursor.execute(base_query, query_params)
+        return conn, cursor, list(cursor.column_names)
+    except Exception:
+        if cursor is not None:
+            cursor.close()
+        conn.close()
+        raise
+
+
+def fetch_po_by_id_from_db(po_id: int, columns: Optional[Sequence[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Fetches a single purchase order by its ID from the MySQL database,
+    including the wide text columns of the side table.
+    columns limits the selected columns; None selects all.
     """
     conn = get_mysql_connection()
     if not conn:
         return None
 
     cursor = conn.cursor(dictionary=True)
-    query = f"SELECT * FROM {TABLE_NAME} WHERE id = %s"
     po = None
     try:
-        cursor.execute(query, (po_id,))
-        po = cursor.fetchone()
+        select_list, join_details = _build_select_list(
+            cursor, columns, required=("id",), include_details=True)
+        query = f"SELECT {select_list} FROM {TABLE_NAME} po{DETAILS_JOIN if join_details else ''} WHERE po.id = %s"
+        with track_query("po_by_id") as query_record:
+            cursor.execute(query, (po_id,))
+            po = cursor.fetchone()
+            query_record.rows = 1 if po else 0
         if po:
-            print(f"Fetched PO with id {po_id} from database.")
+            logger.debug("Fetched PO with id %s from database.", po_id)
         else:
-            print(f"No PO found with id {po_id} in database.")
+            logger.debug("No PO found with id %s in database.", po_id)
     except Exception as e:
-        print(f"Error fetching PO by id {po_id} from database: {e}")
+        if getattr(e, "errno", None) in (ER_BAD_FIELD_ERROR, ER_NO_SUCH_TABLE):
+            reset_table_columns_cache()
+        logger.error("Error fetching PO by id %s from database: %s", po_id, e)
     finally:
         cursor.close()
         conn.close()
@@ -138,24 +510,37 @@ def create_po_in_db(po_data: PurchaseOrderCreateSchema) -> Optional[Dict[str, An
     # Ensure these match your DB table columns.
 
     if not columns:
-        print("No data provided to create PO.")
+        logger.warning("No data provided to create PO.")
         return None
 
-    placeholders = ", ".join(["%s"] * len(columns))
-    cols_joined = ", ".join([f"`{col}`" for col in columns])
-    values = [data_dict[col] for col in columns]
-
-    query = f"INSERT INTO {TABLE_NAME} ({cols_joined}) VALUES ({placeholders})"
-
     new_po_id = None
     try:
-        print(f"Executing DB query: {query} with values: {values}")
-        cursor.execute(query, tuple(values))
-        conn.commit()
-        new_po_id = cursor.lastrowid  # Get the ID of the newly inserted row
-        print(f"Successfully created PO with ID: {new_po_id}")
+        # Wide text columns go to the side table, in the same transaction
+        side_columns = _side_table_columns(cursor)
+        detail_columns = [col for col in columns if col in side_columns]
+        columns = [col for col in columns if col not in side_columns]
+
+        placeholders = ", ".join(["%s"] * len(columns))
+        cols_joined = ", ".join([f"`{col}`" for col in columns])
+        values = [data_dict[col] for col in columns]
+
+        query = f"INSERT INTO {TABLE_NAME} ({cols_joined}) VALUES ({placeholders})"
+        logger.debug("Executing DB query: %s with values: %s", query, values)
+        with track_query("po_create") as query_record:
+            cursor.execute(query, tuple(values))
+            new_po_id = cursor.lastrowid  # Get the ID of the newly inserted row
+
+            if detail_columns:
+                detail_query = (
+                    f"INSERT INTO {DETAILS_TABLE_NAME} (`id`, {', '.join(f'`{col}`' for col in detail_columns)})"
+                    f" VALUES ({', '.join(['%s'] * (len(detail_columns) + 1))})")
+                cursor.execute(detail_query, tuple(
+                    [new_po_id] + [data_dict[col] for col in detail_columns]))
+            conn.commit()
+            query_record.rows = 1
+        logger.info("Successfully created PO with ID: %s", new_po_id)
     except Exception as e:
-        print(f"Error creating PO in database: {e}")
+        logger.error("Error creating PO in database: %s", e)
         conn.rollback()
         return None
     finally:
@@ -182,7 +567,7 @@ def update_po_fields_in_db(po_id: int, update_data: PurchaseOrderUpdateSchema) -
     update_values = update_data.dict(exclude_unset=True)
 
     if not update_values:
-        print(f"No fields to update for PO ID {po_id}.")
+        logger.debug("No fields to update for PO ID %s.", po_id)
         # Optionally, fetch and return the PO as is, or return None/error
         return fetch_po_by_id_from_db(po_id)
 
@@ -198,13 +583,15 @@ def update_po_fields_in_db(po_id: int, update_data: PurchaseOrderUpdateSchema) -
     query = f"UPDATE {TABLE_NAME} SET {', '.join(set_clauses)} WHERE id = %s"
 
     try:
-        print(f"Executing DB query: {query} with params: {query_params}")
-        cursor.execute(query, tuple(query_params))
-        conn.commit()
+        logger.debug("Executing DB query: %s with params: %s", query, query_params)
+        with track_query("po_update") as query_record:
+            cursor.execute(query, tuple(query_params))
+            conn.commit()
+            query_record.rows = cursor.rowcount
 
         if cursor.rowcount == 0:
-            print(
-                f"No PO found with ID {po_id} to update, or no changes made.")
+            logger.debug(
+                "No PO found with ID %s to update, or no changes made.", po_id)
             # It's important to distinguish "not found" from "no effective change"
             # For now, if rowcount is 0, we assume it might not exist or data was same.
             # A pre-check if PO exists might be better.
@@ -214,9 +601,9 @@ def update_po_fields_in_db(po_id: int, update_data: PurchaseOrderUpdateSchema) -
                 return None  # Not found
             return updated_po  # Found, but maybe no change if data was same
 
-        print(f"Successfully updated fields for PO ID: {po_id}")
+        logger.debug("Successfully updated fields for PO ID: %s", po_id)
     except Exception as e:
-        print(f"Error updating PO ID {po_id} in database: {e}")
+        logger.error("Error updating PO ID %s in database: %s", po_id, e)
         conn.rollback()
         return None
     finally:
@@ -224,3 +611,66 @@ def update_po_fields_in_db(po_id: int, update_data: PurchaseOrderUpdateSchema) -
         conn.close()
 
     return fetch_po_by_id_from_db(po_id)  # Fetch and return the updated PO
+
+
+def bulk_update_po_fields_in_db(updates: List[PurchaseOrderBulkUpdateItemSchema]) -> Optional[Dict[str, Any]]:
+    """
+    Applies many Checklist/Keterangan changes in one transaction: a single
+    UPDATE with one CASE per field, then one SELECT of the updated rows.
+    Later entries for the same id override earlier ones.
+    Returns {"items": rows in request order, "not_found_ids": [...]}, or None on a DB error.
+    """
+    # Merge per id, keeping only the fields each entry actually sets
+    changes: Dict[int, Dict[str, Any]] = {}
+    for update in updates:
+        changes.setdefault(update.id, {}).update(
+            update.dict(exclude_unset=True, exclude={"id"}))
+    po_ids = list(changes)
+
+    set_clauses = []
+    query_params: List[Any] = []
+    for field in PurchaseOrderUpdateSchema.model_fields:
+        field_changes = [(po_id, values[field])
+                         for po_id, values in changes.items() if field in values]
+        if not field_changes:
+            continue
+        whens = " ".join(["WHEN %s THEN %s"] * len(field_changes))
+        set_clauses.append(f"`{field}` = CASE id {whens} ELSE `{field}` END")
+        for po_id, value in field_changes:
+            query_params.extend([po_id, value])
+
+    conn = get_mysql_connection()
+    if not conn:
+        return None
+
+    cursor = conn.cursor(dictionary=True)
+    id_placeholders = ", ".join(["%s"] * len(po_ids))
+    try:
+        if set_clauses:
+            query = f"UPDATE {TABLE_NAME} SET {', '.join(set_clauses)} WHERE id IN ({id_placeholders})"
+            logger.debug("Executing bulk update of %d POs (%d fields).", len(po_ids), len(set_clauses))
+            with track_query("po_bulk_update") as query_record:
+                cursor.execute(query, tuple(query_params + po_ids))
+                query_record.rows = cursor.rowcount
+
+        select_list, join_details = _build_select_list(
+            cursor, None, include_details=True)
+        with track_query("po_bulk_update_select") as query_record:
+            cursor.execute(
+                f"SELECT {select_list} FROM {TABLE_NAME} po{DETAILS_JOIN if join_details else ''} WHERE po.id IN ({id_placeholders})",
+                tuple(po_ids))
+            rows_by_id = {row["id"]: row for row in cursor.fetchall()}
+            query_record.rows = len(rows_by_id)
+        conn.commit()
+    except Exception as e:
+        logger.error("Error bulk updating POs in database: %s", e)
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+    return {
+        "items": [rows_by_id[po_id] for po_id in po_ids if po_id in rows_by_id],
+        "not_found_ids": [po_id for po_id in po_ids if po_id not in rows_by_id],
+    }
@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import mysql.connector
+
+from ml.inference import classify_item_by_parsing
+from ..core.concurrency import run_db
+from ..db.database import DatabaseUnavailableError, connection_pool, mysql_connection
+from . import classification_service, dashboard_service, folder_tree_service, po_service
+
+logger = logging.getLogger(__name__)
+
+# Startup warm-up of an API worker. Until it finishes, GET /ready answers 503
+# so the load balancer keeps traffic on workers that are already warm.
+
+# Pool connections opened up front (capped at MYSQL_POOL_SIZE)
+WARMUP_DB_CONNECTIONS = int(os.getenv("WARMUP_DB_CONNECTIONS", "4"))
+# Seconds between attempts when MySQL is not reachable yet
+WARMUP_RETRY_SECONDS = float(os.getenv("WARMUP_RETRY_SECONDS", "5"))
+# Failures meaning MySQL is not reachable (yet). Any other failure is
+# permanent: it is reported in /ready but does not hold the worker back.
+RETRYABLE_ERRORS = (DatabaseUnavailableError, mysql.connector.errors.InterfaceError,
+                    mysql.connector.errors.OperationalError)
+
+# One description per parsing rule of ml.inference, so every rule's regex is
+# compiled (and cached by `re`) before the first /process/classify-new-item.
+SAMPLE_DESCRIPTIONS = (
+    "DUPLEX 450GSM/ 88X95CM",
+    "MASTER CARTON JDP63-09ELM",
+    "PLYWOOD 1220X2440X18MM",
+    "INK CYAN 1KG",
+    "TONER BLACK TN-2130",
+    "100X200X50CM",
+    "C0000000-0001",
+    "KERTAS HVS A4 80GR",
+)
+
+
+class WarmupState:
+    """Progress of the warm-up, as reported by /ready."""
+
+    def __init__(self):
+        self.ready = False
+        self.started_at = datetime.now()
+        self.finished_at: Optional[datetime] = None
+        self.attempts = 0
+        # step name -> {"ok": bool, "seconds": float, "detail": ...}
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "attempts": self.attempts,
+            "steps": self.steps,
+        }
+
+
+def prime_connections() -> int:
+    """Opens pool connections now rather than on the first requests."""
+    opened = connection_pool.prefill(WARMUP_DB_CONNECTIONS)
+    if opened == 0:
+        raise DatabaseUnavailableError("Could not open any MySQL connection.")
+    return opened
+
+
+def compile_classification_rules() -> int:
+    for description in SAMPLE_DESCRIPTIONS:
+        classify_item_by_parsing(description=description)
+    return len(SAMPLE_DESCRIPTIONS)
+
+
+def preload_folder_tree() -> int:
+    # Missing folder tables publish an empty hierarchy; None means MySQL was not reachable
+    snapshot = folder_tree_service.load_snapshot_from_db()
+    if snapshot is None:
+        raise DatabaseUnavailableError("Could not load the folder hierarchy.")
+    return len(snapshot.nodes_by_id)
+
+
+def run_representative_queries() -> Dict[str, float]:
+    """
+    Runs the queries behind the landing pages (PO list, first folder's items,
+    dashboard) once, pulling their index and data pages into the MySQL buffer
+    pool. Returns the seconds each took.
+    The services answer empty results for missing tables (nothing loaded yet,
+    nothing to warm) as well as for an unreachable MySQL; only the latter
+    raises DatabaseUnavailableError, so the step is retried.
+    """
+    with mysql_connection():
+        pass
+    timings: Dict[str, float] = {}
+
+    def timed(name: str, query: Callable[[], Any]) -> None:
+        started = time.perf_counter()
+        query()
+        timings[name] = round(time.perf_counter() - started, 4)
+
+    timed("po_list", lambda: po_service.fetch_all_pos_from_db(limit=50))
+    timed("mini_dashboard", dashboard_service.get_mini_dashboard_data)
+
+    snapshot = folder_tree_service.get_snapshot()
+    if snapshot is not None and snapshot.l1_nodes:
+        l1_node = snapshot.l1_nodes[0]
+        timed("po_list_by_folder", lambda: po_service.fetch_all_pos_from_db(
+            limit=50, layer_filter=l1_node.id))
+        l2_nodes = snapshot.children_by_parent_id.get(l1_node.id, ())
+        if l2_nodes:
+            timed("layer_items", lambda: classification_service.fetch_items_for_layer_from_db(
+                l2_nodes[0].id, limit=100))
+    return timings
+
+
+# (name, function, needs MySQL). Steps that need MySQL are retried while it is unreachable.
+WARMUP_STEPS: List[Tuple[str, Callable[[], Any], bool]] = [
+    ("db_connections", prime_connections, True),
+    ("classification_rules", compile_classification_rules, False),
+    ("folder_tree", preload_folder_tree, True),
+    ("queries", run_representative_queries, True),
+]
+
+
+async def warm_up(state: WarmupState) -> None:
+    """Runs every warm-up step, retrying those that found MySQL unreachable, then marks the worker ready."""
+    pending = list(WARMUP_STEPS)
+    while pending:
+        state.attempts += 1
+        failed = []
+        for name, step, needs_db in pending:
+            if needs_db and failed:
+                # MySQL is not there yet; the services would hide it behind empty results
+                failed.append((name, step, needs_db))
+                continue
+            started = time.perf_counter()
+            try:
+                detail = await run_db(step)
+                state.steps[name] = {"ok": True, "seconds": round(time.perf_counter() - started, 4),
+                                     "detail": detail}
+            except Exception as e:
+                logger.warning("Warm-up step '%s' failed (attempt %d): %s", name, state.attempts, e)
+                state.steps[name] = {"ok": False, "seconds": round(time.perf_counter() - started, 4),
+                                     "detail": str(e)}
+                if needs_db and isinstance(e, RETRYABLE_ERRORS):
+                    failed.append((name, step, needs_db))
+        pending = failed
+        if pending:
+            await asyncio.sleep(WARMUP_RETRY_SECONDS)
+
+    state.ready = True
+    state.finished_at = datetime.now()
+    logger.info("Warm-up finished in %.2fs; worker is ready.",
+                (state.finished_at - state.started_at).total_seconds())
@@ -0,0 +1,112 @@
+"""
+Load test: blocking vs. offloaded database calls in async routes.
+
+A slow MySQL query is simulated with time.sleep() behind
+po_service.fetch_po_by_id_from_db, then concurrent GET /purchase-orders/{id}
+requests are sent to two in-process apps:
+
+- blocking:  the old pattern, calling the service directly inside `async def`
+- offloaded: the real po_router, which goes through api.core.concurrency.run_db
+
+Usage (from the project root):
+    python -m benchmarks.bench_db_offload --requests 200 --concurrency 50 --query-ms 20
+
+Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI, HTTPException
+
+from api.routers import po_router
+from api.services import po_service
+
+
+def make_slow_fetch(query_seconds: float):
+    def slow_fetch_po_by_id_from_db(po_id: int, columns=None):
+        time.sleep(query_seconds)  # Stands in for a blocking mysql-connector round trip
+        return {"id": po_id, "PO_No": f"PO-{po_id:06d}", "Checklist": False, "Keterangan": ""}
+    return slow_fetch_po_by_id_from_db
+
+
+def build_blocking_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/purchase-orders/{po_id}")
+    async def get_purchase_order_by_id(po_id: int):
+        db_po = po_service.fetch_po_by_id_from_db(po_id=po_id)
+        if db_po is None:
+            raise HTTPException(status_code=404, detail="Purchase Order not found")
+        return db_po
+
+    return app
+
+
+def build_offloaded_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(po_router.router)
+    return app
+
+
+async def run_load(app: FastAPI, total_requests: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one_request(i: int):
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(f"/purchase-orders/{i + 1}")
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request(i) for i in range(total_requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total_requests,
+        "elapsed_seconds": round(elapsed, 4),
+        "requests_per_second": round(total_requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--query-ms", type=float, default=20.0,
+                        help="Simulated duration of one blocking query")
+    parser.add_argument("--json", action="store_true",
+                        help="Print machine-readable results")
+    args = parser.parse_args()
+
+    po_service.fetch_po_by_id_from_db = make_slow_fetch(args.query_ms / 1000)
+
+    results = {
+        "blocking": asyncio.run(run_load(build_blocking_app(), args.requests, args.concurrency)),
+        "offloaded": asyncio.run(run_load(build_offloaded_app(), args.requests, args.concurrency)),
+    }
+    results["speedup"] = round(
+        results["offloaded"]["requests_per_second"] / results["blocking"]["requests_per_second"], 2)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.query_ms} ms per query")
+    for name in ("blocking", "offloaded"):
+        r = results[name]
+        print(f"  {name:<10} {r['requests_per_second']:>8} req/s   p50 {r['p50_ms']:>8} ms   p95 {r['p95_ms']:>8} ms")
+    print(f"  speedup    {results['speedup']}x")
+
+
+if __name__ == "__main__":
+    main()
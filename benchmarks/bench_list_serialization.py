@@ -0,0 +1,172 @@
+"""
+Benchmark: response_model validation vs. the fast JSON path for list pages.
+
+The services are stubbed to return pages of realistic mysql-connector rows
+(every purchase_orders column, tinyint Checklist, a few extra columns), then
+GET /purchase-orders and GET /classification/item-details-by-layer-definition-pk
+are driven in-process with FAST_JSON_RESPONSES off ("before") and on ("after").
+Both paths' JSON bodies are compared so the speed-up is not bought with a
+different response. The in-process client's own cost is part of req/s, so the
+server-side encoding time per page is also reported on its own.
+
+Usage (from the project root):
+    python -m benchmarks.bench_list_serialization --rows 100 --requests 300
+
+Requires httpx and orjson.
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+import timeit
+from datetime import datetime, timedelta
+from typing import List
+
+import httpx
+from fastapi import FastAPI
+from pydantic import TypeAdapter
+
+from api.core import fast_json
+from api.routers import classification_router, po_router
+from api.schemas.po_schemas import PurchaseOrder
+from api.services import classification_service, po_service
+
+FLOAT_FIELDS = {name for name, field in PurchaseOrder.model_fields.items()
+                if "float" in str(field.annotation)}
+DATETIME_FIELDS = {name for name, field in PurchaseOrder.model_fields.items()
+                   if "datetime" in str(field.annotation)}
+
+
+def make_rows(count: int, seed: int = 7) -> list:
+    rng = random.Random(seed)
+    started = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        row = {}
+        for name in PurchaseOrder.model_fields:
+            if name in FLOAT_FIELDS:
+                row[name] = round(rng.uniform(1, 1_000_000), 2)
+            elif name in DATETIME_FIELDS:
+                row[name] = started + timedelta(days=rng.randint(0, 700), hours=rng.randint(0, 23))
+            else:
+                row[name] = f"{name}-{rng.randint(0, 99999)}"
+        row["id"] = count - i
+        row["PO_No_Line"] = rng.randint(1, 20)
+        row["Checklist"] = rng.randint(0, 1)  # tinyint, as MySQL returns it
+        row["Company_ID"] = "default"  # Columns outside the schema are dropped
+        rows.append(row)
+    return rows
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(po_router.router)
+    app.include_router(classification_router.router)
+    return app
+
+
+async def run_load(app: FastAPI, path: str, total_requests: int, concurrency: int) -> dict:
+    latencies = []
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one_request():
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one_request() for _ in range(total_requests)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests_per_second": round(total_requests / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(latencies[int(len(latencies) * 0.95) - 1] * 1000, 2),
+    }
+
+
+def time_encoding(rows: list, repeat: int = 200) -> dict:
+    """Milliseconds to turn one page of rows into JSON bytes, per path."""
+    adapter = TypeAdapter(List[PurchaseOrder])
+    shaper = fast_json.get_row_shaper(PurchaseOrder)
+    before = timeit.timeit(
+        lambda: adapter.dump_json(adapter.validate_python(rows)), number=repeat)
+    after = timeit.timeit(
+        lambda: fast_json.dumps(shaper.shape_many(rows)), number=repeat)
+    return {
+        "before_ms": round(before / repeat * 1000, 3),
+        "after_ms": round(after / repeat * 1000, 3),
+        "speedup": round(before / after, 2),
+    }
+
+
+async def fetch_body(app: FastAPI, path: str):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        response = await client.get(path)
+        response.raise_for_status()
+        return response.json()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100, help="Rows per page")
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--json", action="store_true",
+                        help="Print machine-readable results")
+    args = parser.parse_args()
+    if fast_json.orjson is None:
+        parser.error("orjson is not installed")
+
+    rows = make_rows(args.rows)
+    po_service.fetch_all_pos_from_db = lambda **kwargs: {
+        "items": [dict(row) for row in rows], "next_cursor": "bench"}
+    classification_service.fetch_items_for_layer_from_db = lambda **kwargs: {
+        "layer_name": "Bench Folder", "items": [dict(row) for row in rows], "next_cursor": None}
+
+    app = build_app()
+    endpoints = {
+        "purchase_orders": f"/purchase-orders/?limit={min(args.rows, 100)}",
+        "purchase_orders_list_fields": f"/purchase-orders/?limit={min(args.rows, 100)}&fields=list",
+        "layer_items": "/classification/item-details-by-layer-definition-pk/1",
+    }
+
+    results = {"rows_per_page": args.rows,
+               "encoding": time_encoding(rows), "endpoints": {}}
+    for name, path in endpoints.items():
+        fast_json.FAST_JSON_RESPONSES = False
+        before_body = asyncio.run(fetch_body(app, path))
+        before = asyncio.run(run_load(app, path, args.requests, args.concurrency))
+        fast_json.FAST_JSON_RESPONSES = True
+        after_body = asyncio.run(fetch_body(app, path))
+        after = asyncio.run(run_load(app, path, args.requests, args.concurrency))
+        results["endpoints"][name] = {
+            "before": before,
+            "after": after,
+            "speedup": round(after["requests_per_second"] / before["requests_per_second"], 2),
+            "identical_json": before_body == after_body,
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+    print(f"{args.requests} requests per run, {args.rows} rows per page, concurrency {args.concurrency}")
+    encoding = results["encoding"]
+    print(f"  {'encode one page':<28} before {encoding['before_ms']:>7} ms"
+          f"   after {encoding['after_ms']:>7} ms   {encoding['speedup']}x")
+    for name, r in results["endpoints"].items():
+        print(f"  {name:<28} before {r['before']['requests_per_second']:>7} req/s (p50 {r['before']['p50_ms']} ms)"
+              f"   after {r['after']['requests_per_second']:>7} req/s (p50 {r['after']['p50_ms']} ms)"
+              f"   {r['speedup']}x   identical JSON: {r['identical_json']}")
+
+
+if __name__ == "__main__":
+    main()
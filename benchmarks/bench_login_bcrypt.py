@@ -0,0 +1,146 @@
+"""
+Load test: login throughput and latency per bcrypt cost factor.
+
+For every --rounds value, a user whose password was hashed at that cost is
+served by a stubbed auth_service.get_user_by_username, then concurrent
+POST /auth/token requests are sent to the real auth_router. While they run,
+a /ping route is polled to check that the event loop stays responsive.
+
+Use it to pick BCRYPT_ROUNDS: the highest cost whose p95 login latency still
+fits the budget at the expected login concurrency.
+
+Usage (from the project root):
+    python -m benchmarks.bench_login_bcrypt --rounds 10 11 12 --requests 100 --concurrency 20
+
+Requires httpx.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from api.core import security
+from api.routers import auth_router
+from api.schemas.user_schemas import UserInDB
+from api.services import auth_service
+
+BENCH_USERNAME = "bench-user"
+BENCH_PASSWORD = "bench-password"
+
+
+def stub_user_lookup(hashed_password: str):
+    user = UserInDB(id=1, username=BENCH_USERNAME, role="user", disabled=False,
+                    hashed_password=hashed_password)
+
+    def get_user_by_username(username: str):
+        return user if username == BENCH_USERNAME else None
+    return get_user_by_username
+
+
+def build_app() -> FastAPI:
+    app = FastAPI()
+    app.include_router(auth_router.router)
+
+    @app.get("/ping")
+    async def ping():
+        return {"ok": True}
+
+    return app
+
+
+def _p95(values):
+    values = sorted(values)
+    return values[max(int(len(values) * 0.95) - 1, 0)]
+
+
+async def run_load(app: FastAPI, total_requests: int, concurrency: int) -> dict:
+    latencies = []
+    ping_latencies = []
+    rejected = 0
+    semaphore = asyncio.Semaphore(concurrency)
+    transport = httpx.ASGITransport(app=app)
+    form = {"username": BENCH_USERNAME, "password": BENCH_PASSWORD}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one_login():
+            nonlocal rejected
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.post("/auth/token", data=form)
+                if response.status_code == 503:
+                    rejected += 1
+                    return
+                response.raise_for_status()
+                latencies.append(time.perf_counter() - started)
+
+        async def poll_ping(done: asyncio.Event):
+            while not done.is_set():
+                started = time.perf_counter()
+                await client.get("/ping")
+                ping_latencies.append(time.perf_counter() - started)
+                await asyncio.sleep(0.01)
+
+        done = asyncio.Event()
+        pinger = asyncio.create_task(poll_ping(done))
+        started = time.perf_counter()
+        await asyncio.gather(*(one_login() for _ in range(total_requests)))
+        elapsed = time.perf_counter() - started
+        done.set()
+        await pinger
+
+    return {
+        "requests": total_requests,
+        "rejected_503": rejected,
+        "elapsed_seconds": round(elapsed, 4),
+        "logins_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2) if latencies else None,
+        "p95_ms": round(_p95(latencies) * 1000, 2) if latencies else None,
+        "ping_p95_ms": round(_p95(ping_latencies) * 1000, 2) if ping_latencies else None,
+    }
+
+
+def bench_rounds(rounds: int, total_requests: int, concurrency: int) -> dict:
+    context = security.pwd_context.copy(bcrypt__rounds=rounds)
+    started = time.perf_counter()
+    hashed_password = context.hash(BENCH_PASSWORD)
+    hash_ms = (time.perf_counter() - started) * 1000
+
+    auth_service.get_user_by_username = stub_user_lookup(hashed_password)
+    result = asyncio.run(run_load(build_app(), total_requests, concurrency))
+    security.shutdown_password_hash_executor()  # Fresh pool per event loop
+    return {"rounds": rounds, "hash_ms": round(hash_ms, 2), **result}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, nargs="+", default=[10, 11, 12])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--json", action="store_true",
+                        help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results = [bench_rounds(r, args.requests, args.concurrency) for r in args.rounds]
+
+    if args.json:
+        print(json.dumps({
+            "cpu_count": os.cpu_count(),
+            "workers": security.PASSWORD_HASH_WORKERS,
+            "max_pending": security.PASSWORD_HASH_MAX_PENDING,
+            "results": results,
+        }, indent=2))
+        return
+    print(f"{args.requests} logins, concurrency {args.concurrency}, "
+          f"{security.PASSWORD_HASH_WORKERS} hash workers, max {security.PASSWORD_HASH_MAX_PENDING} pending")
+    for r in results:
+        print(f"  rounds {r['rounds']:>2}   hash {r['hash_ms']:>8} ms   {r['logins_per_second']:>7} logins/s   "
+              f"p50 {r['p50_ms']} ms   p95 {r['p95_ms']} ms   503s {r['rejected_503']}   ping p95 {r['ping_p95_ms']} ms")
+
+
+if __name__ == "__main__":
+    main()
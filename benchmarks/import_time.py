@@ -0,0 +1,157 @@
+"""
+Import-time and memory report for the API and pipeline modules.
+
+Each target module is imported in a fresh interpreter (--repeat times) and
+reported with:
+  seconds      wall time of the import (median of the runs)
+  rss_mb       resident memory after the import
+  rss_delta_mb memory added by the import over a bare interpreter
+  heavy        data/ML packages it pulled in (pandas, numpy, pyodbc, ...)
+  top          the modules with the largest own import time (python -X importtime)
+
+API workers should stay free of the heavy packages: those belong to the job
+process that runs the ETL and folder generation. With --check the exit status
+is 1 if any api.* target loads one of them.
+
+Usage (from the project root):
+    python -m benchmarks.import_time
+    python -m benchmarks.import_time --check
+    python -m benchmarks.import_time --targets api.main etl.etl_script --top 15
+    python -m benchmarks.import_time --json --output imports.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+DEFAULT_TARGETS = (
+    "api.main",
+    "api.routers.etl_ml_router",
+    "api.routers.po_router",
+    "api.routers.classification_router",
+    "api.services.job_service",
+    "etl.etl_script",
+    "ml.training_pipeline",
+)
+
+# Packages an API worker should never need to import
+HEAVY_MODULES = ("pandas", "numpy", "pyodbc", "pyarrow", "sklearn",
+                 "sentence_transformers", "torch", "openpyxl")
+
+# Runs in the child interpreter: imports one module, prints one JSON line
+_PROBE = r"""
+import importlib, json, sys, time
+
+def rss_kb():
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+before = rss_kb()
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+seconds = time.perf_counter() - started
+heavy = [name for name in json.loads(sys.argv[2]) if name in sys.modules]
+print(json.dumps({"seconds": seconds, "rss_before_kb": before, "rss_after_kb": rss_kb(),
+                  "modules": len(sys.modules), "heavy": heavy}))
+"""
+
+
+def probe(target: str, extra_flags=()) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *extra_flags, "-c", _PROBE, target, json.dumps(HEAVY_MODULES)],
+        capture_output=True, text=True, cwd=os.getcwd())
+
+
+def parse_importtime(stderr: str, top: int) -> list:
+    """Largest self times from `python -X importtime` output, as (module, self ms, cumulative ms)."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        rows.append((module.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    rows.sort(key=lambda row: row[1], reverse=True)
+    return [{"module": module, "self_ms": round(self_ms, 1), "cumulative_ms": round(cumulative_ms, 1)}
+            for module, self_ms, cumulative_ms in rows[:top]]
+
+
+def measure(target: str, repeat: int, top: int) -> dict:
+    runs = []
+    for _ in range(repeat):
+        completed = probe(target)
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()
+            raise RuntimeError(error[-1] if error else f"exit code {completed.returncode}")
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    last = runs[-1]
+    result = {
+        "seconds": round(statistics.median(run["seconds"] for run in runs), 4),
+        "rss_mb": round(statistics.median(run["rss_after_kb"] for run in runs) / 1024, 1),
+        "rss_delta_mb": round(statistics.median(
+            run["rss_after_kb"] - run["rss_before_kb"] for run in runs) / 1024, 1),
+        "modules": last["modules"],
+        "heavy": last["heavy"],
+    }
+    if top:
+        result["top"] = parse_importtime(probe(target, ("-X", "importtime")).stderr, top)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--targets", nargs="+", default=list(DEFAULT_TARGETS))
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per target (median is reported)")
+    parser.add_argument("--top", type=int, default=5, help="Slowest modules listed per target (0 = none)")
+    parser.add_argument("--check", action="store_true",
+                        help="Exit with status 1 if an api.* target imports a heavy package")
+    parser.add_argument("--output", help="Write the results JSON to this file")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+
+    results, failed = {}, {}
+    for target in args.targets:
+        print(f"Importing {target}...", file=sys.stderr)
+        try:
+            results[target] = measure(target, args.repeat, args.top)
+        except Exception as e:
+            failed[target] = str(e)
+
+    violations = [target for target, result in results.items()
+                  if target.split(".")[0] == "api" and result["heavy"]]
+    report = {"python": sys.version.split()[0], "results": results, "failed": failed,
+              "api_modules_with_heavy_imports": violations}
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"  {'module':<38} {'import ms':>10} {'RSS MB':>8} {'+RSS MB':>8} {'modules':>8}   heavy")
+        for target, result in results.items():
+            print(f"  {target:<38} {result['seconds'] * 1000:>10.1f} {result['rss_mb']:>8.1f} "
+                  f"{result['rss_delta_mb']:>8.1f} {result['modules']:>8}   {', '.join(result['heavy']) or '-'}")
+            for row in result.get("top", []):
+                print(f"      {row['module']:<40} {row['self_ms']:>8.1f} ms self  {row['cumulative_ms']:>8.1f} ms total")
+        for target, reason in failed.items():
+            print(f"  {target:<38} failed: {reason}")
+        if violations:
+            print(f"\nAPI modules importing heavy packages: {', '.join(violations)}")
+
+    if args.check and (violations or failed):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
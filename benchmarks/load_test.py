@@ -0,0 +1,370 @@
+"""
+Load test: concurrent reviewer sessions against a running API server.
+
+Each virtual user replays reviewer sessions in a loop until --duration ends:
+
+  1. POST /auth/token                                  log in
+  2. GET  /dashboard/mini-summary
+  3. GET  /classification/layers/L1                    drill into a random L1
+     GET  /classification/layers/L1/{pk}/L2            folder, then a random L2
+     GET  /classification/item-details-by-layer-definition-pk/{pk}
+  4. GET  /purchase-orders                             --pages pages, following X-Next-Cursor
+  5. PUT  /purchase-orders/{id}                        --edits per session, writing back the
+                                                       row's current Checklist/Keterangan
+
+with exponentially distributed think time between steps (--think-time, mean
+seconds; 0 for a closed-loop stress test). The PUT edits need an spv user;
+they write the values the row already has, so the data is left as it was.
+
+--with-etl runs an ETL while the test is going:
+  api        POST /process/trigger-etl on the server under test (the ETL then
+             runs in the server's job process, as in production); the
+             returned job is polled until it finishes
+  synthetic  `python -m etl.synthetic_data --mysql` in a separate process,
+             loading --etl-rows rows into the server's MySQL database
+             (REPLACES purchase_orders)
+Latencies are then also reported for the requests made while the ETL ran.
+
+Reports requests/s, errors and p50/p95/p99/max latency per endpoint.
+
+Usage (from the project root, with the API running, e.g. `python -m api.main`):
+    python -m benchmarks.load_test --users 20 --duration 60 --username spv --password secret
+    python -m benchmarks.load_test --users 50 --think-time 0 --json
+    python -m benchmarks.load_test --users 20 --with-etl synthetic --etl-rows 500000
+    python -m benchmarks.load_test --users 20 --with-etl api --etl-company C01 --etl-from 2024-01 --etl-to 2024-12
+
+Requires httpx.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return float("nan")
+    rank = max(1, math.ceil(fraction * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+class Recorder:
+    """Latency samples per endpoint label, with the time they were taken."""
+
+    def __init__(self):
+        self.samples: Dict[str, List[Tuple[float, float, bool]]] = defaultdict(list)
+        self.etl_window: Optional[List[float]] = None  # [started, finished or None]
+
+    def add(self, label: str, started: float, seconds: float, ok: bool) -> None:
+        self.samples[label].append((started, seconds, ok))
+
+    def _during_etl(self, started: float) -> bool:
+        if not self.etl_window:
+            return False
+        etl_started, etl_finished = self.etl_window
+        return started >= etl_started and (etl_finished is None or started <= etl_finished)
+
+    @staticmethod
+    def _stats(samples: List[Tuple[float, float, bool]], elapsed: float) -> dict:
+        latencies = sorted(seconds for _, seconds, _ in samples)
+        return {
+            "requests": len(samples),
+            "errors": sum(1 for *_, ok in samples if not ok),
+            "requests_per_second": round(len(samples) / elapsed, 2) if elapsed else None,
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 1),
+            "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(latencies[-1] * 1000, 1) if latencies else None,
+        }
+
+    def report(self, elapsed: float, test_finished: float) -> dict:
+        everything = [sample for samples in self.samples.values() for sample in samples]
+        report = {
+            "total": self._stats(everything, elapsed),
+            "endpoints": {label: self._stats(samples, elapsed)
+                          for label, samples in sorted(self.samples.items())},
+        }
+        if self.etl_window:
+            etl_started, etl_finished = self.etl_window
+            etl_elapsed = (etl_finished or test_finished) - etl_started
+            report["during_etl"] = {
+                label: self._stats([s for s in samples if self._during_etl(s[0])], etl_elapsed)
+                for label, samples in sorted(self.samples.items())
+                if any(self._during_etl(s[0]) for s in samples)}
+        return report
+
+
+class ReviewerSession:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, args, rng: random.Random):
+        self.client = client
+        self.recorder = recorder
+        self.args = args
+        self.rng = rng
+        self.headers: Dict[str, str] = {}
+        self.can_edit = args.edits > 0
+
+    async def request(self, label: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+            ok = response.status_code < 400
+        except httpx.HTTPError:
+            response, ok = None, False
+        self.recorder.add(label, started, time.perf_counter() - started, ok)
+        return response
+
+    async def think(self) -> None:
+        if self.args.think_time > 0:
+            await asyncio.sleep(self.rng.expovariate(1 / self.args.think_time))
+
+    async def login(self) -> bool:
+        self.headers = {}
+        response = await self.request(
+            "POST /auth/token", "POST", "/auth/token",
+            data={"username": self.args.username, "password": self.args.password})
+        if response is None or response.status_code != 200:
+            return False
+        self.headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+        return True
+
+    async def browse_folders(self) -> None:
+        response = await self.request("GET /classification/layers/L1", "GET", "/classification/layers/L1")
+        layers = response.json().get("layers", []) if response is not None and response.is_success else []
+        if not layers:
+            return
+        await self.think()
+        l1 = self.rng.choice(layers)
+        response = await self.request("GET /classification/layers/L1/{pk}/L2", "GET",
+                                      f"/classification/layers/L1/{l1['id']}/L2")
+        layers = response.json().get("layers", []) if response is not None and response.is_success else []
+        if not layers:
+            return
+        await self.think()
+        l2 = self.rng.choice(layers)
+        await self.request("GET /classification/item-details-by-layer-definition-pk/{pk}", "GET",
+                           f"/classification/item-details-by-layer-definition-pk/{l2['id']}",
+                           params={"limit": self.args.page_size})
+
+    async def page_purchase_orders(self) -> List[dict]:
+        rows: List[dict] = []
+        params = {"limit": self.args.page_size}
+        for _ in range(self.args.pages):
+            response = await self.request("GET /purchase-orders", "GET", "/purchase-orders/", params=params)
+            if response is None or not response.is_success:
+                break
+            rows.extend(response.json())
+            next_cursor = response.headers.get(NEXT_CURSOR_HEADER)
+            if not next_cursor:
+                break
+            params = {"limit": self.args.page_size, "cursor": next_cursor}
+            await self.think()
+        return rows
+
+    async def edit(self, rows: List[dict]) -> None:
+        for row in self.rng.sample(rows, min(self.args.edits, len(rows))):
+            if not self.can_edit:
+                return
+            # Writes back what the row already holds: exercises the update path only
+            body = {"Checklist": bool(row.get("Checklist")), "Keterangan": row.get("Keterangan") or ""}
+            response = await self.request("PUT /purchase-orders/{id}", "PUT",
+                                          f"/purchase-orders/{row['id']}", json=body)
+            if response is not None and response.status_code in (401, 403):
+                self.can_edit = False  # Not an spv user; stop trying
+            await self.think()
+
+    async def run(self, deadline: float) -> None:
+        while time.perf_counter() < deadline:
+            if not await self.login():
+                await asyncio.sleep(1)
+                continue
+            steps = (
+                lambda: self.request("GET /dashboard/mini-summary", "GET", "/dashboard/mini-summary"),
+                self.browse_folders,
+            )
+            for step in steps:
+                if time.perf_counter() >= deadline:
+                    return
+                await self.think()
+                await step()
+            if time.perf_counter() >= deadline:
+                return
+            await self.think()
+            rows = await self.page_purchase_orders()
+            if rows and self.can_edit and time.perf_counter() < deadline:
+                await self.edit(rows)
+
+
+async def run_api_etl(client: httpx.AsyncClient, args, recorder: Recorder) -> Optional[str]:
+    """Queues an ETL job on the server and polls it until it finishes. Returns its final status."""
+    from_year, from_month = (int(part) for part in args.etl_from.split("-"))
+    to_year, to_month = (int(part) for part in args.etl_to.split("-"))
+    response = await client.post("/process/trigger-etl", json={
+        "company_id": args.etl_company,
+        "from_month": from_month, "from_year": from_year,
+        "to_month": to_month, "to_year": to_year,
+        "from_item_code": args.etl_from_item, "to_item_code": args.etl_to_item,
+    })
+    response.raise_for_status()
+    status_url = response.json()["status_url"]
+    recorder.etl_window = [time.perf_counter(), None]
+    print(f"ETL job queued on the server ({status_url}).", file=sys.stderr)
+
+    # Job polls are not recorded as reviewer requests
+    while True:
+        await asyncio.sleep(args.etl_poll_interval)
+        try:
+            job_response = await client.get(status_url)
+            job_response.raise_for_status()
+        except httpx.HTTPError as e:
+            print(f"Could not poll the ETL job: {e}", file=sys.stderr)
+            continue
+        job = job_response.json()
+        if job["status"] in ("succeeded", "failed", "cancelled"):
+            break
+    recorder.etl_window[1] = time.perf_counter()
+    elapsed = recorder.etl_window[1] - recorder.etl_window[0]
+    message = f"ETL job {job['status']} after {elapsed:.1f} s"
+    print(message + (f": {job['error']}" if job.get("error") else "."), file=sys.stderr)
+    return job["status"]
+
+
+async def run_synthetic_etl(args, recorder: Recorder) -> int:
+    command = [sys.executable, "-m", "etl.synthetic_data", "--mysql", "--rows", str(args.etl_rows)]
+    process = await asyncio.create_subprocess_exec(
+        *command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    recorder.etl_window = [time.perf_counter(), None]
+    print(f"Synthetic ETL started ({args.etl_rows} rows).", file=sys.stderr)
+    _, stderr = await process.communicate()
+    recorder.etl_window[1] = time.perf_counter()
+    if process.returncode:
+        print(f"Synthetic ETL failed: {stderr.decode(errors='replace').strip()}", file=sys.stderr)
+    else:
+        print(f"Synthetic ETL finished after {recorder.etl_window[1] - recorder.etl_window[0]:.1f} s.",
+              file=sys.stderr)
+    return process.returncode
+
+
+async def run_test(args) -> dict:
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=args.users + 2, max_keepalive_connections=args.users + 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        try:
+            (await client.get("/")).raise_for_status()
+        except httpx.HTTPError as e:
+            raise SystemExit(f"API not reachable at {args.base_url}: {e}")
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        rng = random.Random(args.seed)
+        sessions = [ReviewerSession(client, recorder, args, random.Random(rng.random()))
+                    for _ in range(args.users)]
+
+        async def start_user(session: ReviewerSession, delay: float):
+            await asyncio.sleep(delay)  # Ramp users up over --ramp-up seconds
+            await session.run(deadline)
+
+        tasks = [asyncio.create_task(start_user(session, args.ramp_up * i / args.users))
+                 for i, session in enumerate(sessions)]
+        etl_task = None
+        if args.with_etl:
+            await asyncio.sleep(args.etl_delay)
+            if args.with_etl == "api":
+                etl_task = asyncio.create_task(run_api_etl(client, args, recorder))
+            else:
+                etl_task = asyncio.create_task(run_synthetic_etl(args, recorder))
+
+        await asyncio.gather(*tasks)
+        finished = time.perf_counter()
+        if etl_task is not None and not etl_task.done():
+            if args.with_etl == "api":
+                # The job keeps running on the server; the rest of the test counts as "during ETL"
+                print("Test finished before the ETL job; not waiting for it.", file=sys.stderr)
+                etl_task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await etl_task
+            else:
+                print("Test finished before the synthetic ETL; waiting for it.", file=sys.stderr)
+                await etl_task
+
+    report = recorder.report(finished - started, finished)
+    report["config"] = {
+        "base_url": args.base_url, "users": args.users, "duration_s": args.duration,
+        "think_time_s": args.think_time, "pages": args.pages, "page_size": args.page_size,
+        "edits": args.edits, "with_etl": args.with_etl,
+    }
+    return report
+
+
+def print_report(report: dict) -> None:
+    config = report["config"]
+    print(f"{config['users']} users for {config['duration_s']} s against {config['base_url']} "
+          f"(think time {config['think_time_s']} s, ETL: {config['with_etl'] or 'none'})")
+    header = f"  {'endpoint':<58} {'req':>6} {'err':>5} {'req/s':>7} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}"
+
+    def print_table(title: str, rows: dict):
+        print(f"\n{title}\n{header}")
+        for label, stats in rows.items():
+            print(f"  {label:<58} {stats['requests']:>6} {stats['errors']:>5} {stats['requests_per_second']:>7}"
+                  f" {stats['p50_ms']:>6}ms {stats['p95_ms']:>6}ms {stats['p99_ms']:>6}ms {stats['max_ms']:>6}ms")
+
+    print_table("All requests", {**report["endpoints"], "TOTAL": report["total"]})
+    if report.get("during_etl"):
+        print_table("While the ETL ran", report["during_etl"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--base-url", default=os.getenv("LOADTEST_BASE_URL", "http://localhost:8000"))
+    parser.add_argument("--username", default=os.getenv("LOADTEST_USERNAME"))
+    parser.add_argument("--password", default=os.getenv("LOADTEST_PASSWORD"))
+    parser.add_argument("--users", type=int, default=20, help="Concurrent virtual reviewers")
+    parser.add_argument("--duration", type=float, default=60, help="Seconds to run")
+    parser.add_argument("--ramp-up", type=float, default=5, help="Seconds over which users start")
+    parser.add_argument("--think-time", type=float, default=1.0,
+                        help="Mean seconds between steps (0 = no pause)")
+    parser.add_argument("--pages", type=int, default=3, help="Purchase order pages per session")
+    parser.add_argument("--page-size", type=int, default=50)
+    parser.add_argument("--edits", type=int, default=2, help="PUT edits per session (0 to skip)")
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--with-etl", choices=("api", "synthetic"))
+    parser.add_argument("--etl-delay", type=float, default=10,
+                        help="Seconds after the start to launch the ETL")
+    parser.add_argument("--etl-rows", type=int, default=500_000, help="Rows for --with-etl synthetic")
+    parser.add_argument("--etl-company", default="C01")
+    parser.add_argument("--etl-from", default="2024-01", help="YYYY-MM, for --with-etl api")
+    parser.add_argument("--etl-to", default="2024-12", help="YYYY-MM, for --with-etl api")
+    parser.add_argument("--etl-from-item", default="")
+    parser.add_argument("--etl-to-item", default="ZZZZZZZZ")
+    parser.add_argument("--etl-poll-interval", type=float, default=1,
+                        help="Seconds between ETL job status polls, for --with-etl api")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+    if not args.username or not args.password:
+        parser.error("--username and --password (or LOADTEST_USERNAME/LOADTEST_PASSWORD) are required")
+    if args.users < 1:
+        parser.error("--users must be at least 1")
+
+    report = asyncio.run(run_test(args))
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
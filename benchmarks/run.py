@@ -0,0 +1,406 @@
+"""
+Benchmark suite for the ETL, folder parsing, folder generation and query hot paths.
+
+Benchmarks (select with --only):
+  transform    etl.transform_data on synthetic PO_ListProd rows (etl.synthetic_data), per --sizes
+  parse        parse_item_description_for_folders over a description corpus
+  load         etl.load_data_to_mysql throughput
+  pipeline     run_folder_generation_pipeline end to end          (MySQL only)
+  queries      po_service / classification_service list queries    (MySQL only)
+
+`load` runs against MySQL when --mysql-database is given, otherwise against
+an in-memory SQLite stand-in (which measures the Python side of the load:
+row conversion and executemany batching, not MySQL itself). `pipeline` and
+`queries` are skipped without MySQL. The MySQL benchmarks REPLACE the
+purchase_orders, layer_definitions and item_classifications data of the
+given database, so point them at a scratch database, never the real one.
+
+Every benchmark reports `seconds` (best of --repeat runs, lower is better)
+plus throughput figures. Results can be written as JSON and compared with a
+stored baseline; the exit status is 1 if any benchmark got slower than the
+baseline by more than --max-regression.
+
+Usage (from the project root):
+    python -m benchmarks.run --quick
+    python -m benchmarks.run --sizes 100000 1000000 --output results.json
+    python -m benchmarks.run --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --max-regression 0.15
+    python -m benchmarks.run --mysql-database po_bench --only load pipeline queries
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from api.db import database
+from etl import etl_script, synthetic_data
+from ml import training_pipeline
+
+BENCHMARKS = ("transform", "parse", "load", "pipeline", "queries")
+
+# Tables created by the folder generation outside this repo; the scratch
+# database gets them if missing.
+SCRATCH_TABLES = (
+    """CREATE TABLE IF NOT EXISTS layer_definitions (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        layer_name_db VARCHAR(64) NOT NULL,
+        cluster_label_id VARCHAR(255) NOT NULL,
+        descriptive_name VARCHAR(255),
+        parent_layer_id INT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS item_classifications (
+        id INT AUTO_INCREMENT PRIMARY KEY,
+        item_po_id INT NOT NULL,
+        item_description TEXT,
+        cluster_label VARCHAR(255),
+        layer_name VARCHAR(64)
+    )""",
+)
+
+
+# --- Database back ends ---
+
+class _SqliteCursor:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def execute(self, operation, params=()):
+        return self._cursor.execute(operation.replace("%s", "?"), params)
+
+    def executemany(self, operation, seq_params):
+        return self._cursor.executemany(operation.replace("%s", "?"), seq_params)
+
+    def __getattr__(self, name):
+        return getattr(self._cursor, name)
+
+
+class SqliteStandIn:
+    """In-memory SQLite behind the small part of the mysql-connector API the ETL load uses."""
+
+    def __init__(self):
+        self._conn = sqlite3.connect(":memory:")
+
+    def cursor(self):
+        return _SqliteCursor(self._conn.cursor())
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+
+sqlite3.register_adapter(pd.Timestamp, lambda value: value.isoformat())
+sqlite3.register_adapter(type(pd.NaT), lambda value: None)
+sqlite3.register_adapter(np.int64, int)
+sqlite3.register_adapter(np.bool_, bool)
+
+
+def mysql_available() -> bool:
+    conn = database.get_mysql_connection()
+    if conn is None:
+        return False
+    conn.close()
+    return True
+
+
+# --- Helpers ---
+
+@contextlib.contextmanager
+def quiet():
+    """Hides the pipelines' progress prints while timing them."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def best_of(repeat: int, run, setup=None) -> list:
+    """Seconds per run; `setup` (untimed) runs before each one and its result is passed to `run`."""
+    timings = []
+    for _ in range(repeat):
+        prepared = setup() if setup else None
+        started = time.perf_counter()
+        run(prepared) if setup else run()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def summarize(timings: list, items: int = 0, unit: str = "rows") -> dict:
+    best = min(timings)
+    result = {"seconds": round(best, 6), "median_seconds": round(statistics.median(timings), 6),
+              "runs": len(timings)}
+    if items:
+        result[f"{unit}_per_second"] = round(items / best, 1)
+    return result
+
+
+def load_etl_frame(rows: int, seed: int = 7):
+    with quiet():
+        transformed = etl_script.transform_data(synthetic_data.generate_po_frame(rows, seed))
+    return etl_script.split_detail_columns(transformed)
+
+
+# --- Benchmarks ---
+
+def bench_transform(args) -> dict:
+    results = {}
+    for size in args.sizes:
+        frame = synthetic_data.generate_po_frame(size)
+        with quiet():
+            timings = best_of(args.repeat, etl_script.transform_data, setup=frame.copy)
+        results[f"transform_data[{size}]"] = summarize(timings, size)
+    return results
+
+
+def bench_parse(args) -> dict:
+    descriptions = synthetic_data.make_descriptions(args.parse_items)
+    parse = training_pipeline.parse_item_description_for_folders
+
+    def run():
+        for description in descriptions:
+            parse(description)
+
+    timings = best_of(args.repeat, run)
+    return {f"parse_item_description_for_folders[{args.parse_items}]":
+            summarize(timings, args.parse_items, unit="descriptions")}
+
+
+def bench_load(args, use_mysql: bool) -> dict:
+    hot_df, _ = load_etl_frame(args.load_rows)
+    table_name = "bench_load_purchase_orders"
+    backend = "mysql" if use_mysql else "sqlite-standin"
+
+    connections = []
+    if use_mysql:
+        def setup():
+            conn = database.get_mysql_connection()
+            with quiet():
+                etl_script.create_table_in_mysql(conn, table_name, hot_df)
+            connections.append(conn)
+            return conn
+    else:
+        columns = ", ".join(f"`{etl_script.sanitize_column_name(col)}`" for col in hot_df.columns)
+
+        def setup():
+            conn = SqliteStandIn()
+            conn.execute(f"CREATE TABLE {table_name} ({columns})")
+            connections.append(conn)
+            return conn
+
+    def run(conn):
+        with quiet():
+            loaded = etl_script.load_data_to_mysql(conn, table_name, hot_df)
+        if not loaded:
+            raise RuntimeError(f"load_data_to_mysql failed on {backend}")
+
+    timings = best_of(args.repeat, run, setup=setup)
+    for conn in connections:
+        if use_mysql:
+            cursor = conn.cursor()
+            cursor.execute(f"DROP TABLE IF EXISTS {table_name}")
+            cursor.close()
+        conn.close()
+    result = summarize(timings, args.load_rows)
+    result["backend"] = backend
+    return {f"load_data_to_mysql[{backend},{args.load_rows}]": result}
+
+
+def prepare_scratch_database(rows: int) -> None:
+    """Loads synthetic purchase orders into the scratch database like the ETL does."""
+    hot_df, details_df = load_etl_frame(rows)
+    conn = database.get_mysql_connection()
+    try:
+        with quiet():
+            etl_script.create_table_in_mysql(conn, "purchase_orders", hot_df)
+            etl_script.create_table_in_mysql(conn, etl_script.DETAILS_TABLE_NAME, details_df)
+            etl_script.load_data_to_mysql(conn, "purchase_orders", hot_df)
+            etl_script.load_data_to_mysql(conn, etl_script.DETAILS_TABLE_NAME, details_df)
+            etl_script.create_indexes_in_mysql(
+                conn, "purchase_orders", etl_script.PURCHASE_ORDERS_INDEXES)
+            etl_script.create_indexes_in_mysql(
+                conn, etl_script.DETAILS_TABLE_NAME, etl_script.PURCHASE_ORDER_DETAILS_INDEXES)
+        cursor = conn.cursor()
+        for statement in SCRATCH_TABLES:
+            cursor.execute(statement)
+        conn.commit()
+        cursor.close()
+    finally:
+        conn.close()
+    database.reset_table_columns_cache()
+
+
+def bench_pipeline(args) -> dict:
+    prepare_scratch_database(args.pipeline_rows)
+    with quiet():
+        timings = best_of(args.repeat, training_pipeline.run_folder_generation_pipeline)
+    return {f"run_folder_generation_pipeline[{args.pipeline_rows}]": summarize(timings, args.pipeline_rows)}
+
+
+def bench_queries(args) -> dict:
+    from api.services import classification_service, folder_tree_service, po_service
+
+    snapshot = folder_tree_service.load_snapshot_from_db()
+    if snapshot is None or not snapshot.l1_nodes:
+        raise RuntimeError("No folders in the scratch database; run the pipeline benchmark first")
+    l1 = max(snapshot.l1_nodes, key=lambda node: node.item_count)
+    l2 = max(snapshot.children_by_parent_id[l1.id], key=lambda node: node.item_count)
+    first_page = po_service.fetch_all_pos_from_db(skip=0, limit=100)
+
+    queries = {
+        "po_list_first_page": lambda: po_service.fetch_all_pos_from_db(skip=0, limit=100),
+        "po_list_next_page": lambda: po_service.fetch_all_pos_from_db(
+            skip=0, limit=100, page_cursor=first_page["next_cursor"]),
+        "po_list_search": lambda: po_service.fetch_all_pos_from_db(skip=0, limit=100, search="MASTER CARTON"),
+        "po_list_layer_filter": lambda: po_service.fetch_all_pos_from_db(
+            skip=0, limit=100, layer_filter=l1.id),
+        "po_by_id": lambda: po_service.fetch_po_by_id_from_db(1),
+        "layers_l1": lambda: classification_service.fetch_distinct_layers_from_db(1),
+        "layers_l2": lambda: classification_service.fetch_distinct_layers_from_db(2, l1.id),
+        "layer_items": lambda: classification_service.fetch_items_for_layer_from_db(l2.id, limit=100),
+    }
+    results = {}
+    for name, query in queries.items():
+        with quiet():
+            query()  # Warm the buffer pool and the column cache
+            timings = best_of(args.query_repeat, query)
+        timings.sort()
+        result = summarize(timings)
+        result["p95_ms"] = round(timings[int(len(timings) * 0.95) - 1] * 1000, 3)
+        results[f"query[{name}]"] = result
+    return results
+
+
+# --- Results ---
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except Exception:
+        commit = None
+    return {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": commit,
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+def compare(results: dict, baseline: dict, max_regression: float) -> list:
+    """Rows of (name, baseline seconds, current seconds, relative change, status)."""
+    rows = []
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if not previous or "seconds" not in previous or "seconds" not in result:
+            continue
+        change = result["seconds"] / previous["seconds"] - 1
+        if change > max_regression:
+            status = "REGRESSED"
+        elif change < -max_regression:
+            status = "improved"
+        else:
+            status = "ok"
+        rows.append((name, previous["seconds"], result["seconds"], change, status))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=list(BENCHMARKS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=[100_000, 1_000_000],
+                        help="Row counts for transform_data")
+    parser.add_argument("--parse-items", type=int, default=100_000)
+    parser.add_argument("--load-rows", type=int, default=100_000)
+    parser.add_argument("--pipeline-rows", type=int, default=20_000)
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per benchmark (best is reported)")
+    parser.add_argument("--query-repeat", type=int, default=50)
+    parser.add_argument("--quick", action="store_true",
+                        help="Small sizes for a smoke run (10k rows, 1 repeat)")
+    parser.add_argument("--mysql-database",
+                        default=os.getenv("BENCH_MYSQL_DATABASE"),
+                        help="Scratch MySQL database for the MySQL benchmarks (its tables are replaced)")
+    parser.add_argument("--output", help="Write the results JSON to this file")
+    parser.add_argument("--baseline", help="Compare with a results JSON from an earlier run")
+    parser.add_argument("--save-baseline", help="Write the results JSON here as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=0.15,
+                        help="Allowed slowdown against the baseline (0.15 = 15%%)")
+    parser.add_argument("--json", action="store_true", help="Print machine-readable results")
+    args = parser.parse_args()
+    if args.quick:
+        args.sizes, args.parse_items, args.load_rows = [10_000], 10_000, 10_000
+        args.pipeline_rows, args.repeat, args.query_repeat = 2_000, 1, 10
+
+    use_mysql = False
+    if args.mysql_database:
+        database.MYSQL_DATABASE = args.mysql_database
+        with quiet():
+            use_mysql = mysql_available()
+        if not use_mysql:
+            print(f"MySQL database '{args.mysql_database}' is not reachable; "
+                  "using the SQLite stand-in.", file=sys.stderr)
+
+    runners = {
+        "transform": lambda: bench_transform(args),
+        "parse": lambda: bench_parse(args),
+        "load": lambda: bench_load(args, use_mysql),
+        "pipeline": lambda: bench_pipeline(args),
+        "queries": lambda: bench_queries(args),
+    }
+    results, skipped = {}, {}
+    for name in BENCHMARKS:
+        if name not in args.only:
+            continue
+        if name in ("pipeline", "queries") and not use_mysql:
+            skipped[name] = "needs MySQL (--mysql-database)"
+            continue
+        print(f"Running {name}...", file=sys.stderr)
+        try:
+            results.update(runners[name]())
+        except Exception as e:
+            skipped[name] = f"failed: {e}"
+
+    report = {"environment": environment(), "results": results, "skipped": skipped}
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    comparison = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline_report = json.load(f)
+        comparison = compare(results, baseline_report.get("results", {}), args.max_regression)
+        report["comparison"] = [
+            {"name": name, "baseline_seconds": before, "seconds": after,
+             "change": round(change, 4), "status": status}
+            for name, before, after, change, status in comparison]
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        for name, result in results.items():
+            throughput = ", ".join(f"{key} {value}" for key, value in result.items()
+                                   if key.endswith("_per_second") or key in ("p95_ms", "backend"))
+            print(f"  {name:<58} {result['seconds'] * 1000:>11.1f} ms   {throughput}")
+        for name, reason in skipped.items():
+            print(f"  {name:<58} skipped: {reason}")
+        if comparison:
+            print(f"\nAgainst {args.baseline} (max regression {args.max_regression:.0%}):")
+            for name, before, after, change, status in comparison:
+                print(f"  {name:<58} {before * 1000:>9.1f} -> {after * 1000:>9.1f} ms  {change:+7.1%}  {status}")
+
+    if any(status == "REGRESSED" for *_, status in comparison):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,12 @@
 # Import centralized MySQL connection
-from api.db.database import get_mysql_connection
+from api.db.database import get_mysql_connection, ETL_VERSIONS_TABLE_NAME
+from api.core.metrics import time_stage
+from api.core.progress import report_progress
+from api.services.dashboard_service import (refresh_dashboard_summary, refresh_folder_spend_rollup,
+                                            refresh_supplier_spend_rollup)
 import os
+import mysql.connector
 import pandas as pd
-import pyodbc
 from dotenv import load_dotenv
 from datetime import datetime
 import sys  # Added for sys.path modification
@@ -29,9 +33,68 @@ SQL_SERVER_TRUSTED_CONNECTION = os.getenv(
 
 # MySQL details are now handled by api.db.database
 
+# Text columns that are sorted, filtered or indexed in MySQL are created as
+# VARCHAR (TEXT columns cannot be fully indexed). Lengths are in characters.
+VARCHAR_COLUMNS = {
+    "PO_No": 64,
+    "Company_ID": 64,
+}
+
+# Secondary indexes on purchase_orders, created after the bulk load (cheaper than
+# maintaining them row by row). Maps index name -> (index kind, column list).
+PURCHASE_ORDERS_INDEXES = {
+    # Keyset pagination of GET /purchase-orders: ORDER BY TGL_PO DESC, PO_No DESC, id DESC
+    "idx_po_tgl_po_po_no_id": ("INDEX", "`TGL_PO`, `PO_No`, `id`"),
+    # PO number prefix search (PO_No LIKE 'PO-2301%'), see po_service._build_list_query
+    "idx_po_po_no": ("INDEX", "`PO_No`"),
+    # Relevance-ranked search; must list the same columns as po_service.SEARCH_COLUMNS
+    "ft_po_search": ("FULLTEXT INDEX", "`ITEM`, `ITEM_DESC`, `PO_No`, `Supplier_Name`"),
+}
+
+# Wide, rarely read text columns (sanitized names) are stored in a side table
+# keyed by purchase_orders.id, keeping the rows scanned by listings, sorts and
+# aggregates narrow. Only detail views join them back in.
+# Keep in sync with po_service.DETAIL_COLUMNS.
+DETAILS_TABLE_NAME = "purchase_order_details"
+DETAIL_COLUMNS = ("ITEM_PURCHASE_TEXT", "PR_Ref_A", "PR_Ref_B", "Supplier_Tlp")
+
+PURCHASE_ORDER_DETAILS_INDEXES = {
+    # Search over the purchase text; must match po_service.DETAIL_SEARCH_COLUMNS
+    "ft_pod_search": ("FULLTEXT INDEX", "`ITEM_PURCHASE_TEXT`"),
+}
+
+# Rows fetched from SQL Server / inserted into MySQL per round trip. Progress
+# is reported after each batch.
+ETL_FETCH_BATCH_SIZE = int(os.getenv("ETL_FETCH_BATCH_SIZE", "10000"))
+ETL_LOAD_BATCH_SIZE = int(os.getenv("ETL_LOAD_BATCH_SIZE", "5000"))
+
+
+def sanitize_column_name(col_name):
+    """Column name as used in MySQL: every non-alphanumeric character becomes '_'."""
+    return "".join(c if c.isalnum() else "_" for c in col_name)
+
+
+def split_detail_columns(df):
+    """
+    Assigns the purchase_orders ids (1..n) explicitly and splits the DataFrame
+    into the hot table part and the side table part (id + DETAIL_COLUMNS present).
+    Returns (hot_df, details_df); details_df is None if no detail column exists.
+    """
+    df = df.reset_index(drop=True)
+    df.insert(0, "id", range(1, len(df) + 1))
+    detail_cols = [col for col in df.columns
+                   if sanitize_column_name(col) in DETAIL_COLUMNS]
+    if not detail_cols:
+        return df, None
+    return df.drop(columns=detail_cols), df[["id"] + detail_cols]
+
 
 def get_sql_server_connection():
     """Establishes a connection to the SQL Server database, prioritizing DSN if provided."""
+    # Imported here: only an ETL run needs the ODBC driver, not the synthetic
+    # data generator or the benchmarks that import this module.
+    import pyodbc
+
     conn_parts = []
     if SQL_SERVER_DSN_NAME:
         conn_parts.append(f"DSN={SQL_SERVER_DSN_NAME}")
@@ -89,6 +152,7 @@ def fetch_data_from_sql_server(conn_sql, company_id, from_month, from_year, to_m
     """Fetches data from SQL Server using the PO_ListProd stored procedure."""
     if conn_sql is None:
         return None
+    import pyodbc  # Already loaded by get_sql_server_connection()
 
     query = f"""
         EXEC PO_ListProd 
@@ -144,7 +208,14 @@ def fetch_data_from_sql_server(conn_sql, company_id, from_month, from_year, to_m
             print("Stored procedure executed but did not return a result set.")
             df = pd.DataFrame()  # Return empty DataFrame
         else:
-            rows = cursor.fetchall()
+            rows = []
+            while True:
+                batch = cursor.fetchmany(ETL_FETCH_BATCH_SIZE)
+                if not batch:
+                    break
+                rows.extend(batch)
+                # The stored procedure does not say how many rows are coming
+                report_progress("etl", "extract", len(rows))
             # Get column names from cursor.description
             columns = [column[0] for column in cursor.description]
             df = pd.DataFrame.from_records(rows, columns=columns)
@@ -249,6 +320,8 @@ def create_table_in_mysql(conn_mysql, table_name, df):
     # Add an auto-incrementing primary key 'id'
     cols_sql = ["`id` INT AUTO_INCREMENT PRIMARY KEY"]
     for col_name, dtype in df.dtypes.items():
+        if col_name == "id":
+            continue  # Explicit ids (see split_detail_columns) fill the primary key
         sql_type = "TEXT"  # Default type
         if "int64" in str(dtype):
             sql_type = "BIGINT"
@@ -260,10 +333,12 @@ def create_table_in_mysql(conn_mysql, table_name, df):
             sql_type = "BOOLEAN"
 
         # Sanitize column name for SQL
-        safe_col_name = "".join(c if c.isalnum() else "_" for c in col_name)
+        safe_col_name = sanitize_column_name(col_name)
         if safe_col_name != col_name:
             print(
                 f"Warning: Column name '{col_name}' sanitized to '{safe_col_name}' for SQL.")
+        if sql_type == "TEXT" and safe_col_name in VARCHAR_COLUMNS:
+            sql_type = f"VARCHAR({VARCHAR_COLUMNS[safe_col_name]})"
 
         cols_sql.append(f"`{safe_col_name}` {sql_type}")
 
@@ -282,8 +357,8 @@ def create_table_in_mysql(conn_mysql, table_name, df):
         cursor.close()
 
 
-def load_data_to_mysql(conn_mysql, table_name, df):
-    """Loads data from DataFrame to MySQL table."""
+def load_data_to_mysql(conn_mysql, table_name, df, progress_stage="load"):
+    """Loads data from DataFrame to MySQL table, in one transaction."""
     if conn_mysql is None or df is None or df.empty:
         print("No data to load or no MySQL connection.")
         return False
@@ -298,7 +373,7 @@ def load_data_to_mysql(conn_mysql, table_name, df):
     # Renaming columns in DataFrame to match sanitized names if they were changed
     sanitized_columns = {}
     for col_name in df.columns:
-        safe_col_name = "".join(c if c.isalnum() else "_" for c in col_name)
+        safe_col_name = sanitize_column_name(col_name)
         if safe_col_name != col_name:
             sanitized_columns[col_name] = safe_col_name
 
@@ -316,7 +391,11 @@ def load_data_to_mysql(conn_mysql, table_name, df):
     print(f"Loading data into MySQL table '{table_name}'...")
     try:
         data_tuples = [tuple(row) for row in df_renamed.to_numpy()]
-        cursor.executemany(insert_query, data_tuples)
+        for start in range(0, len(data_tuples), ETL_LOAD_BATCH_SIZE):
+            cursor.executemany(
+                insert_query, data_tuples[start:start + ETL_LOAD_BATCH_SIZE])
+            report_progress("etl", progress_stage, min(
+                start + ETL_LOAD_BATCH_SIZE, len(data_tuples)), len(data_tuples))
         conn_mysql.commit()
         print(
             f"Successfully loaded {len(data_tuples)} rows into {table_name}.")
@@ -339,8 +418,60 @@ def load_data_to_mysql(conn_mysql, table_name, df):
         cursor.close()
 
 
+def create_indexes_in_mysql(conn_mysql, table_name, indexes):
+    """
+    Adds secondary indexes to a freshly loaded table.
+    `indexes` maps index name -> (index kind, column list), e.g. ("FULLTEXT INDEX", "`ITEM`").
+    """
+    if conn_mysql is None or not indexes:
+        return False
+
+    cursor = conn_mysql.cursor()
+    all_created = True
+    try:
+        for index_name, (index_kind, columns_sql) in indexes.items():
+            query = f"CREATE {index_kind} `{index_name}` ON {table_name} ({columns_sql})"
+            print(f"Creating index: {query}")
+            try:
+                cursor.execute(query)
+            except mysql.connector.Error as err:
+                # A missing index only slows queries down, so keep going.
+                print(f"Error creating index {index_name} on {table_name}: {err}")
+                all_created = False
+        conn_mysql.commit()
+    finally:
+        cursor.close()
+    return all_created
+
+
+def publish_etl_load_version(conn_mysql):
+    """
+    Records that the ETL recreated its tables. API workers poll the latest id
+    and drop their cached table layouts when it changes.
+    """
+    cursor = conn_mysql.cursor()
+    try:
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {ETL_VERSIONS_TABLE_NAME} (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                published_at DATETIME NOT NULL
+            )
+        """)
+        cursor.execute(
+            f"INSERT INTO {ETL_VERSIONS_TABLE_NAME} (published_at) VALUES (NOW())")
+        conn_mysql.commit()
+        print(f"Published ETL load version {cursor.lastrowid}.")
+        return cursor.lastrowid
+    except mysql.connector.Error as err:
+        print(f"Error publishing ETL load version: {err}")
+        conn_mysql.rollback()
+        return None
+    finally:
+        cursor.close()
+
+
 def main_etl_process(company_id, from_month, from_year, to_month, to_year, from_item_code, to_item_code):
-    """Main ETL process."""
+    """Main ETL process. Returns True if the data was loaded into MySQL."""
     print("Starting ETL process...")
 
     conn_sql = get_sql_server_connection()
@@ -352,18 +483,19 @@ def main_etl_process(company_id, from_month, from_year, to_month, to_year, from_
             conn_sql.close()
         if conn_mysql:
             conn_mysql.close()
-        return
+        return False
 
-    raw_df = fetch_data_from_sql_server(
-        conn_sql, company_id, from_month, from_year,
-        to_month, to_year, from_item_code, to_item_code
-    )
+    with time_stage("etl", "extract"):
+        raw_df = fetch_data_from_sql_server(
+            conn_sql, company_id, from_month, from_year,
+            to_month, to_year, from_item_code, to_item_code
+        )
 
     if raw_df is None or raw_df.empty:
         print("No data fetched from SQL Server. ETL process cannot continue.")
         conn_sql.close()
         conn_mysql.close()
-        return
+        return False
 
     # Before transforming, it's crucial to know the actual column names from PO_ListProd
     # The user needs to provide these. For now, the transform_data function has placeholders.
@@ -373,32 +505,67 @@ def main_etl_process(company_id, from_month, from_year, to_month, to_year, from_
     print("IMPORTANT: Please verify the column names above and ensure they match the expectations in 'transform_data' function (qty_col, price_col, date_col).")
 
     # Use .copy() to avoid SettingWithCopyWarning
-    transformed_df = transform_data(raw_df.copy())
+    with time_stage("etl", "transform"):
+        transformed_df = transform_data(raw_df.copy())
 
     if transformed_df is None or transformed_df.empty:
         print("Data transformation failed or resulted in empty DataFrame. ETL process cannot continue.")
         conn_sql.close()
         conn_mysql.close()
-        return
+        return False
 
-    mysql_table_name = "purchase_orders"
+    # Lets per-company aggregates (dashboard_summary) group the loaded rows
+    transformed_df['Company_ID'] = company_id
 
-    # Create table (idempotent, drops if exists)
-    table_created = create_table_in_mysql(
-        conn_mysql, mysql_table_name, transformed_df)
+    mysql_table_name = "purchase_orders"
+    hot_df, details_df = split_detail_columns(transformed_df)
+
+    # Create tables (idempotent, drops if exists). The side table is always
+    # recreated so it never holds rows of a previous load.
+    with time_stage("etl", "create_tables"):
+        table_created = create_table_in_mysql(
+            conn_mysql, mysql_table_name, hot_df)
+        if table_created and details_df is not None:
+            table_created = create_table_in_mysql(
+                conn_mysql, DETAILS_TABLE_NAME, details_df)
+        elif table_created:
+            drop_cursor = conn_mysql.cursor()
+            drop_cursor.execute(f"DROP TABLE IF EXISTS {DETAILS_TABLE_NAME}")
+            drop_cursor.close()
 
     if not table_created:
         print(
             f"Failed to create table '{mysql_table_name}'. ETL process aborted.")
         conn_sql.close()
         conn_mysql.close()
-        return
+        return False
+    # The new layout is live from here on; tell the API workers to re-read it
+    publish_etl_load_version(conn_mysql)
 
     # Load data
-    load_success = load_data_to_mysql(
-        conn_mysql, mysql_table_name, transformed_df)
+    with time_stage("etl", "load"):
+        load_success = load_data_to_mysql(
+            conn_mysql, mysql_table_name, hot_df)
+        if load_success and details_df is not None:
+            load_success = load_data_to_mysql(
+                conn_mysql, DETAILS_TABLE_NAME, details_df, progress_stage="load_details")
 
     if load_success:
+        with time_stage("etl", "indexes"):
+            create_indexes_in_mysql(
+                conn_mysql, mysql_table_name, PURCHASE_ORDERS_INDEXES)
+            if details_df is not None:
+                create_indexes_in_mysql(
+                    conn_mysql, DETAILS_TABLE_NAME, PURCHASE_ORDER_DETAILS_INDEXES)
+        with time_stage("etl", "rollups"):
+            refresh_dashboard_summary()
+            # Only the loaded months are replaced; earlier history stays in the rollups
+            load_window = (company_id,
+                           datetime(int(from_year), int(from_month), 1).date(),
+                           datetime(int(to_year), int(to_month), 1).date())
+            refresh_supplier_spend_rollup(*load_window)
+            # Folder spend is re-read under the current folder classification
+            refresh_folder_spend_rollup(*load_window)
         print("ETL process completed successfully.")
     else:
         print("ETL process completed with errors during data loading.")
@@ -407,6 +574,7 @@ def main_etl_process(company_id, from_month, from_year, to_month, to_year, from_
     conn_sql.close()
     conn_mysql.close()
     print("Database connections closed.")
+    return load_success
 
 
 if __name__ == "__main__":
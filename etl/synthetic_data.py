@@ -0,0 +1,425 @@
+"""
+Synthetic purchase-order data shaped like the PO_ListProd stored procedure.
+
+For sizing hardware and reproducing slow paths without production data.
+Rows carry the PO_ListProd columns (see PurchaseOrderBase) plus Company_ID,
+as main_etl_process adds it, with realistic distributions:
+
+- suppliers and items follow a skewed (Zipf-like) popularity, so a few
+  suppliers and item codes account for most order lines
+- item descriptions cover every rule of parse_item_description_for_folders:
+  GSM/size papers, MASTER CARTON, PLYWOOD, INK, TONER, dimensions, codes and
+  generic descriptions (including short or numeric first words), and items
+  without ITEM_DESC fall back to their code
+- purchase orders have several lines for one supplier, span several
+  companies and years, and get statuses, receipts and IDR/USD/EUR prices
+  consistent with their age
+
+Rows are produced in chronological chunks, so millions of rows stream to
+CSV, Parquet (needs pyarrow) or straight into MySQL in constant memory.
+
+Usage (from the project root):
+    python -m etl.synthetic_data --rows 1000000 --csv po_listprod.csv
+    python -m etl.synthetic_data --rows 5000000 --parquet po_listprod.parquet
+    python -m etl.synthetic_data --rows 2000000 --mysql    # REPLACES purchase_orders
+"""
+import argparse
+import random
+import sys
+import time
+from typing import Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Column order of PO_ListProd (see the note in api/schemas/po_schemas.py)
+PO_LISTPROD_COLUMNS = [
+    'SUPPLIER_CODE', 'Supplier_Name', 'PO_No', 'PO Status', 'TGL_PO',
+    'PO_No Line', 'ITEM', 'ITEM_DESC', 'ITEM_DESC2', 'QTY_ORDER', 'UNIT', 'CONVERTION_FACTOR',
+    'QTY_ORDER_CONVERTION', 'Original_PRICE', 'Currency', 'Rate', 'ORDER_AMOUNT', 'IDR_PRICE',
+    'Order Amount IDR', 'RECEIVED_NO', 'RECEIVED_DATE', 'DELIVERED_QTY', 'PR_No', 'PLAN_RECEIVED',
+    'Term_Payment_at_PO', 'Item Group Code', 'Item Group Name', 'First2DigitItemCode', 'Supplier Tlp',
+    'PR Ref-A', 'PR Ref-B', 'PR Created by', 'PO Created by', 'Tax Code', 'PR Date', 'ITEM_PURCHASE_TEXT',
+]
+COMPANY_COLUMN = "Company_ID"
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+# Exchange rates to IDR around which the generated rates move
+CURRENCY_RATES = {"IDR": 1.0, "USD": 15_500.0, "EUR": 17_000.0}
+
+PAPER_MATERIALS = ("DUPLEX", "IVORY", "KRAFT", "ART PAPER", "ART CARTON", "HVS", "BOOK PAPER")
+BUYERS = ("ANDI", "BUDI", "CITRA", "DEWI", "EKO", "FITRI", "GILANG", "HENDRA")
+
+
+def _paper(rng: random.Random) -> str:
+    gsm = rng.choice((70, 80, 150, 210, 230, 250, 270, 310, 350, 400, 450))
+    return f"{rng.choice(PAPER_MATERIALS)} {gsm}GSM/ {rng.randint(50, 120)}X{rng.randint(50, 120)}CM"
+
+
+def _master_carton(rng: random.Random) -> str:
+    return (f"MASTER CARTON {rng.choice(('JDP', 'KLM', 'BRT', 'SNX', 'ALP'))}{rng.randint(10, 99)}"
+            f"-{rng.randint(1, 40):02d}{rng.choice(('ELM', 'STD', 'EXP', 'A', 'B'))}")
+
+
+def _plywood(rng: random.Random) -> str:
+    return f"PLYWOOD {rng.choice((1220, 1830))}X{rng.choice((2440, 2135))}X{rng.choice((3, 6, 9, 12, 15, 18))}MM"
+
+
+def _ink(rng: random.Random) -> str:
+    return (f"INK {rng.choice(('CYAN', 'MAGENTA', 'YELLOW', 'BLACK', 'PMS 185', 'WHITE'))} "
+            f"{rng.choice(('OFFSET', 'FLEXO', 'UV', 'GRAVURE'))} {rng.choice((1, 2.5, 5, 20))}KG")
+
+
+def _toner(rng: random.Random) -> str:
+    return f"TONER {rng.choice(('HP', 'CANON', 'BROTHER', 'KYOCERA'))} {rng.choice(('85A', '78A', 'TN2060', 'TK1120', 'CF283A'))}"
+
+
+def _dimensions(rng: random.Random) -> str:
+    if rng.random() < 0.5:
+        return f"{rng.randint(10, 200)}X{rng.randint(10, 200)}X{rng.randint(5, 80)}{rng.choice(('CM', 'MM'))}"
+    return f"{rng.randint(10, 200)} X {rng.randint(10, 200)} {rng.choice(('CM', 'MM', 'INCH'))}"
+
+
+def _code(rng: random.Random) -> str:
+    return f"C{rng.randint(0, 9_999_999):07d}-{rng.randint(1, 9999):04d}"
+
+
+def _generic(rng: random.Random) -> str:
+    first_word = rng.choice(("LEM", "SOLVENT", "PALLET", "STRAPPING", "GLUE", "LAKBAN", "SARUNG TANGAN",
+                             "PE", "3", "OLI"))  # Short and numeric first words hit UNCATEGORIZED_L1
+    return f"{first_word} {rng.choice(('PUTIH', 'KUNING', 'BENING', 'TYPE A', 'TYPE B'))} {rng.randint(1, 50)}"
+
+
+# Description family -> (builder, share of items, Item Group Code, Item Group Name, units)
+DESCRIPTION_FAMILIES = {
+    "paper_gsm": (_paper, 0.25, "11", "KERTAS", ("SHEET", "KG", "REAM")),
+    "master_carton": (_master_carton, 0.15, "21", "KARTON", ("PCS",)),
+    "plywood": (_plywood, 0.08, "31", "KAYU", ("SHEET",)),
+    "ink": (_ink, 0.10, "41", "TINTA", ("KG", "CAN")),
+    "toner": (_toner, 0.05, "42", "TONER", ("PCS",)),
+    "dimensions": (_dimensions, 0.12, "51", "PACKAGING", ("PCS", "ROLL")),
+    "code": (_code, 0.05, "61", "SPAREPART", ("PCS", "SET")),
+    "generic": (_generic, 0.20, "71", "UMUM", ("PCS", "LITER", "BOX", "ROLL")),
+}
+
+# Units ordered in packs, with their conversion factor to the base unit
+UNIT_FACTORS = {"REAM": 500.0, "BOX": 12.0, "SET": 4.0}
+
+
+def make_descriptions(count: int, seed: int = 11) -> List[str]:
+    """Item descriptions in the same family mix as the generated items."""
+    rng = random.Random(seed)
+    builders = [family[0] for family in DESCRIPTION_FAMILIES.values()]
+    weights = [family[1] for family in DESCRIPTION_FAMILIES.values()]
+    return [builder(rng) for builder in rng.choices(builders, weights, k=count)]
+
+
+def _zipf_weights(count: int, exponent: float) -> np.ndarray:
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+class _Catalog:
+    """Suppliers and items shared by all chunks of one dataset."""
+
+    def __init__(self, suppliers: int, items: int, seed: int):
+        rng = random.Random(seed)
+        np_rng = np.random.default_rng(seed)
+
+        self.supplier_code = np.array([f"S{i:05d}" for i in range(suppliers)], dtype=object)
+        self.supplier_name = np.array(
+            [f"PT {rng.choice(('SINAR', 'MAJU', 'JAYA', 'ABADI', 'MULIA', 'KARYA'))} "
+             f"{rng.choice(('PRIMA', 'SENTOSA', 'MAKMUR', 'PERKASA', 'UTAMA'))} {i:04d}" for i in range(suppliers)],
+            dtype=object)
+        self.supplier_tlp = np.array(
+            [f"0{rng.choice((21, 22, 31, 61))}-{rng.randint(1_000_000, 9_999_999)}" for _ in range(suppliers)],
+            dtype=object)
+        self.supplier_currency = np_rng.choice(list(CURRENCY_RATES), suppliers, p=(0.82, 0.13, 0.05))
+        self.supplier_terms = np_rng.choice(
+            np.array(("CASH", "NET 30", "NET 45", "NET 60", "CBD"), dtype=object), suppliers)
+        self.supplier_weights = _zipf_weights(suppliers, 1.1)
+
+        families = list(DESCRIPTION_FAMILIES.values())
+        family_index = np_rng.choice(len(families), items, p=[family[1] for family in families])
+        descriptions, group_codes, group_names, units, codes = [], [], [], [], []
+        for i, index in enumerate(family_index):
+            builder, _, group_code, group_name, family_units = families[index]
+            descriptions.append(builder(rng))
+            group_codes.append(group_code)
+            group_names.append(group_name)
+            units.append(rng.choice(family_units))
+            codes.append(f"{group_code}{i:07d}")
+        self.item_code = np.array(codes, dtype=object)
+        # A few items only have a code; folder generation then parses ITEM
+        self.item_desc = np.array(descriptions, dtype=object)
+        self.item_desc[np_rng.random(items) < 0.03] = ""
+        self.item_group_code = np.array(group_codes, dtype=object)
+        self.item_group_name = np.array(group_names, dtype=object)
+        self.item_unit = np.array(units, dtype=object)
+        self.item_factor = np.array([UNIT_FACTORS.get(unit, 1.0) for unit in units])
+        self.item_base_price_idr = np.round(np_rng.lognormal(10.5, 1.6, items), -1) + 100
+        self.item_weights = _zipf_weights(items, 1.05)
+
+
+def _chunk_frame(catalog: _Catalog, rng: np.random.Generator, rows: int, start: pd.Timestamp,
+                 end: pd.Timestamp, now: pd.Timestamp, companies: Sequence[str], po_offset: int) -> pd.DataFrame:
+    # Purchase orders of 1-8 lines, one supplier, company and date each
+    lines_per_po = rng.integers(1, 9, rows)
+    po_count = int(np.searchsorted(np.cumsum(lines_per_po), rows)) + 1
+    lines_per_po = lines_per_po[:po_count]
+    lines_per_po[-1] -= lines_per_po.sum() - rows
+    po_index = np.repeat(np.arange(po_count), lines_per_po)
+    line_no = np.arange(rows) - np.repeat(np.cumsum(lines_per_po) - lines_per_po, lines_per_po) + 1
+
+    span_seconds = max(int((end - start).total_seconds()), 1)
+    po_dates = start + pd.to_timedelta(np.sort(rng.integers(0, span_seconds, po_count)), unit="s")
+    po_dates = po_dates.floor("min")
+    order_date = po_dates[po_index]
+    companies_by_po = rng.choice(np.array(companies, dtype=object), po_count)
+    po_company = companies_by_po[po_index]
+
+    items = rng.choice(len(catalog.item_code), rows, p=catalog.item_weights)
+    suppliers = rng.choice(len(catalog.supplier_code), po_count, p=catalog.supplier_weights)[po_index]
+
+    currency = catalog.supplier_currency[suppliers]
+    base_rate = np.vectorize(CURRENCY_RATES.get, otypes=[float])(currency)
+    rate = np.where(currency == "IDR", 1.0, np.round(base_rate * rng.normal(1.0, 0.03, rows), 2))
+    qty = np.maximum(1, np.round(rng.lognormal(3.5, 1.3, rows)))
+    idr_price = np.round(catalog.item_base_price_idr[items] * rng.normal(1.0, 0.08, rows).clip(0.7, 1.3), 2)
+    original_price = np.round(idr_price / rate, 4)
+    factor = catalog.item_factor[items]
+
+    # Older orders are mostly received; recent ones still open or partial
+    age_days = (now - order_date).days.to_numpy()
+    roll = rng.random(rows)
+    status = np.where(age_days > 60, np.where(roll < 0.93, "Closed", "Partial"),
+                      np.where(roll < 0.5, "Open", np.where(roll < 0.8, "Partial", "Closed")))
+    delivered = np.select([status == "Closed", status == "Partial"],
+                          [qty, np.floor(qty * rng.uniform(0.1, 0.9, rows))], default=0.0)
+    received = status != "Open"
+    received_date = pd.Series(order_date + pd.to_timedelta(rng.integers(2, 45, rows), unit="D"))
+    received_date[~received] = pd.NaT
+    pr_date = order_date - pd.to_timedelta(rng.integers(1, 15, rows), unit="D")
+    plan_received = order_date + pd.to_timedelta(rng.integers(7, 30, rows), unit="D")
+
+    po_suffixes = [f"{company}/{year}/{po_offset + n:07d}"
+                   for n, (company, year) in enumerate(zip(companies_by_po, po_dates.year))]
+    po_numbers = np.array(["PO/" + suffix for suffix in po_suffixes], dtype=object)[po_index]
+    pr_numbers = np.array(["PR/" + suffix for suffix in po_suffixes], dtype=object)[po_index]
+    receipt_numbers = np.where(received, np.char.add("RCV/", po_numbers.astype(str)), "")
+
+    item_codes = catalog.item_code[items]
+    item_desc = catalog.item_desc[items]
+    frame = pd.DataFrame({
+        'SUPPLIER_CODE': catalog.supplier_code[suppliers],
+        'Supplier_Name': catalog.supplier_name[suppliers],
+        'PO_No': po_numbers,
+        'PO Status': status.astype(object),
+        'TGL_PO': order_date,
+        'PO_No Line': line_no,
+        'ITEM': item_codes,
+        'ITEM_DESC': item_desc,
+        'ITEM_DESC2': np.where(rng.random(rows) < 0.1, "EX STOCK", ""),
+        'QTY_ORDER': qty,
+        'UNIT': catalog.item_unit[items],
+        'CONVERTION_FACTOR': factor,
+        'QTY_ORDER_CONVERTION': qty * factor,
+        'Original_PRICE': original_price,
+        'Currency': currency.astype(object),
+        'Rate': rate,
+        'ORDER_AMOUNT': np.round(qty * original_price, 2),
+        'IDR_PRICE': idr_price,
+        'Order Amount IDR': np.round(qty * idr_price, 2),
+        'RECEIVED_NO': receipt_numbers.astype(object),
+        'RECEIVED_DATE': received_date.to_numpy(),
+        'DELIVERED_QTY': delivered,
+        'PR_No': pr_numbers,
+        'PLAN_RECEIVED': plan_received,
+        'Term_Payment_at_PO': catalog.supplier_terms[suppliers],
+        'Item Group Code': catalog.item_group_code[items],
+        'Item Group Name': catalog.item_group_name[items],
+        'First2DigitItemCode': np.array([code[:2] for code in item_codes], dtype=object),
+        'Supplier Tlp': catalog.supplier_tlp[suppliers],
+        'PR Ref-A': np.array([f"REF-{n:06d}" for n in rng.integers(0, 1_000_000, rows)], dtype=object),
+        'PR Ref-B': np.where(rng.random(rows) < 0.2, "URGENT", ""),
+        'PR Created by': rng.choice(np.array(BUYERS, dtype=object), rows),
+        'PO Created by': rng.choice(np.array(BUYERS, dtype=object), rows),
+        'Tax Code': np.where(currency == "IDR", "PPN11", "NON-PPN"),
+        'PR Date': pr_date,
+        'ITEM_PURCHASE_TEXT': np.array(
+            [f"{desc or code} - pengiriman ke gudang {company}" for desc, code, company
+             in zip(item_desc, item_codes, po_company)], dtype=object),
+    })
+    frame[COMPANY_COLUMN] = po_company
+    return frame
+
+
+def generate_po_chunks(rows: int, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                       companies: Sequence[str] = ("C01", "C02", "C03"),
+                       from_year: int = 2022, to_year: int = 2024,
+                       suppliers: int = 800, items: int = 20_000,
+                       seed: int = 42) -> Iterator[pd.DataFrame]:
+    """
+    Yields `rows` synthetic PO_ListProd rows (plus Company_ID) as DataFrames of
+    up to `chunk_size` rows, in TGL_PO order across chunks. The same
+    arguments always produce the same data. Nothing is yielded for rows <= 0.
+    """
+    if rows <= 0:
+        return
+    catalog = _Catalog(suppliers, items, seed)
+    rng = np.random.default_rng(seed + 1)
+    start = pd.Timestamp(from_year, 1, 1)
+    end = pd.Timestamp(to_year + 1, 1, 1)
+    now = end
+    chunk_count = max(1, -(-rows // chunk_size))
+    boundaries = pd.date_range(start, end, periods=chunk_count + 1)
+    produced, po_offset = 0, 1
+    for index in range(chunk_count):
+        size = min(chunk_size, rows - produced)
+        frame = _chunk_frame(catalog, rng, size, boundaries[index], boundaries[index + 1],
+                             now, companies, po_offset)
+        po_offset += int(frame['PO_No Line'].eq(1).sum())
+        produced += size
+        yield frame
+
+
+def generate_po_frame(rows: int, seed: int = 42, **kwargs) -> pd.DataFrame:
+    """All rows in one DataFrame; for sizes that fit in memory."""
+    return pd.concat(list(generate_po_chunks(rows, seed=seed, **kwargs)), ignore_index=True)
+
+
+# --- Outputs ---
+
+def write_csv(chunks: Iterator[pd.DataFrame], path: str) -> int:
+    rows = 0
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for chunk in chunks:
+            chunk.to_csv(f, header=rows == 0, index=False, date_format="%Y-%m-%d %H:%M:%S")
+            rows += len(chunk)
+            print(f"Synthetic data: {rows} rows written to {path}")
+    return rows
+
+
+def write_parquet(chunks: Iterator[pd.DataFrame], path: str) -> int:
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Parquet output needs pyarrow (pip install pyarrow).")
+
+    rows = 0
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, preserve_index=False)
+            if writer is None:
+                writer = pq.ParquetWriter(path, table.schema)
+            writer.write_table(table.cast(writer.schema))
+            rows += len(chunk)
+            print(f"Synthetic data: {rows} rows written to {path}")
+    finally:
+        if writer is not None:
+            writer.close()
+    return rows
+
+
+def load_into_mysql(chunks: Iterator[pd.DataFrame]) -> int:
+    """
+    Loads the rows like main_etl_process does (transform, split the detail
+    columns, create and load purchase_orders and its side table, index,
+    refresh the dashboard rollups), one chunk at a time. Replaces the
+    existing purchase_orders data.
+    """
+    # Imported here so file output works without the ETL's database drivers
+    from api.db.database import get_mysql_connection, reset_table_columns_cache
+    from api.services.dashboard_service import (refresh_dashboard_summary, refresh_folder_spend_rollup,
+                                                refresh_supplier_spend_rollup)
+    from etl import etl_script
+
+    conn = get_mysql_connection()
+    if conn is None:
+        raise RuntimeError("Could not connect to MySQL.")
+
+    rows = 0
+    cumulative_qty = cumulative_amount = 0.0
+    try:
+        for chunk in chunks:
+            transformed = etl_script.transform_data(chunk)
+            # transform_data accumulates within the frame; chunks are in date order
+            transformed['Total_Cumulative_QTY_Order'] += cumulative_qty
+            transformed['Total_Cumulative_IDR_Amount'] += cumulative_amount
+            cumulative_qty = float(transformed['Total_Cumulative_QTY_Order'].iloc[-1])
+            cumulative_amount = float(transformed['Total_Cumulative_IDR_Amount'].iloc[-1])
+
+            hot_df, details_df = etl_script.split_detail_columns(transformed)
+            hot_df['id'] += rows
+            details_df['id'] += rows
+            if rows == 0:
+                if not (etl_script.create_table_in_mysql(conn, "purchase_orders", hot_df)
+                        and etl_script.create_table_in_mysql(conn, etl_script.DETAILS_TABLE_NAME, details_df)):
+                    raise RuntimeError("Could not create the purchase order tables.")
+                etl_script.publish_etl_load_version(conn)
+            if not (etl_script.load_data_to_mysql(conn, "purchase_orders", hot_df)
+                    and etl_script.load_data_to_mysql(conn, etl_script.DETAILS_TABLE_NAME, details_df)):
+                raise RuntimeError(f"Loading failed after {rows} rows.")
+            rows += len(hot_df)
+            print(f"Synthetic data: {rows} rows loaded into MySQL")
+
+        etl_script.create_indexes_in_mysql(
+            conn, "purchase_orders", etl_script.PURCHASE_ORDERS_INDEXES)
+        etl_script.create_indexes_in_mysql(
+            conn, etl_script.DETAILS_TABLE_NAME, etl_script.PURCHASE_ORDER_DETAILS_INDEXES)
+    finally:
+        conn.close()
+    reset_table_columns_cache()
+    refresh_dashboard_summary()
+    refresh_supplier_spend_rollup()
+    refresh_folder_spend_rollup()
+    return rows
+
+
+def main(argv: Optional[Sequence[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    output = parser.add_mutually_exclusive_group(required=True)
+    output.add_argument("--csv", metavar="PATH")
+    output.add_argument("--parquet", metavar="PATH")
+    output.add_argument("--mysql", action="store_true",
+                        help="Load into the configured MySQL database (replaces purchase_orders)")
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--companies", nargs="+", default=["C01", "C02", "C03"])
+    parser.add_argument("--from-year", type=int, default=2022)
+    parser.add_argument("--to-year", type=int, default=2024)
+    parser.add_argument("--suppliers", type=int, default=800)
+    parser.add_argument("--items", type=int, default=20_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args(argv)
+    if args.from_year > args.to_year:
+        parser.error("--from-year must not be after --to-year")
+    if args.rows < 1:
+        parser.error("--rows must be at least 1")
+    if args.chunk_size < 1:
+        parser.error("--chunk-size must be at least 1")
+
+    chunks = generate_po_chunks(
+        args.rows, chunk_size=args.chunk_size, companies=args.companies,
+        from_year=args.from_year, to_year=args.to_year,
+        suppliers=args.suppliers, items=args.items, seed=args.seed)
+    started = time.perf_counter()
+    try:
+        if args.csv:
+            rows = write_csv(chunks, args.csv)
+        elif args.parquet:
+            rows = write_parquet(chunks, args.parquet)
+        else:
+            rows = load_into_mysql(chunks)
+    except RuntimeError as e:
+        print(f"Synthetic data: {e}", file=sys.stderr)
+        sys.exit(1)
+    elapsed = time.perf_counter() - started
+    print(f"Synthetic data: {rows} rows in {elapsed:.1f} s ({rows / elapsed:,.0f} rows/s).")
+
+
+if __name__ == "__main__":
+    main()
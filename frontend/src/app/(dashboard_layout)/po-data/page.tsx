@@ -20,7 +20,7 @@ export default function PODataPage() {
             setError(null);
             try {
                 // Example: Fetch first page, 10 items
-                const fetchedData = await fetchPurchaseOrders({ page: 1, limit: 10 });
+                const fetchedData = await fetchPurchaseOrders({ page: 1, limit: 10, fields: "list" });
                 setData(fetchedData);
             } catch (err: any) {
                 console.error("Failed to load PO data:", err);
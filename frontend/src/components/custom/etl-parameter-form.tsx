@@ -7,8 +7,8 @@ import * as z from "zod";
 import { Button } from "@/components/ui/button";
 import { Input } from "@/components/ui/input";
 import { Label } from "@/components/ui/label";
-import { useState } from "react";
-import { triggerEtlProcess } from "@/lib/api"; // Import the API function
+import { useEffect, useRef, useState } from "react";
+import { triggerEtlProcess, subscribeToJobEvents, JobStatus } from "@/lib/api"; // Import the API function
 
 // Define the schema for form validation using Zod
 const etlFormSchema = z.object({
@@ -32,9 +32,33 @@ const etlFormSchema = z.object({
 
 type EtlFormValues = z.infer<typeof etlFormSchema>;
 
+function formatEta(seconds: number): string {
+    if (seconds < 60) return `${Math.ceil(seconds)}s`;
+    return `${Math.floor(seconds / 60)}m ${Math.ceil(seconds % 60)}s`;
+}
+
+function describeProgress(job: JobStatus): string {
+    if (job.status === "queued") return "Queued, waiting for the previous job to finish...";
+    if (job.stage === "waiting_for_lock") return "Waiting for another ETL or folder generation run to finish...";
+    const parts = [`Stage: ${job.stage ?? "starting"}`];
+    if (job.rows_done != null) {
+        parts.push(job.rows_total != null
+            ? `${job.rows_done.toLocaleString()} / ${job.rows_total.toLocaleString()} rows`
+            : `${job.rows_done.toLocaleString()} rows`);
+    }
+    if (job.rows_per_second != null) parts.push(`${Math.round(job.rows_per_second).toLocaleString()} rows/s`);
+    if (job.eta_seconds != null) parts.push(`ETA ${formatEta(job.eta_seconds)}`);
+    return parts.join(" · ");
+}
+
 export function EtlParameterForm() {
     const [isLoading, setIsLoading] = useState(false);
     const [message, setMessage] = useState<string | null>(null);
+    const [job, setJob] = useState<JobStatus | null>(null);
+    const unsubscribeRef = useRef<(() => void) | null>(null);
+
+    // Close the progress stream when the form unmounts
+    useEffect(() => () => unsubscribeRef.current?.(), []);
 
     const form = useForm<EtlFormValues>({
         resolver: zodResolver(etlFormSchema),
@@ -52,17 +76,34 @@ export function EtlParameterForm() {
     const onSubmit: SubmitHandler<EtlFormValues> = async (data) => {
         setIsLoading(true);
         setMessage(null);
+        setJob(null);
         console.log("Submitting ETL parameters:", data);
 
         try {
             const result = await triggerEtlProcess(data); // Use the imported API function
-            setMessage(`ETL process started successfully: ${result.message}`);
-            // Optionally reset form or give other feedback
-            // form.reset(); 
+            setMessage(result.message);
+            // Progress is pushed by the server until the job finishes
+            unsubscribeRef.current?.();
+            unsubscribeRef.current = subscribeToJobEvents(
+                result.job_id,
+                setJob,
+                (finished) => {
+                    unsubscribeRef.current = null;
+                    setIsLoading(false);
+                    if (!finished) {
+                        setMessage("Error: Lost track of the ETL job. Check the server logs.");
+                    } else if (finished.status === "succeeded") {
+                        setJob(finished);
+                        setMessage("ETL process completed successfully.");
+                    } else {
+                        setJob(finished);
+                        setMessage(`Error: ETL process ${finished.status}${finished.error ? `: ${finished.error}` : "."}`);
+                    }
+                },
+            );
         } catch (error: any) {
             console.error("ETL trigger error:", error);
             setMessage(`Error: ${error.message || "An unknown error occurred"}`);
-        } finally {
             setIsLoading(false);
         }
     };
@@ -135,6 +176,10 @@ export function EtlParameterForm() {
                 {isLoading ? "Processing..." : "Run ETL Process"}
             </Button>
 
+            {job && job.status !== "succeeded" && (
+                <p className="mt-4 text-sm text-muted-foreground">{describeProgress(job)}</p>
+            )}
+
             {message && (
                 <p className={`mt-4 text-sm ${message.startsWith("Error:") ? "text-red-600" : "text-green-600"}`}>
                     {message}
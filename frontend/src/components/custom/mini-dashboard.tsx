@@ -71,47 +71,54 @@ const MiniDashboard = () => {
     }
 
     return (
-        <div className="grid gap-4 md:grid-cols-2 lg:grid-cols-4">
-            <Card>
-                <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
-                    <CardTitle className="text-sm font-medium">Total Purchase Orders</CardTitle>
-                    <Package className="h-4 w-4 text-muted-foreground" />
-                </CardHeader>
-                <CardContent>
-                    <div className="text-2xl font-bold">{formatNumber(data.total_purchase_orders)}</div>
-                    <p className="text-xs text-muted-foreground">Total POs recorded</p>
-                </CardContent>
-            </Card>
-            <Card>
-                <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
-                    <CardTitle className="text-sm font-medium">Total Order Amount (IDR)</CardTitle>
-                    <DollarSign className="h-4 w-4 text-muted-foreground" />
-                </CardHeader>
-                <CardContent>
-                    <div className="text-2xl font-bold">{formatCurrency(data.total_order_amount_idr)}</div>
-                    <p className="text-xs text-muted-foreground">Sum of all order amounts</p>
-                </CardContent>
-            </Card>
-            <Card>
-                <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
-                    <CardTitle className="text-sm font-medium">L1 Categories</CardTitle>
-                    <Layers className="h-4 w-4 text-muted-foreground" />
-                </CardHeader>
-                <CardContent>
-                    <div className="text-2xl font-bold">{formatNumber(data.total_l1_categories)}</div>
-                    <p className="text-xs text-muted-foreground">Unique general categories</p>
-                </CardContent>
-            </Card>
-            <Card>
-                <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
-                    <CardTitle className="text-sm font-medium">L2 Categories (Items)</CardTitle>
-                    <ListTree className="h-4 w-4 text-muted-foreground" />
-                </CardHeader>
-                <CardContent>
-                    <div className="text-2xl font-bold">{formatNumber(data.total_l2_categories)}</div>
-                    <p className="text-xs text-muted-foreground">Unique specific item types</p>
-                </CardContent>
-            </Card>
+        <div className="space-y-2">
+            <div className="grid gap-4 md:grid-cols-2 lg:grid-cols-4">
+                <Card>
+                    <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
+                        <CardTitle className="text-sm font-medium">Total Purchase Orders</CardTitle>
+                        <Package className="h-4 w-4 text-muted-foreground" />
+                    </CardHeader>
+                    <CardContent>
+                        <div className="text-2xl font-bold">{formatNumber(data.total_purchase_orders)}</div>
+                        <p className="text-xs text-muted-foreground">Total POs recorded</p>
+                    </CardContent>
+                </Card>
+                <Card>
+                    <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
+                        <CardTitle className="text-sm font-medium">Total Order Amount (IDR)</CardTitle>
+                        <DollarSign className="h-4 w-4 text-muted-foreground" />
+                    </CardHeader>
+                    <CardContent>
+                        <div className="text-2xl font-bold">{formatCurrency(data.total_order_amount_idr)}</div>
+                        <p className="text-xs text-muted-foreground">Sum of all order amounts</p>
+                    </CardContent>
+                </Card>
+                <Card>
+                    <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
+                        <CardTitle className="text-sm font-medium">L1 Categories</CardTitle>
+                        <Layers className="h-4 w-4 text-muted-foreground" />
+                    </CardHeader>
+                    <CardContent>
+                        <div className="text-2xl font-bold">{formatNumber(data.total_l1_categories)}</div>
+                        <p className="text-xs text-muted-foreground">Unique general categories</p>
+                    </CardContent>
+                </Card>
+                <Card>
+                    <CardHeader className="flex flex-row items-center justify-between space-y-0 pb-2">
+                        <CardTitle className="text-sm font-medium">L2 Categories (Items)</CardTitle>
+                        <ListTree className="h-4 w-4 text-muted-foreground" />
+                    </CardHeader>
+                    <CardContent>
+                        <div className="text-2xl font-bold">{formatNumber(data.total_l2_categories)}</div>
+                        <p className="text-xs text-muted-foreground">Unique specific item types</p>
+                    </CardContent>
+                </Card>
+            </div>
+            <p className="text-xs text-muted-foreground text-right">
+                {data.last_refreshed_at
+                    ? `Last updated: ${new Date(data.last_refreshed_at).toLocaleString()}`
+                    : "Not computed yet: run the ETL or folder generation."}
+            </p>
         </div>
     );
 };
@@ -6,13 +6,14 @@ interface FetchPOParams {
     page?: number;
     limit?: number;
     search?: string;
-    // Add other filter params as needed
-    // layer_filter?: string;
-    // month_filter?: number;
+    layer_filter?: number | string; // layer_definitions.id of an L1 or L2 folder
+    month_filter?: number; // 1-12
+    year_filter?: number;
+    fields?: string; // Column projection: field names and/or the "list" / "full" presets
 }
 
 export async function fetchPurchaseOrders(params: FetchPOParams = {}): Promise<PurchaseOrder[]> {
-    const { page = 1, limit = 10, search } = params;
+    const { page = 1, limit = 10, search, layer_filter, month_filter, year_filter, fields } = params;
     const queryParams = new URLSearchParams({
         skip: ((page - 1) * limit).toString(),
         limit: limit.toString(),
@@ -21,7 +22,18 @@ export async function fetchPurchaseOrders(params: FetchPOParams = {}): Promise<P
     if (search) {
         queryParams.append("search", search);
     }
-    // Add other filters to queryParams if they exist
+    if (layer_filter !== undefined) {
+        queryParams.append("layer_filter", layer_filter.toString());
+    }
+    if (month_filter !== undefined) {
+        queryParams.append("month_filter", month_filter.toString());
+    }
+    if (year_filter !== undefined) {
+        queryParams.append("year_filter", year_filter.toString());
+    }
+    if (fields) {
+        queryParams.append("fields", fields);
+    }
 
     try {
         console.log(`Fetching POs from: ${API_BASE_URL}/purchase-orders?${queryParams.toString()}`);
@@ -79,6 +91,8 @@ export interface MiniDashboardData {
     total_order_amount_idr: number;
     total_l1_categories: number;
     total_l2_categories: number;
+    company_id?: string | null;
+    last_refreshed_at?: string | null; // When the precomputed summary was last rebuilt
 }
 
 export async function fetchMiniDashboardData(token: string): Promise<MiniDashboardData> {
@@ -101,7 +115,104 @@ export async function fetchMiniDashboardData(token: string): Promise<MiniDashboa
 }
 
 
-export async function triggerEtlProcess(etlParams: any): Promise<any> {
+// Matches the Job schema of /process/jobs
+export interface JobStatus {
+    id: string;
+    kind: "etl" | "folder_generation";
+    status: "queued" | "running" | "succeeded" | "failed" | "cancelled";
+    created_at: string;
+    started_at?: string | null;
+    finished_at?: string | null;
+    stage?: string | null;
+    stages: { stage: string; seconds: number; failed: boolean }[];
+    rows_done?: number | null;
+    rows_total?: number | null;
+    rows_per_second?: number | null;
+    eta_seconds?: number | null;
+    error?: string | null;
+    revision: number;
+}
+
+export interface JobSubmitted {
+    message: string;
+    job_id: string;
+    status_url: string;
+}
+
+// Follows a job over server-sent events instead of polling. onUpdate gets
+// every change; onEnd gets the final status (null if the job is unknown to
+// the server). Returns a function that closes the stream.
+export function subscribeToJobEvents(
+    jobId: string,
+    onUpdate: (job: JobStatus) => void,
+    onEnd: (job: JobStatus | null) => void,
+): () => void {
+    const jobUrl = `${API_BASE_URL}/process/jobs/${encodeURIComponent(jobId)}`;
+    let source: EventSource | null = null;
+    let retryTimer: ReturnType<typeof setTimeout> | null = null;
+    let closed = false;
+
+    const finish = (job: JobStatus | null) => {
+        closed = true;
+        source?.close();
+        onEnd(job);
+    };
+
+    // The job lives in the database, so any worker can answer for it. When
+    // the stream is refused (e.g. 503), ask for the job once and reconnect
+    // unless it is gone or already finished.
+    const recover = async () => {
+        try {
+            const response = await fetch(jobUrl);
+            if (response.status === 404) {
+                finish(null);
+                return;
+            }
+            if (response.ok) {
+                const job = (await response.json()) as JobStatus;
+                if (["succeeded", "failed", "cancelled"].includes(job.status)) {
+                    finish(job);
+                    return;
+                }
+                onUpdate(job);
+            }
+        } catch (error) {
+            console.error("Error in subscribeToJobEvents:", error);
+        }
+        if (!closed) {
+            retryTimer = setTimeout(connect, 5000);
+        }
+    };
+
+    const connect = () => {
+        source = new EventSource(`${jobUrl}/events`);
+        source.addEventListener("progress", (event) => {
+            onUpdate(JSON.parse((event as MessageEvent).data) as JobStatus);
+        });
+        source.addEventListener("end", (event) => {
+            const job = JSON.parse((event as MessageEvent).data);
+            finish(job && job.id ? (job as JobStatus) : null);
+        });
+        // EventSource reconnects by itself after network errors; an error
+        // response closes it
+        source.onerror = () => {
+            if (source?.readyState === EventSource.CLOSED && !closed) {
+                void recover();
+            }
+        };
+    };
+
+    connect();
+    return () => {
+        closed = true;
+        if (retryTimer) {
+            clearTimeout(retryTimer);
+        }
+        source?.close();
+    };
+}
+
+export async function triggerEtlProcess(etlParams: any): Promise<JobSubmitted> {
     try {
         const response = await fetch(`${API_BASE_URL}/process/trigger-etl`, {
             method: "POST",
@@ -197,16 +308,22 @@ export async function fetchLayerData(slugParts: string[]): Promise<FrontendLayer
 export interface LayerItemsResponse {
     layer_name: string;
     items: FrontendItemInLayer[];
+    next_cursor?: string | null; // Pass back as `cursor` to fetch the next page
 }
 
-export async function fetchItemsForLayerDefinitionPk(layerDefinitionPk: number): Promise<LayerItemsResponse> {
+export async function fetchItemsForLayerDefinitionPk(layerDefinitionPk: number, cursor?: string | null): Promise<LayerItemsResponse> {
     if (layerDefinitionPk <= 0) {
         console.error("fetchItemsForLayerDefinitionPk: layerDefinitionPk must be a positive number.");
         // Return a default structure that matches LayerItemsResponse
         return { layer_name: "Invalid Layer PK", items: [] };
     }
     try {
-        const url = `${API_BASE_URL}/classification/item-details-by-layer-definition-pk/${layerDefinitionPk}`;
+        const queryParams = new URLSearchParams();
+        if (cursor) {
+            queryParams.append("cursor", cursor);
+        }
+        const query = queryParams.toString();
+        const url = `${API_BASE_URL}/classification/item-details-by-layer-definition-pk/${layerDefinitionPk}${query ? `?${query}` : ""}`;
         console.log(`Fetching Items for Layer Definition PK from: ${url}`);
         const response = await fetch(url);
 
@@ -226,6 +343,35 @@ export async function fetchItemsForLayerDefinitionPk(layerDefinitionPk: number):
     }
 }
 
+export type ExportFormat = "csv" | "xlsx";
+
+// Export endpoints stream the file, so hand the URL to the browser (link href or
+// window.location) instead of fetch(): the download then goes straight to disk.
+export function buildPurchaseOrdersExportUrl(params: Omit<FetchPOParams, "page" | "limit"> = {}, format: ExportFormat = "csv"): string {
+    const queryParams = new URLSearchParams({ format });
+    const { search, layer_filter, month_filter, year_filter, fields } = params;
+    if (search) {
+        queryParams.append("search", search);
+    }
+    if (layer_filter !== undefined) {
+        queryParams.append("layer_filter", layer_filter.toString());
+    }
+    if (month_filter !== undefined) {
+        queryParams.append("month_filter", month_filter.toString());
+    }
+    if (year_filter !== undefined) {
+        queryParams.append("year_filter", year_filter.toString());
+    }
+    if (fields) {
+        queryParams.append("fields", fields);
+    }
+    return `${API_BASE_URL}/purchase-orders/export?${queryParams.toString()}`;
+}
+
+export function buildLayerItemsExportUrl(layerDefinitionPk: number, format: ExportFormat = "csv"): string {
+    return `${API_BASE_URL}/classification/item-details-by-layer-definition-pk/${layerDefinitionPk}/export?format=${format}`;
+}
+
 export async function classifyNewItemAPI(description: string): Promise<any> {
     // Renamed from classifyNewItem to avoid conflict if this file is imported elsewhere
     // where classifyNewItem might already exist.
@@ -390,3 +536,36 @@ export async function updatePOChecklist(poId: number, checklistStatus: boolean,
         throw error;
     }
 }
+
+export interface POFieldsUpdate {
+    id: number;
+    Checklist?: boolean;
+    Keterangan?: string;
+}
+
+export interface BulkUpdateResult {
+    items: FrontendItemInLayer[];
+    not_found_ids: number[];
+}
+
+// Applies many Checklist/Keterangan edits in one request (one DB transaction).
+export async function updatePOsBulk(updates: POFieldsUpdate[], token: string): Promise<BulkUpdateResult> {
+    try {
+        const response = await fetch(`${API_BASE_URL}/purchase-orders/bulk`, {
+            method: "PUT",
+            headers: {
+                "Content-Type": "application/json",
+                "Authorization": `Bearer ${token}`,
+            },
+            body: JSON.stringify({ updates }),
+        });
+        const result = await response.json();
+        if (!response.ok) {
+            throw new Error(result.detail || `Failed to update ${updates.length} purchase orders`);
+        }
+        return result as BulkUpdateResult;
+    } catch (error) {
+        console.error("Error in updatePOsBulk:", error);
+        throw error;
+    }
+}
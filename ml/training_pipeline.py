@@ -1,5 +1,8 @@
 # Using the centralized DB connection
-from api.db.database import get_mysql_connection
+from api.db.database import get_mysql_connection, ensure_index
+from api.core.metrics import time_stage
+from api.core.progress import report_progress
+from api.services.dashboard_service import refresh_dashboard_summary, refresh_folder_spend_rollup
 import pandas as pd
 # from sentence_transformers import SentenceTransformer # No longer needed for folder structure
 # from sklearn.cluster import KMeans # No longer needed
@@ -232,6 +235,57 @@ def create_and_populate_parsed_layer_definitions(definitions_to_insert: list):
         conn.close()
 
 
+def ensure_classification_indexes():
+    """
+    Indexes used to list a folder's POs: the folder item listing and the
+    layer filter of GET /purchase-orders both look up item_classifications by
+    (layer_name, cluster_label) and join to purchase_orders on item_po_id.
+    """
+    conn = get_mysql_connection()
+    if not conn:
+        print("ML Pipeline: Failed to connect to MySQL for ensuring indexes.")
+        return
+    try:
+        ensure_index(conn, "item_classifications", "idx_ic_layer_cluster_po",
+                     ["layer_name", "cluster_label", "item_po_id"])
+        ensure_index(conn, "layer_definitions", "idx_ld_layer_parent",
+                     ["layer_name_db", "parent_layer_id"])
+    finally:
+        conn.close()
+
+
+def publish_folder_generation_version():
+    """
+    Records that a new folder hierarchy is complete.
+    API workers poll the latest id to know when to reload their in-memory folder tree.
+    """
+    conn = get_mysql_connection()
+    if not conn:
+        print("ML Pipeline: Failed to connect to MySQL for publishing the generation version.")
+        return None
+    cursor = conn.cursor()
+    try:
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS folder_generation_versions (
+                id INT AUTO_INCREMENT PRIMARY KEY,
+                published_at DATETIME NOT NULL
+            )
+        """)
+        cursor.execute(
+            "INSERT INTO folder_generation_versions (published_at) VALUES (NOW())")
+        conn.commit()
+        print(
+            f"ML Pipeline: Published folder generation version {cursor.lastrowid}.")
+        return cursor.lastrowid
+    except Exception as e:
+        print(f"ML Pipeline: Error publishing folder generation version: {e}")
+        conn.rollback()
+        return None
+    finally:
+        cursor.close()
+        conn.close()
+
+
 # --- ML Steps --- (These are no longer ML steps in the KMeans sense)
 
 # Added default for model_name
@@ -329,6 +383,7 @@ def parse_item_description_for_folders(description: str) -> tuple[str | None, st
 def run_folder_generation_pipeline():
     """
     Orchestrates the new parsing-based folder generation.
+    Returns True once the folders are generated and published.
     """
     print("ML Pipeline: Starting new folder generation logic...")
 
@@ -336,7 +391,7 @@ def run_folder_generation_pipeline():
     conn_clear = get_mysql_connection()
     if not conn_clear:
         print("ML Pipeline: DB connection failed, cannot clear tables. Aborting.")
-        return
+        return False
     cursor_clear = conn_clear.cursor()
     try:
         print("ML Pipeline: Clearing item_classifications and layer_definitions for parsed data...")
@@ -354,30 +409,34 @@ def run_folder_generation_pipeline():
         cursor_clear.close()
         conn_clear.close()
 
-    all_po_items_df = fetch_item_data_for_ml()  # Fetches all rows with descriptions
+    with time_stage("folder_generation", "fetch_items"):
+        all_po_items_df = fetch_item_data_for_ml()  # Fetches all rows with descriptions
 
     if all_po_items_df.empty:
         print("ML Pipeline: No item data fetched. Aborting folder generation.")
-        return
+        return False
 
     if 'description_for_embedding' not in all_po_items_df.columns:
         print("ML Pipeline: 'description_for_embedding' column is missing. Aborting.")
-        return
+        return False
 
     parsed_folders = []
-    for index, row in all_po_items_df.iterrows():
-        description = row['description_for_embedding']
-        po_id = row['id']  # Original PO id
-
-        l1_folder, l2_folder = parse_item_description_for_folders(description)
-        parsed_folders.append({
-            "po_id": po_id,
-            "original_description": description,
-            "l1_folder": l1_folder,
-            "l2_folder": l2_folder
-        })
-        print(
-            f"PO_ID: {po_id}, Desc: '{description}' -> L1: '{l1_folder}', L2: '{l2_folder}'")
+    with time_stage("folder_generation", "parse"):
+        for index, row in all_po_items_df.iterrows():
+            description = row['description_for_embedding']
+            po_id = row['id']  # Original PO id
+
+            l1_folder, l2_folder = parse_item_description_for_folders(description)
+            parsed_folders.append({
+                "po_id": po_id,
+                "original_description": description,
+                "l1_folder": l1_folder,
+                "l2_folder": l2_folder
+            })
+            print(
+                f"PO_ID: {po_id}, Desc: '{description}' -> L1: '{l1_folder}', L2: '{l2_folder}'")
+            report_progress("folder_generation", "parse",
+                            len(parsed_folders), len(all_po_items_df))
 
     # --- Database Population ---
     # 1. Prepare L1 layer definitions
@@ -392,7 +451,8 @@ def run_folder_generation_pipeline():
             "parent_layer_pk": None
         })
 
-    create_and_populate_parsed_layer_definitions(l1_definitions_to_insert)
+    with time_stage("folder_generation", "l1_definitions"):
+        create_and_populate_parsed_layer_definitions(l1_definitions_to_insert)
     print(
         f"ML Pipeline: Processed {len(unique_l1_folders)} L1 folder definitions.")
 
@@ -401,7 +461,7 @@ def run_folder_generation_pipeline():
     conn_for_parent_pk = get_mysql_connection()
     if not conn_for_parent_pk:
         print("ML Pipeline: Cannot connect to DB to fetch L1 parent PKs for L2 definitions. Aborting further DB operations.")
-        return
+        return False
     cursor_for_parent_pk = conn_for_parent_pk.cursor()
 
     l2_definitions_to_insert = []
@@ -449,15 +509,25 @@ def run_folder_generation_pipeline():
     if conn_for_parent_pk and conn_for_parent_pk.is_connected():
         conn_for_parent_pk.close()
 
-    create_and_populate_parsed_layer_definitions(l2_definitions_to_insert)
+    with time_stage("folder_generation", "l2_definitions"):
+        create_and_populate_parsed_layer_definitions(l2_definitions_to_insert)
     print(
         f"ML Pipeline: Processed {len(l2_definitions_to_insert)} L2 folder definitions.")
 
-    save_parsed_item_classifications(item_l2_classifications_to_save)
+    with time_stage("folder_generation", "classifications"):
+        save_parsed_item_classifications(item_l2_classifications_to_save)
     print(
         f"ML Pipeline: Processed {len(item_l2_classifications_to_save)} L2 item classifications.")
 
+    with time_stage("folder_generation", "indexes"):
+        ensure_classification_indexes()
+    with time_stage("folder_generation", "rollups"):
+        refresh_dashboard_summary()  # Folder counts changed
+        refresh_folder_spend_rollup()  # Every loaded month under the new folders
+    publish_folder_generation_version()
+
     print("ML Pipeline: Folder generation and database population finished.")
+    return True
 
 
 if __name__ == "__main__":